@@ -0,0 +1,293 @@
+"""Latency, throughput and queries per request of the quiz API under load.
+
+Concurrent clients replay a weighted mix of requests through the full Django
+stack (middleware, `config/urls.py` routes, views) against the data written by
+`manage.py seed_quizes`, and the results are saved as JSON:
+
+    python manage.py seed_quizes --users 50 --quizes 10 --flush
+    python -m benchmarks.api_load --concurrency 8 --requests 4000 \\
+        --output after.json --compare before.json
+
+Clients are threads of this process, each with its own database connection;
+the numbers are service times without network and server overhead, so compare
+runs made on the same machine and settings. Run with DEBUG off, Django keeps a
+log of every query when it is on.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+from collections import Counter, defaultdict
+
+from decouple import config
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", config("DJANGO_SETTINGS_MODULE"))
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from quizes import seed  # noqa: E402
+from quizes.models import Answer, Quiz  # noqa: E402
+
+# scenario -> relative weight in the request mix
+MIX = {
+    "quiz_list": 20,
+    "quiz_detail": 35,
+    "questions": 15,
+    "answers": 10,
+    "leaderboard": 10,
+    "stats": 5,
+    "attempt": 5,
+}
+
+
+class Dataset:
+    """Tokens of the seeded users and the answer ids of a sample of their quizes"""
+
+    def __init__(self, prefix, sample, rng):
+        users = seed.seeded_users(prefix)
+        self.tokens = dict(users.values_list("id", "auth_token__key"))
+        if not self.tokens:
+            raise SystemExit(f"No users seeded with prefix {prefix!r}")
+
+        quizes = list(Quiz.objects.filter(user__in=users).values_list("id", "user_id"))
+        self.quizes = rng.sample(quizes, min(sample, len(quizes)))
+        # quiz -> question -> answer ids
+        self.answers = defaultdict(lambda: defaultdict(list))
+        rows = Answer.objects.filter(
+            question__quiz_id__in=[quiz_id for quiz_id, _ in self.quizes]
+        ).values_list("question__quiz_id", "question_id", "id")
+        for quiz_id, question_id, answer_id in rows.iterator():
+            self.answers[quiz_id][question_id].append(answer_id)
+
+
+class Worker(threading.Thread):
+    def __init__(self, dataset, requests, warmup, seed, host):
+        super().__init__()
+        self.dataset = dataset
+        self.requests = requests
+        self.warmup = warmup
+        self.rng = random.Random(seed)
+        self.client = Client(HTTP_HOST=host, raise_request_exception=False)
+        self.samples = []
+        self.recording = False
+        self.started = None
+        self.queries = 0
+
+    def count_queries(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def request(self, scenario, method, path, token, data=None):
+        self.queries = 0
+        start = time.perf_counter()
+        with connection.execute_wrapper(self.count_queries):
+            response = getattr(self.client, method)(
+                path,
+                data,
+                content_type="application/json",
+                HTTP_AUTHORIZATION=f"Token {token}",
+            )
+        elapsed = time.perf_counter() - start
+        if self.recording:
+            sample = (scenario, elapsed, response.status_code, self.queries)
+            self.samples.append(sample)
+        return response
+
+    def run(self):
+        scenarios, weights = zip(*MIX.items())
+        try:
+            for n in range(self.warmup + self.requests):
+                if n == self.warmup:
+                    self.recording, self.started = True, time.perf_counter()
+                scenario = self.rng.choices(scenarios, weights)[0]
+                getattr(self, scenario)(scenario)
+        finally:
+            connections.close_all()
+
+    def pick(self):
+        quiz_id, user_id = self.rng.choice(self.dataset.quizes)
+        return quiz_id, self.dataset.tokens[user_id]
+
+    def quiz_list(self, scenario):
+        _, token = self.pick()
+        self.request(scenario, "get", reverse("quizes:quizes_list"), token)
+
+    def quiz_detail(self, scenario):
+        quiz_id, token = self.pick()
+        path = reverse("quizes:quiz_detail", args=[quiz_id])
+        self.request(scenario, "get", path, token)
+
+    def questions(self, scenario):
+        quiz_id, token = self.pick()
+        path = reverse("quizes:questions", args=[quiz_id])
+        self.request(scenario, "get", path, token)
+
+    def answers(self, scenario):
+        quiz_id, token = self.pick()
+        questions = list(self.dataset.answers[quiz_id]) or [0]
+        path = reverse("quizes:answers", args=[quiz_id, self.rng.choice(questions)])
+        self.request(scenario, "get", path, token)
+
+    def leaderboard(self, scenario):
+        quiz_id, token = self.pick()
+        path = reverse("quizes:leaderboard", args=[quiz_id])
+        self.request(scenario, "get", path, token)
+
+    def stats(self, scenario):
+        quiz_id, token = self.pick()
+        path = reverse("quizes:quiz_stats", args=[quiz_id])
+        self.request(scenario, "get", path, token)
+
+    def attempt(self, scenario):
+        """Start an attempt and submit one random answer per question"""
+        quiz_id, _ = self.pick()
+        token = self.dataset.tokens[self.rng.choice(list(self.dataset.tokens))]
+        path = reverse("quizes:attempts", args=[quiz_id])
+        response = self.request("attempt_start", "post", path, token)
+        if response.status_code != 201:
+            return
+        answers = [
+            self.rng.choice(answer_ids)
+            for answer_ids in self.dataset.answers[quiz_id].values()
+        ]
+        path = reverse("quizes:attempt_submit", args=[quiz_id, response.json()["id"]])
+        self.request("attempt_submit", "post", path, token, {"answers": answers})
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples, seconds):
+    latencies = sorted(elapsed for _, elapsed, _, _ in samples)
+    return {
+        "requests": len(samples),
+        "errors": sum(status >= 400 for _, _, status, _ in samples),
+        "statuses": dict(Counter(str(status) for _, _, status, _ in samples)),
+        "throughput_rps": round(len(samples) / seconds, 1),
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 2),
+        "p50_ms": round(1000 * percentile(latencies, 0.50), 2),
+        "p95_ms": round(1000 * percentile(latencies, 0.95), 2),
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 2),
+        "queries_per_request": round(
+            sum(queries for _, _, _, queries in samples) / len(samples), 2
+        ),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    dataset = Dataset(args.prefix, args.sample, random.Random(args.seed))
+    per_worker, extra = divmod(args.requests, args.concurrency)
+    workers = [
+        Worker(
+            dataset,
+            per_worker + (n < extra),
+            args.warmup,
+            args.seed * 1000 + n,
+            args.host,
+        )
+        for n in range(args.concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    # throughput counts from the end of the first warmup, not from thread start
+    start = min(worker.started for worker in workers if worker.started)
+    seconds = time.perf_counter() - start
+
+    samples = [sample for worker in workers for sample in worker.samples]
+    by_scenario = defaultdict(list)
+    for sample in samples:
+        by_scenario[sample[0]].append(sample)
+    return {
+        "meta": {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "settings": os.environ["DJANGO_SETTINGS_MODULE"],
+            "database": connection.vendor,
+            "debug": settings.DEBUG,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "quizes_sampled": len(dataset.quizes),
+            "users": len(dataset.tokens),
+        },
+        "total": summarize(samples, seconds),
+        "scenarios": {
+            name: summarize(rows, seconds) for name, rows in sorted(by_scenario.items())
+        },
+    }
+
+
+def compare(previous, current):
+    """Print the latency percentiles of both runs side by side"""
+    print(f"{'scenario':<16}{'metric':<8}{'before':>10}{'after':>10}{'change':>9}")
+    rows = [("total", previous["total"], current["total"])] + [
+        (name, previous["scenarios"][name], stats)
+        for name, stats in current["scenarios"].items()
+        if name in previous["scenarios"]
+    ]
+    for name, before, after in rows:
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "queries_per_request"):
+            change = (after[metric] - before[metric]) / (before[metric] or 1) * 100
+            print(
+                f"{name:<16}{metric.split('_')[0]:<8}"
+                f"{before[metric]:>10}{after[metric]:>10}{change:>+8.1f}%"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000, help="in total")
+    parser.add_argument("--warmup", type=int, default=20, help="per client")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prefix", default="bench", help="of the seeded users")
+    parser.add_argument("--sample", type=int, default=200, help="quizes to hit")
+    parser.add_argument("--host", default="localhost", help="Host header to send")
+    parser.add_argument("--output", help="file to save the JSON results to")
+    parser.add_argument("--compare", help="results of an earlier run")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.compare:
+        with open(args.compare) as previous:
+            compare(json.load(previous), results)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Rendering and parsing time of large quiz documents, stock DRF vs orjson.
+
+A throwaway test database is seeded with one quiz of the requested size, the
+quiz is serialized once with `serializers.Quiz` and then rendered (and the
+result parsed back) repeatedly by each renderer/parser pair:
+
+    python -m benchmarks.json_render --questions 500 --answers 4 --rounds 50
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+
+from decouple import config
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", config("DJANGO_SETTINGS_MODULE"))
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from config import fastjson  # noqa: E402
+from quizes import seed, serializers  # noqa: E402
+from quizes.models import Quiz  # noqa: E402
+
+PAIRS = {
+    "stock": (JSONRenderer, JSONParser),
+    "fast": (fastjson.FastJSONRenderer, fastjson.FastJSONParser),
+}
+
+
+def best_of(rounds, function):
+    """Fastest of `rounds` calls, in milliseconds"""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 3)
+
+
+def quiz_data(questions, answers):
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        seed.Seeder(users=1, quizes=1, questions=questions, answers=answers).run()
+        quiz = Quiz.objects.with_questions().get()
+        return serializers.Quiz(quiz).data
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def run(questions, answers, rounds):
+    data = quiz_data(questions, answers)
+    context = {"encoding": "utf-8"}
+    results = {
+        "questions": questions,
+        "answers": answers,
+        "orjson": bool(fastjson.orjson),
+    }
+    for name, (renderer_class, parser_class) in PAIRS.items():
+        renderer, parser = renderer_class(), parser_class()
+        body = renderer.render(data)
+        results[name] = {
+            "bytes": len(body),
+            "render_ms": best_of(rounds, lambda: renderer.render(data)),
+            "parse_ms": best_of(
+                rounds, lambda: parser.parse(io.BytesIO(body), parser_context=context)
+            ),
+        }
+    for step in ("render_ms", "parse_ms"):
+        speedup = results["stock"][step] / max(results["fast"][step], 1e-6)
+        results[f"{step.split('_')[0]}_speedup"] = round(speedup, 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=500)
+    parser.add_argument("--answers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.questions, args.answers, args.rounds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Concurrent write throughput of SQLite with stock settings vs. the tuned pragmas.
+
+Every writer process opens its own connection through Django's database backend,
+the way separate gunicorn workers would, and runs small `transaction.atomic()`
+blocks that read before they write, like a view does:
+
+    python -m benchmarks.sqlite_writes --writers 8 --transactions 300
+
+Django starts those transactions with a plain (deferred) BEGIN, so a writer only
+asks for the write lock at its first write; in WAL mode one that read a snapshot
+before another writer committed then fails without waiting. The tuned backend
+begins them IMMEDIATE, see config/db/sqlite3/base.py.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from config.db.sqlite3.base import DEFAULT_PRAGMAS
+
+PROFILES = {
+    # django.db.backends.sqlite3 out of the box: 5 second timeout, no pragmas
+    "default": {"ENGINE": "django.db.backends.sqlite3", "OPTIONS": {}},
+    # the tuned pragmas alone, transactions still begin DEFERRED
+    "pragmas": {
+        "ENGINE": "config.db.sqlite3",
+        "OPTIONS": {
+            "timeout": 20,
+            "pragmas": DEFAULT_PRAGMAS,
+            "transaction_mode": "DEFERRED",
+        },
+    },
+    # what config/settings/production.py sets up by default
+    "tuned": {
+        "ENGINE": "config.db.sqlite3",
+        "OPTIONS": {"timeout": 20, "pragmas": DEFAULT_PRAGMAS},
+    },
+}
+
+
+def setup_django(path, profile):
+    import django
+    from django.conf import settings
+
+    settings.configure(DATABASES={"default": {**PROFILES[profile], "NAME": path}})
+    django.setup()
+
+
+def writer(path, profile, transactions, ready, results):
+    setup_django(path, profile)
+    from django.db import OperationalError, connection, transaction
+
+    connection.ensure_connection()
+    ready.wait()
+    done = failed = 0
+    for i in range(transactions):
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM answer WHERE question_id = %s", [i]
+                )
+                cursor.execute(
+                    "INSERT INTO answer (title, question_id) VALUES (%s, %s)",
+                    [f"answer {os.getpid()} {i}", i],
+                )
+            done += 1
+        except OperationalError:
+            failed += 1
+    connection.close()
+    results.put((done, failed))
+
+
+def run(profile_name, writers, transactions):
+    # spawned, so that every writer configures Django for its profile
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.sqlite3")
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "CREATE TABLE answer (id INTEGER PRIMARY KEY, title TEXT, question_id INT)"
+            )
+        conn.close()
+
+        # every writer imports Django and connects before the clock starts
+        ready = context.Barrier(writers + 1)
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=writer, args=(path, profile_name, transactions, ready, results)
+            )
+            for _ in range(writers)
+        ]
+        for process in processes:
+            process.start()
+        ready.wait()
+        began = time.perf_counter()
+        outcomes = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - began
+        for process in processes:
+            process.join()
+
+    committed = sum(done for done, _ in outcomes)
+    return {
+        "profile": profile_name,
+        "writers": writers,
+        "committed": committed,
+        "locked_errors": sum(failed for _, failed in outcomes),
+        "seconds": round(elapsed, 3),
+        "commits_per_second": round(committed / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--transactions", type=int, default=300)
+    args = parser.parse_args()
+    for profile_name in PROFILES:
+        print(json.dumps(run(profile_name, args.writers, args.transactions)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""System check helpers for settings that only hold within one process."""
+
+from django.conf import settings
+from django.core.checks import Error
+
+# backends whose entries no other process can see
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def shared_cache_errors(setting, error_id):
+    """Errors when the cache alias named by `setting` is not shared between
+    the WEB_CONCURRENCY processes serving the app"""
+    alias = getattr(settings, setting)
+    backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    if settings.WEB_CONCURRENCY <= 1 or backend not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [
+        Error(
+            f"{setting} uses the {alias!r} cache, which is local to each process, "
+            f"with WEB_CONCURRENCY = {settings.WEB_CONCURRENCY}.",
+            hint="Point it at a cache every process shares, such as memcached "
+            "(CACHE_BACKEND and CACHE_LOCATION in production).",
+            id=error_id,
+        )
+    ]
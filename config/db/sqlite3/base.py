@@ -0,0 +1,41 @@
+"""SQLite backend tuned for a web server with concurrent writers.
+
+Use it as `"ENGINE": "config.db.sqlite3"`. Besides the regular options it reads
+`OPTIONS["pragmas"]`, a mapping of PRAGMA name to value, and applies it to every
+new connection, e.g. {"journal_mode": "WAL", "synchronous": "NORMAL"}, and
+`OPTIONS["transaction_mode"]`, how `transaction.atomic()` begins (IMMEDIATE by
+default instead of Django's DEFERRED).
+"""
+
+from django.db.backends.sqlite3 import base
+
+# WAL lets readers carry on while a writer commits, busy_timeout makes writers
+# queue instead of failing with "database is locked", NORMAL sync is durable in WAL
+# mode except for the last transactions on power loss, cache_size is in KiB
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 20000,
+    "synchronous": "NORMAL",
+    "cache_size": -20000,
+    "temp_store": "MEMORY",
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = kwargs.pop("pragmas", DEFAULT_PRAGMAS)
+        self.transaction_mode = kwargs.pop("transaction_mode", "IMMEDIATE")
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # a deferred transaction takes the write lock at its first write; one
+        # that read before that fails at once with "database is locked" when
+        # another connection wrote meanwhile, busy_timeout does not apply
+        self.cursor().execute(f"BEGIN {self.transaction_mode}")
@@ -0,0 +1,90 @@
+"""JSON renderer and parser backed by orjson, when it is installed.
+
+Both produce exactly what DRF's JSONRenderer and JSONParser do under the
+default REST_FRAMEWORK settings (compact, unicode, strict). Anything orjson
+does not handle natively, such as datetimes, Decimals and lazy strings, goes
+through DRF's own encoder. Indented output, non default JSON settings and
+values orjson rejects, like integers wider than 64 bits, fall back to the
+stock classes. NaN and infinite floats are the exception: orjson renders them
+as null where the strict stock renderer raises an error.
+"""
+
+from django.conf import settings
+from rest_framework import renderers, parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils import encoders, json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+# separators escaped by the stock renderer so the output is also valid JavaScript
+LINE_SEPARATOR = "\u2028".encode()
+PARAGRAPH_SEPARATOR = "\u2029".encode()
+# maps every digit to "9" and everything else to a space, so that a run of 19
+# digits can be found with a plain substring search (much faster than a regex)
+DIGITS = bytes(ord("9") if chr(c) in "0123456789" else ord(" ") for c in range(256))
+LONG_NUMBER = b"9" * 19
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def _stock_options(self):
+        return not self.ensure_ascii and self.compact and self.strict
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None
+            or indent
+            or self.encoder_class is not encoders.JSONEncoder
+            or not self._stock_options()
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b"\\u2028")
+            ret = ret.replace(PARAGRAPH_SEPARATOR, b"\\u2029")
+        return ret
+
+
+class FastJSONParser(parsers.JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if (
+            orjson is None
+            or not self.strict
+            or encoding.lower().replace("_", "-") not in ("utf-8", "utf8")
+        ):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        # orjson turns integers wider than 64 bits into floats, leave any
+        # document with such a long run of digits to the standard library
+        if LONG_NUMBER not in body.translate(DIGITS):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        # orjson also rejects some documents json accepts (lone surrogates),
+        # let the standard library have the final say and word the error
+        try:
+            return json.loads(
+                body.decode(encoding), parse_constant=json.strict_constant
+            )
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
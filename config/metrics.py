@@ -0,0 +1,232 @@
+"""Request counters and latency histograms in Prometheus text format.
+
+`MetricsMiddleware` counts every request and records its duration in a
+fixed-bucket histogram, labelled by resolved URL name (`quizes:quiz_detail`),
+method and status. `metrics_view` exposes them to requests carrying
+`Authorization: Bearer <METRICS_TOKEN>` and answers 404 while no token is set.
+
+With several worker processes set `METRICS_MULTIPROC_DIR` to a directory
+shared by all of them: each process then saves its values to `<pid>.json`
+there, at most every `METRICS_FLUSH_INTERVAL` seconds and at exit, and the
+endpoint adds up every file. A restarted worker that gets the pid of a dead
+one carries on from its values, so counters never go backwards.
+"""
+
+import atexit
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from config.middleware import SyncAndAsyncMixin
+
+REQUESTS = "http_requests_total"
+DURATION = "http_request_duration_seconds"
+
+HELP = {
+    REQUESTS: ("counter", "Requests handled, by route, method and status."),
+    DURATION: ("histogram", "Time spent handling requests, in seconds."),
+}
+
+
+class Registry:
+    """Counters and histograms of this process, keyed by (name, labels)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._flushed = 0.0
+        self.reset()
+
+    def reset(self):
+        self.counters = {}
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self.histograms = {}
+
+    def _check_process(self):
+        # a forked worker must not report the values of the process it came from
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self.reset()
+            self._load()
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._check_process()
+            self.counters[key] = self.counters.get(key, 0) + amount
+        self._maybe_flush()
+
+    def observe(self, name, labels, value):
+        buckets = settings.METRICS_BUCKETS
+        key = (name, labels)
+        with self._lock:
+            self._check_process()
+            values = self.histograms.get(key)
+            if values is None:
+                values = self.histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            index = next(
+                (i for i, bound in enumerate(buckets) if value <= bound), len(buckets)
+            )
+            values[index] += 1
+            values[-1] += value
+        self._maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            self._check_process()
+            return {
+                "counters": [[*key, value] for key, value in self.counters.items()],
+                "histograms": [
+                    [*key, list(values)] for key, values in self.histograms.items()
+                ],
+            }
+
+    # multiprocess mode
+
+    def _path(self):
+        return Path(settings.METRICS_MULTIPROC_DIR) / f"{self._pid}.json"
+
+    def _load(self):
+        if not settings.METRICS_MULTIPROC_DIR:
+            return
+        try:
+            saved = json.loads(self._path().read_text())
+        except (OSError, ValueError):
+            return
+        for name, labels, value in saved["counters"]:
+            self.counters[(name, _labels(labels))] = value
+        for name, labels, values in saved["histograms"]:
+            self.histograms[(name, _labels(labels))] = values
+
+    def _maybe_flush(self):
+        interval = settings.METRICS_FLUSH_INTERVAL
+        if settings.METRICS_MULTIPROC_DIR and time.time() - self._flushed >= interval:
+            self.flush()
+
+    def flush(self):
+        """Save the values of this process for the other workers to read"""
+        if not settings.METRICS_MULTIPROC_DIR or self._pid is None:
+            return
+        snapshot = self.snapshot()
+        self._flushed = time.time()
+        path = self._path()
+        # written aside and renamed, so readers never see half a file
+        with tempfile.NamedTemporaryFile(
+            "w", dir=path.parent, suffix=".tmp", delete=False
+        ) as output:
+            json.dump(snapshot, output)
+        os.replace(output.name, path)
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+def _labels(pairs):
+    return tuple(tuple(pair) for pair in pairs)
+
+
+def collect():
+    """Snapshots of every process, or just this one outside multiprocess mode"""
+    if not settings.METRICS_MULTIPROC_DIR:
+        return [registry.snapshot()]
+    registry.flush()
+    snapshots = []
+    for path in Path(settings.METRICS_MULTIPROC_DIR).glob("*.json"):
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def merge(snapshots):
+    counters, histograms = {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, _labels(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot["histograms"]:
+            key = (name, _labels(labels))
+            if key not in histograms:
+                histograms[key] = list(values)
+            elif len(histograms[key]) == len(values):
+                histograms[key] = [a + b for a, b in zip(histograms[key], values)]
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def exposition(snapshots):
+    """Render snapshots in the Prometheus text exposition format"""
+    counters, histograms = merge(snapshots)
+    lines = []
+    for name, (kind, help_text) in HELP.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            bounds = [*map(repr, settings.METRICS_BUCKETS), "+Inf"]
+            cumulative = 0
+            for bound, count in zip(bounds, values[:-1]):
+                cumulative += count
+                label_text = _format_labels(labels, le=bound)
+                lines.append(f"{name}_bucket{label_text} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {values[-1]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware(SyncAndAsyncMixin):
+    def handle(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        return self.record(request, response, time.perf_counter() - start)
+
+    async def ahandle(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        return self.record(request, response, time.perf_counter() - start)
+
+    def record(self, request, response, elapsed):
+        match = request.resolver_match
+        labels = (
+            ("route", match.view_name if match else "unmatched"),
+            ("method", request.method),
+            ("status", str(response.status_code)),
+        )
+        registry.inc(REQUESTS, labels)
+        registry.observe(DURATION, labels, elapsed)
+        return response
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404
+    supplied = request.headers.get("Authorization", "").encode()
+    if not hmac.compare_digest(supplied, f"Bearer {token}".encode()):
+        response = HttpResponse("Unauthorized\n", status=401, content_type="text/plain")
+        response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+        return response
+    return HttpResponse(
+        exposition(collect()), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
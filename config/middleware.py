@@ -0,0 +1,38 @@
+"""Base for the project's middleware, run natively under both WSGI and ASGI.
+
+Django adapts a sync-only middleware to an async handler stack with
+`sync_to_async(thread_sensitive=True)`, which runs every request through the
+same single thread, one at a time. Middleware built on `SyncAndAsyncMixin`
+runs in the mode of the handler it wraps instead.
+"""
+
+import asyncio
+
+
+class SyncAndAsyncMixin:
+    """Dispatches to `handle(request)` or `async ahandle(request)`
+
+    Mirrors `django.utils.deprecation.MiddlewareMixin`, without its
+    process_request/process_response hooks that always run synchronously.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # what Django checks to wrap this instance as an async handler
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.ahandle(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def ahandle(self, request):
+        raise NotImplementedError
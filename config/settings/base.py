@@ -35,9 +35,13 @@ INSTALLED_APPS = [
     # first party apps
     "users",
     "quizes",
+    "jobs",
 ]
 
 MIDDLEWARE = [
+    "config.timing.ServerTimingMiddleware",
+    "config.metrics.MetricsMiddleware",
+    "config.compression.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -118,18 +122,104 @@ STATIC_ROOT = "staticfiles"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# the local-memory backend evicts least recently used entries past MAX_ENTRIES;
+# production points both aliases at a cache every process shares
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "quizes": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "quizes",
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
+# cache alias holding pre-rendered quiz documents and answer keys
+QUIZ_CACHE = "quizes"
+
+# processes serving the app; with more than one, the caches other processes
+# must see (QUIZ_CACHE, TOKEN_AUTH_SHARED_CACHE) can not be local-memory ones,
+# see config/checks.py
+WEB_CONCURRENCY = 1
+
+# token lookups remembered per process by CachedTokenAuthentication, revocations
+# are shared between processes through TOKEN_AUTH_SHARED_CACHE
+TOKEN_AUTH_CACHE_TTL = 60
+TOKEN_AUTH_CACHE_MAX_ENTRIES = 10000
+TOKEN_AUTH_SHARED_CACHE = "default"
+
+# lifetimes in seconds of the signed tokens handed out by the login view
+SIGNED_TOKEN_ACCESS_LIFETIME = 15 * 60
+SIGNED_TOKEN_REFRESH_LIFETIME = 14 * 24 * 60 * 60
+
 # custom user model
 AUTH_USER_MODEL = "users.User"
 
 # REST FRAMEWORK
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "users.authentication.CachedTokenAuthentication",
+        "users.authentication.SignedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # orjson backed when it is installed, see config/fastjson.py
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "config.fastjson.FastJSONRenderer",
     ],
+    "DEFAULT_PARSER_CLASSES": [
+        "config.fastjson.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    "DEFAULT_PAGINATION_CLASS": "quizes.pagination.IdCursorPagination",
+    "PAGE_SIZE": 50,
 }
+
+# upper bound for the `page_size` query param accepted by list endpoints
+API_MAX_PAGE_SIZE = 200
+
+# serve the read endpoints of quizes with the views in quizes.async_views,
+# only worth enabling when running under an ASGI server
+ASYNC_READ_VIEWS = False
+
+# per-request timings (see config/timing.py): send them in a Server-Timing
+# header, and log requests slower than this many milliseconds with their queries
+SERVER_TIMING_HEADER = True
+SERVER_TIMING_SLOW_MS = 500
+
+# request metrics (see config/metrics.py), served at /metrics/ to requests with
+# "Authorization: Bearer <METRICS_TOKEN>", the endpoint is off while it is empty
+METRICS_TOKEN = ""
+# directory shared by all worker processes, None when there is a single process
+METRICS_MULTIPROC_DIR = None
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# JSON responses at least this many bytes long are gzip/brotli compressed when
+# the client accepts it (see config/compression.py)
+COMPRESSION_MIN_SIZE = 512
+
+# questions (with their answers) or attempts deleted per transaction when a quiz
+# is deleted, see quizes/deletion.py
+QUIZ_DELETE_CHUNK_SIZE = 500
+
+# background jobs (see jobs/worker.py), run by `manage.py run_jobs`: seconds
+# between polls for due jobs, after which a job without heartbeat is queued
+# again, and kept after finishing; failed jobs are retried after JOB_RETRY_DELAY
+# seconds, doubled per attempt up to JOB_RETRY_MAX_DELAY
+JOB_POLL_INTERVAL = 1.0
+JOB_LOCK_TIMEOUT = 300
+JOB_RETRY_DELAY = 10
+JOB_RETRY_MAX_DELAY = 3600
+JOB_RETENTION = 7 * 24 * 3600
+
+# uploads of quiz imports wait here, in the default file storage, for the job
+# importing them; workers on other hosts need a shared storage for it
+MEDIA_ROOT = BASE_DIR / "media"
+QUIZ_IMPORT_DIR = "imports"
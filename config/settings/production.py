@@ -2,7 +2,6 @@ from decouple import config
 
 from .base import *
 
-
 SECRET_KEY = config("SECRET_KEY")
 
 DEBUG = False
@@ -11,14 +10,91 @@ ALLOWED_HOSTS = [config("HOST_URL")]
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+DATABASE_ENGINE = config("DATABASE_ENGINE", default="sqlite")
+
+if DATABASE_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": config("DB_NAME"),
+            "USER": config("DB_USER"),
+            "PASSWORD": config("DB_PASSWORD", default=""),
+            "HOST": config("DB_HOST", default="localhost"),
+            "PORT": config("DB_PORT", default="5432"),
+            # reuse connections across requests instead of reconnecting each time
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+            # ping reused connections before use, honoured from Django 4.1 on
+            "CONN_HEALTH_CHECKS": True,
+            # required behind a transaction pooler such as pgbouncer
+            "DISABLE_SERVER_SIDE_CURSORS": config(
+                "DB_POOLED", default=False, cast=bool
+            ),
+            "OPTIONS": {"connect_timeout": 5},
+        }
+    }
+else:
+    SQLITE_BUSY_TIMEOUT = config("SQLITE_BUSY_TIMEOUT", default=20, cast=int)
+    DATABASES = {
+        "default": {
+            # applies OPTIONS["pragmas"] to every new connection and begins
+            # atomic blocks IMMEDIATE
+            "ENGINE": "config.db.sqlite3",
+            "NAME": config("DB_NAME", default=str(BASE_DIR / "db.sqlite3")),
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=600, cast=int),
+            "OPTIONS": {
+                "timeout": SQLITE_BUSY_TIMEOUT,
+                "pragmas": {
+                    "journal_mode": "WAL",
+                    "busy_timeout": SQLITE_BUSY_TIMEOUT * 1000,
+                    "synchronous": config("SQLITE_SYNCHRONOUS", default="NORMAL"),
+                    "cache_size": -config("SQLITE_CACHE_KIB", default=20000, cast=int),
+                    "temp_store": "MEMORY",
+                },
+            },
+        }
     }
+
+# Caches, shared by every process: token revocations and dropped quiz
+# documents only reach the other processes through them. CACHE_LOCATION has
+# no default on purpose, for a single process set CACHE_BACKEND to the
+# local-memory backend explicitly. Documents of very large quizes need
+# memcached's item size limit (-I) raised
+WEB_CONCURRENCY = config("WEB_CONCURRENCY", default=1, cast=int)
+CACHE_BACKEND = config(
+    "CACHE_BACKEND", default="django.core.cache.backends.memcached.PyMemcacheCache"
+)
+CACHE_LOCATION = config("CACHE_LOCATION")
+CACHES["default"] = {
+    "BACKEND": CACHE_BACKEND,
+    "LOCATION": CACHE_LOCATION,
+    "KEY_PREFIX": "default",
+}
+CACHES["quizes"] = {
+    **CACHES["quizes"],
+    "BACKEND": CACHE_BACKEND,
+    "LOCATION": CACHE_LOCATION,
+    "KEY_PREFIX": "quizes",
 }
 
 # CORS
 CORS_ALLOWED_ORIGINS = config(
     "FRONTEND_URLS", cast=lambda urls: [url.strip() for url in urls.split(",")]
 )
+
+# Async read views (see config/asgi.py)
+ASYNC_READ_VIEWS = config("ASYNC_READ_VIEWS", default=False, cast=bool)
+
+# Request timing, the header exposes query counts so it is opt in
+SERVER_TIMING_HEADER = config("SERVER_TIMING_HEADER", default=False, cast=bool)
+SERVER_TIMING_SLOW_MS = config("SERVER_TIMING_SLOW_MS", default=500, cast=int)
+
+# Metrics, set METRICS_MULTIPROC_DIR when running several worker processes
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+METRICS_MULTIPROC_DIR = config("METRICS_MULTIPROC_DIR", default=None)
+
+# Response compression, brotli is offered when the brotli package is installed
+COMPRESSION_MIN_SIZE = config("COMPRESSION_MIN_SIZE", default=512, cast=int)
+
+# Background jobs
+JOB_POLL_INTERVAL = config("JOB_POLL_INTERVAL", default=1.0, cast=float)
+JOB_LOCK_TIMEOUT = config("JOB_LOCK_TIMEOUT", default=300, cast=int)
@@ -0,0 +1,172 @@
+"""Per-request timing of SQL, serialization and rendering.
+
+`ServerTimingMiddleware` starts a `RequestTiming` for each request and reports
+it in a `Server-Timing` header and a JSON log line on the `config.timing`
+logger. Requests slower than `SERVER_TIMING_SLOW_MS` are logged as warnings
+together with every query they ran.
+
+Queries are recorded by an execute wrapper installed on each new database
+connection, serialization by `TimedSerializerMixin` and `measure("serialize")`,
+and rendering of DRF responses by the middleware itself.
+"""
+
+import contextvars
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from config.middleware import SyncAndAsyncMixin
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.queries = []
+        self.db_time = 0.0
+        self._active = set()
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def add_query(self, sql, seconds):
+        self.queries.append((sql, seconds))
+        self.db_time += seconds
+
+    def header(self, total):
+        metrics = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{len(self.queries)} queries"'
+        ]
+        metrics += [
+            f"{name};dur={seconds * 1000:.1f}"
+            for name, seconds in self.durations.items()
+        ]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+@contextmanager
+def measure(name):
+    """Add the time spent in the block to `name` of the current request
+
+    Nested blocks of the same name are only counted once, by the outermost one.
+    """
+    timing = _current.get()
+    if timing is None or name in timing._active:
+        yield
+        return
+    timing._active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - start)
+        timing._active.discard(name)
+
+
+class TimedSerializerMixin:
+    """Counts to_representation() of a DRF serializer as serialize time"""
+
+    def to_representation(self, instance):
+        with measure("serialize"):
+            return super().to_representation(instance)
+
+
+def record_query(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.add_query(sql, time.perf_counter() - start)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # the same wrapper object outlives reconnects, only add the recorder once
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class ServerTimingMiddleware(SyncAndAsyncMixin):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if self.is_async:
+            # Django would run the sync hook through the single sync thread
+            self.process_template_response = self.aprocess_template_response
+        # connections opened before this module was imported missed the signal
+        for connection in connections.all():
+            install_query_recorder(sender=None, connection=connection)
+
+    def handle(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timing)
+
+    async def ahandle(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timing)
+
+    def finish(self, request, response, timing):
+        total = time.perf_counter() - timing.started
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = timing.header(total)
+        self.log(request, response, timing, total)
+        return response
+
+    def process_template_response(self, request, response):
+        timing = _current.get()
+        if timing is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda _: timing.add("render", time.perf_counter() - started)
+            )
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return ServerTimingMiddleware.process_template_response(self, request, response)
+
+    def log(self, request, response, timing, total):
+        slow = total * 1000 >= settings.SERVER_TIMING_SLOW_MS
+        level = logging.WARNING if slow else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "db_ms": round(timing.db_time * 1000, 2),
+            "queries": len(timing.queries),
+        }
+        record.update(
+            (f"{name}_ms", round(seconds * 1000, 2))
+            for name, seconds in timing.durations.items()
+        )
+        if slow:
+            record["sql"] = [
+                {"sql": sql, "ms": round(seconds * 1000, 2)}
+                for sql, seconds in timing.queries
+            ]
+        logger.log(level, json.dumps(record))
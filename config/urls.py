@@ -16,8 +16,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from config.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/v1/quizes/", include("quizes.urls", namespace="quizes")),
     path("api/v1/auth/", include("users.urls", namespace="auth")),
+    path("metrics/", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,13 @@
+import pytest
+from django.core.cache import caches
+
+from users.authentication import token_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Cached entries are keyed by pk, which the test database reuses"""
+    yield
+    for cache in caches.all():
+        cache.clear()
+    token_cache.clear()
@@ -0,0 +1,31 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued jobs until stopped with SIGTERM or SIGINT"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument("--poll-interval", type=float, default=None)
+        parser.add_argument(
+            "--burst", action="store_true", help="Exit once no job is due"
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(options["concurrency"], options["poll_interval"])
+        # finish the running jobs before exiting
+        previous = {
+            signum: signal.signal(signum, lambda *args: worker.stop())
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        self.stdout.write(f"Worker {worker.worker_id} started")
+        try:
+            worker.work(burst=options["burst"])
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker.worker_id} stopped"))
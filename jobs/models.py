@@ -0,0 +1,38 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A call of a registered task, run by `manage.py run_jobs`, see jobs.worker"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [(status, status) for status in (QUEUED, RUNNING, DONE, FAILED)]
+
+    name = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    # claims so far, a claim that never finished (crashed worker) counts too
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # not claimed before this, pushed back on every retry
+    run_at = models.DateTimeField(default=timezone.now)
+    # worker running the job, and its last heartbeat
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    # what the task returned
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="job_due"),
+            models.Index(fields=["status", "name"], name="job_running"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
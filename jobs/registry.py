@@ -0,0 +1,64 @@
+"""Tasks that can be queued as jobs.
+
+    from jobs.registry import task
+
+    @task(concurrency=2)
+    def purge_quiz(quiz_id):
+        ...
+
+    purge_quiz.delay(quiz_id=1)
+    purge_quiz.apply_async({"quiz_id": 1}, run_at=timezone.now() + timedelta(hours=1))
+
+Tasks live in a `tasks` module of their app, imported at startup. Arguments
+must be JSON serializable and are passed by keyword, as is what the task
+returns, kept as the job's result. The job row is written in
+the caller's transaction, so it is only seen by workers once that commits and
+disappears if it rolls back.
+"""
+
+from django.utils import timezone
+
+from .models import Job
+
+tasks = {}
+
+
+class Task:
+    def __init__(self, func, name, max_attempts, concurrency):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        # jobs of this task running at once over all workers, None for no limit
+        self.concurrency = concurrency
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def delay(self, **kwargs):
+        """Queue a job calling this task with `kwargs`"""
+        return self.apply_async(kwargs)
+
+    def apply_async(self, kwargs=None, run_at=None):
+        """Queue a job calling this task with `kwargs`, not run before `run_at`"""
+        return Job.objects.create(
+            name=self.name,
+            kwargs=kwargs or {},
+            max_attempts=self.max_attempts,
+            run_at=run_at or timezone.now(),
+        )
+
+
+def task(func=None, *, name=None, max_attempts=3, concurrency=None):
+    """Register `func` as a task, named `<module>.<function>` by default"""
+
+    def register(func):
+        registered = Task(
+            func,
+            name or f"{func.__module__}.{func.__name__}",
+            max_attempts,
+            concurrency,
+        )
+        tasks[registered.name] = registered
+        return registered
+
+    return register(func) if func is not None else register
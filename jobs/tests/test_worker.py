@@ -0,0 +1,194 @@
+import io
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from jobs import worker
+from jobs.models import Job
+from jobs.registry import task, tasks
+from jobs.worker import Worker, claim, run
+
+calls = []
+
+
+@task(name="tests.record")
+def record(value):
+    calls.append(value)
+
+
+@task(name="tests.fail", max_attempts=2)
+def fail():
+    raise ValueError("boom")
+
+
+@task(name="tests.echo")
+def echo(**kwargs):
+    return kwargs
+
+
+@task(name="tests.limited", concurrency=1)
+def limited():
+    pass
+
+
+@pytest.mark.django_db
+class TestJobs:
+    def setup_method(self):
+        calls.clear()
+
+    def test_delay_queues_a_job(self):
+        job = record.delay(value=1)
+
+        assert (job.name, job.kwargs, job.status) == (
+            "tests.record",
+            {"value": 1},
+            "queued",
+        )
+        assert calls == []
+        assert tasks["tests.record"] is record
+
+    def test_a_job_is_claimed_once(self):
+        job = record.delay(value=1)
+
+        claimed = claim("one")
+        assert claimed.pk == job.pk
+        assert (claimed.status, claimed.locked_by, claimed.attempts) == (
+            Job.RUNNING,
+            "one",
+            1,
+        )
+        assert claim("two") is None
+
+    def test_jobs_wait_for_their_run_at(self):
+        record.apply_async({"value": 1}, run_at=timezone.now() + timedelta(minutes=1))
+
+        assert claim("one") is None
+
+    def test_delay_passes_every_keyword_to_the_task(self):
+        later = timezone.now() + timedelta(minutes=1)
+        echo.delay(run_at=later.isoformat())
+
+        run(claim("one"), "one")
+
+        job = Job.objects.get()
+        assert job.result == {"run_at": later.isoformat()}
+
+    def test_concurrency_limits_running_jobs_of_a_task(self):
+        limited.delay()
+        limited.delay()
+        other = record.delay(value=1)
+
+        first = claim("one")
+        assert first.name == "tests.limited"
+        # the second limited job is skipped while the first one runs
+        assert claim("two").pk == other.pk
+        assert claim("two") is None
+
+        run(first, "one")
+        assert claim("two").name == "tests.limited"
+
+    def test_run_records_success(self):
+        record.delay(value=1)
+
+        run(claim("one"), "one")
+
+        job = Job.objects.get()
+        assert calls == [1]
+        assert (job.status, job.locked_by) == (Job.DONE, "one")
+        assert job.finished_at is not None
+
+    def test_failed_jobs_are_retried_with_backoff_then_fail(self, settings):
+        settings.JOB_RETRY_DELAY = 10
+        fail.delay()
+
+        before = timezone.now()
+        run(claim("one"), "one")
+        job = Job.objects.get()
+        assert job.status == Job.QUEUED
+        assert "ValueError: boom" in job.last_error
+        assert before + timedelta(seconds=5) <= job.run_at
+        assert job.run_at <= timezone.now() + timedelta(seconds=10)
+        assert claim("one") is None
+
+        Job.objects.update(run_at=timezone.now())
+        run(claim("one"), "one")
+        job = Job.objects.get()
+        assert (job.status, job.attempts) == (Job.FAILED, 2)
+        assert claim("one") is None
+
+    def test_retry_delay_doubles_up_to_the_maximum(self, settings):
+        settings.JOB_RETRY_DELAY = 10
+        settings.JOB_RETRY_MAX_DELAY = 60
+
+        assert 5 <= worker.retry_delay(1) <= 10
+        assert 20 <= worker.retry_delay(3) <= 40
+        assert 30 <= worker.retry_delay(10) <= 60
+
+    def test_unknown_tasks_fail(self):
+        Job.objects.create(name="tests.gone")
+
+        run(claim("one"), "one")
+
+        job = Job.objects.get()
+        assert (job.status, job.last_error) == (Job.FAILED, "Unknown task tests.gone")
+
+    def test_a_requeued_job_is_not_finished_by_its_old_worker(self):
+        record.delay(value=1)
+        job = claim("one")
+        Job.objects.update(status=Job.QUEUED, locked_by="")
+
+        run(job, "one")
+
+        assert Job.objects.get().status == Job.QUEUED
+
+    def test_jobs_without_heartbeat_are_queued_again(self, settings):
+        settings.JOB_LOCK_TIMEOUT = 60
+        record.delay(value=1)
+        fail.delay()
+        claim("one")
+        claim("one")
+        worker.heartbeat("one")
+        assert worker.requeue_stale() == 0
+
+        Job.objects.update(locked_at=timezone.now() - timedelta(minutes=2))
+        Job.objects.filter(name="tests.fail").update(attempts=2)
+        assert worker.requeue_stale() == 2
+
+        statuses = dict(Job.objects.values_list("name", "status"))
+        assert statuses == {"tests.record": Job.QUEUED, "tests.fail": Job.FAILED}
+
+    def test_finished_jobs_are_deleted_after_the_retention(self, settings):
+        settings.JOB_RETENTION = 3600
+        record.delay(value=1)
+        record.delay(value=2)
+        Job.objects.update(status=Job.DONE, finished_at=timezone.now())
+        Job.objects.filter(kwargs__value=1).update(
+            finished_at=timezone.now() - timedelta(hours=2)
+        )
+
+        assert worker.delete_finished() == 1
+        assert list(Job.objects.values_list("kwargs__value", flat=True)) == [2]
+
+    def test_burst_worker_runs_due_jobs_and_exits(self):
+        for value in range(3):
+            record.delay(value=value)
+        fail.delay()
+
+        Worker(worker_id="one").work(burst=True)
+
+        assert calls == [0, 1, 2]
+        assert sorted(Job.objects.values_list("status", flat=True)) == [
+            Job.DONE,
+            Job.DONE,
+            Job.DONE,
+            Job.QUEUED,
+        ]
+
+    def test_run_jobs_command(self):
+        record.delay(value=1)
+
+        call_command("run_jobs", "--burst", stdout=io.StringIO())
+
+        assert calls == [1]
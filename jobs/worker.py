@@ -0,0 +1,224 @@
+"""Claiming and running jobs, without a broker: the database is the queue.
+
+A job is claimed with a single conditional UPDATE (`... WHERE id = ? AND status
+= 'queued'`), so two workers never both get it, on SQLite as on PostgreSQL.
+For tasks with a `concurrency` limit the same UPDATE also requires fewer than
+that many jobs of the task to be running; SQLite runs the statement under its
+write lock, PostgreSQL checks it against the statement's snapshot, where two
+racing claims may briefly go one over the limit.
+
+A running worker bumps `locked_at` of its jobs every poll interval. A job whose
+worker stopped doing so for `JOB_LOCK_TIMEOUT` seconds is queued again, or
+failed once it used up its attempts. A job that raises is retried after an
+exponential, jittered delay.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Exists, F
+from django.utils import timezone
+
+from .models import Job
+from .registry import tasks
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts):
+    """Seconds to wait before attempt `attempts + 1`"""
+    delay = min(
+        settings.JOB_RETRY_MAX_DELAY, settings.JOB_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _full_tasks():
+    """Names of tasks running as many jobs as their concurrency allows"""
+    running = dict(
+        Job.objects.filter(status=Job.RUNNING)
+        .values("name")
+        .annotate(count=Count("id"))
+        .values_list("name", "count")
+    )
+    return [
+        name
+        for name, task in tasks.items()
+        if task.concurrency is not None and running.get(name, 0) >= task.concurrency
+    ]
+
+
+def claim(worker_id, candidates=10):
+    """Lock the next due job for `worker_id`, None when there is nothing to do"""
+    now = timezone.now()
+    due = (
+        Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+        .exclude(name__in=_full_tasks())
+        .order_by("run_at", "id")
+        .values_list("id", "name")
+    )
+    for job_id, name in due[:candidates]:
+        claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED)
+        task = tasks.get(name)
+        if task is not None and task.concurrency is not None:
+            running = Job.objects.filter(name=name, status=Job.RUNNING)
+            limit = task.concurrency
+            claimed = claimed.filter(~Exists(running[limit - 1 : limit]))
+        if claimed.update(
+            status=Job.RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        ):
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def heartbeat(worker_id):
+    Job.objects.filter(status=Job.RUNNING, locked_by=worker_id).update(
+        locked_at=timezone.now()
+    )
+
+
+def requeue_stale():
+    """Queue again, or fail, the jobs of workers that stopped sending heartbeats"""
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT),
+    )
+    error = "Worker stopped before the job finished."
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, locked_by="", last_error=error, finished_at=timezone.now()
+    )
+    queued = stale.update(status=Job.QUEUED, locked_by="", last_error=error)
+    return queued + failed
+
+
+def delete_finished():
+    """Drop jobs that finished successfully more than JOB_RETENTION seconds ago"""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_RETENTION)
+    return Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()[0]
+
+
+def run(job, worker_id):
+    """Call the task of a claimed job and record how it went"""
+    mine = Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=worker_id)
+    task = tasks.get(job.name)
+    if task is None:
+        mine.update(
+            status=Job.FAILED,
+            last_error=f"Unknown task {job.name}",
+            finished_at=timezone.now(),
+        )
+        return
+    try:
+        result = task(**job.kwargs)
+    except Exception:
+        logger.exception("Job %s failed", job)
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            mine.update(status=Job.FAILED, last_error=error, finished_at=timezone.now())
+        else:
+            run_at = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+            mine.update(
+                status=Job.QUEUED, locked_by="", last_error=error, run_at=run_at
+            )
+    else:
+        mine.update(
+            status=Job.DONE,
+            last_error="",
+            result=result,
+            finished_at=timezone.now(),
+        )
+
+
+class Worker:
+    """Claims due jobs and runs up to `concurrency` of them at once
+
+    With a concurrency of one, jobs run in the calling thread.
+    """
+
+    cleanup_interval = 60
+
+    def __init__(self, concurrency=1, poll_interval=None, worker_id=None):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+        self.running = set()
+
+    def stop(self):
+        """Claim nothing more, the running jobs are finished first"""
+        self.stopping.set()
+
+    def work(self, burst=False):
+        """Run jobs until stopped, or until none are due when `burst` is set"""
+        pool = None
+        if self.concurrency > 1:
+            pool = ThreadPoolExecutor(self.concurrency, thread_name_prefix="job")
+        done = threading.Event()
+        beat = threading.Thread(target=self._beat, args=(done,), daemon=True)
+        beat.start()
+        last_cleanup = None
+        try:
+            while not self.stopping.is_set():
+                now = time.monotonic()
+                if last_cleanup is None or now - last_cleanup >= self.cleanup_interval:
+                    requeue_stale()
+                    delete_finished()
+                    last_cleanup = now
+
+                claimed = self.fill(pool)
+                if burst and not claimed and not self.running:
+                    break
+                if self.running:
+                    finished, _ = wait(
+                        self.running,
+                        timeout=self.poll_interval,
+                        return_when=FIRST_COMPLETED,
+                    )
+                    self.running -= finished
+                elif not claimed:
+                    self.stopping.wait(self.poll_interval)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+            done.set()
+            beat.join()
+
+    def _beat(self, done):
+        # from its own thread, so that long jobs run inline keep their lock too
+        try:
+            while not done.wait(self.poll_interval):
+                heartbeat(self.worker_id)
+        finally:
+            connection.close()
+
+    def fill(self, pool):
+        """Claim jobs while there are free slots, return how many were claimed"""
+        claimed = 0
+        while len(self.running) < self.concurrency and not self.stopping.is_set():
+            job = claim(self.worker_id)
+            if job is None:
+                break
+            claimed += 1
+            if pool is None:
+                run(job, self.worker_id)
+            else:
+                self.running.add(pool.submit(self._run_in_thread, job))
+        return claimed
+
+    def _run_in_thread(self, job):
+        try:
+            run(job, self.worker_id)
+        finally:
+            connection.close()
@@ -0,0 +1,171 @@
+"""Async read paths of the quiz API, for deployments served over ASGI.
+
+Each view answers GET itself and hands every other method to its DRF
+counterpart in `views`, so the URLs and payloads are the same either way.
+Django 3.2 has no async ORM or cache API, so each blocking step runs through
+`sync_to_async`; between those hops the event loop is free to serve other
+clients, and slow clients no longer pin a worker thread each.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import cache
+from . import sampling
+from . import serializers
+from . import views
+from .fieldsets import Fieldset
+from .models import Quiz, Question, Answer
+
+
+def json_response(data, status=200):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(
+        renderer.render(data), status=status, content_type=renderer.media_type
+    )
+
+
+def _authenticate(request):
+    """Return a DRF request for an authenticated user, or a 401 response"""
+    authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    drf_request = Request(request, authenticators=authenticators)
+    try:
+        user = drf_request.user
+    except exceptions.AuthenticationFailed as error:
+        detail = error.detail
+    else:
+        if user and user.is_authenticated:
+            return drf_request
+        detail = exceptions.NotAuthenticated.default_detail
+
+    response = json_response({"detail": detail}, status=401)
+    response["WWW-Authenticate"] = authenticators[0].authenticate_header(drf_request)
+    return response
+
+
+def _paginate(drf_request, queryset, serializer_class, paginator_class=None):
+    paginator = (paginator_class or api_settings.DEFAULT_PAGINATION_CLASS)()
+    try:
+        page = paginator.paginate_queryset(queryset, drf_request)
+    except exceptions.NotFound as error:
+        return json_response({"detail": error.detail}, status=404)
+    data = serializer_class(page, many=True).data
+    return json_response(paginator.get_paginated_response(data).data)
+
+
+def async_read_view(sync_view):
+    """Turn `get(drf_request, **kwargs)` into an async view delegating writes"""
+    sync_view = sync_to_async(sync_view)
+
+    def decorator(get):
+        async def view(request, **kwargs):
+            if request.method != "GET":
+                return await sync_view(request, **kwargs)
+            drf_request = await sync_to_async(_authenticate)(request)
+            if isinstance(drf_request, HttpResponse):
+                return drf_request
+            return await get(drf_request, **kwargs)
+
+        # DRF views are csrf exempt, csrf_exempt() itself would hide the coroutine
+        view.csrf_exempt = True
+        view.__name__ = get.__name__
+        view.__doc__ = get.__doc__
+        return view
+
+    return decorator
+
+
+def _quiz_list(drf_request):
+    try:
+        fieldset = Fieldset.from_request(drf_request)
+        queryset = views.quiz_list_queryset(drf_request)
+    except exceptions.ValidationError as error:
+        return json_response(error.detail, status=400)
+    etag = views.quiz_list_etag(drf_request)
+    response = views.not_modified(drf_request, etag)
+    if response is None:
+        response = _paginate(
+            drf_request,
+            fieldset.queryset(queryset),
+            fieldset.serializer,
+            views.QuizListCreate.pagination_class,
+        )
+        response["ETag"] = etag
+    return response
+
+
+@async_read_view(views.QuizListCreate.as_view())
+async def quiz_list(drf_request):
+    """Quizes of the logged in user, paginated"""
+    return await sync_to_async(_quiz_list)(drf_request)
+
+
+def _load_quiz_document(request, pk):
+    response = views.check_quiz_version(request, pk)
+    if response is not None:
+        return response
+    quiz = Quiz.objects.with_questions().filter(pk=pk).first()
+    if quiz is None:
+        return json_response({"detail": exceptions.NotFound.default_detail}, 404)
+    return views.build_quiz_document(quiz)
+
+
+def _shaped_quiz(drf_request, pk, fieldset):
+    try:
+        loaded = views.load_shaped_quiz(drf_request, pk, fieldset)
+    except Http404:
+        return json_response({"detail": exceptions.NotFound.default_detail}, 404)
+    if isinstance(loaded, HttpResponse):
+        return loaded
+    quiz, data = loaded
+    return views.set_quiz_validators(json_response(data), quiz, fieldset.key)
+
+
+@async_read_view(views.QuizDetail.as_view())
+async def quiz_detail(drf_request, pk):
+    """A quiz with all questions and answers, served from the document cache"""
+    try:
+        fieldset = Fieldset.from_request(drf_request)
+    except exceptions.ValidationError as error:
+        return json_response(error.detail, status=400)
+    if not fieldset.is_default:
+        return await sync_to_async(_shaped_quiz)(drf_request, pk, fieldset)
+
+    cached = await sync_to_async(cache.get_quiz_document)(pk)
+    if cached is None:
+        cached = await sync_to_async(_load_quiz_document)(drf_request, pk)
+        if isinstance(cached, HttpResponse):
+            return cached
+    return views.quiz_document_response(drf_request, pk, cached)
+
+
+def _sample(drf_request, pk):
+    try:
+        return json_response(sampling.from_request(drf_request, pk))
+    except exceptions.ValidationError as error:
+        return json_response(error.detail, status=400)
+
+
+@async_read_view(views.QuestionListCreate.as_view())
+async def questions(drf_request, pk):
+    """Questions of a quiz with their answers, paginated or a random sample"""
+    if "sample" in drf_request.query_params:
+        return await sync_to_async(_sample)(drf_request, pk)
+    queryset = (
+        Question.objects.filter(quiz__id=pk, quiz__deleted_at__isnull=True)
+        .with_answers()
+        .order_by("id")
+    )
+    return await sync_to_async(_paginate)(drf_request, queryset, serializers.Question)
+
+
+@async_read_view(views.AnswerListCreate.as_view())
+async def answers(drf_request, pk, question_pk):
+    """Answers of a question, paginated"""
+    queryset = Answer.objects.filter(
+        question__id=question_pk, question__quiz__deleted_at__isnull=True
+    ).order_by("id")
+    return await sync_to_async(_paginate)(drf_request, queryset, serializers.Answer)
@@ -0,0 +1,95 @@
+"""Per-quiz data derived from the question/answer tree, kept in a Django cache.
+
+Everything stored here is dropped together by `invalidate_quiz` whenever the quiz,
+one of its questions or one of its answers changes.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def _cache():
+    return caches[settings.QUIZ_CACHE]
+
+
+def quiz_document_key(quiz_id):
+    return f"quiz-document:v2:{quiz_id}"
+
+
+def answer_key_key(quiz_id):
+    return f"quiz-answer-key:{quiz_id}"
+
+
+def question_ids_key(quiz_id):
+    return f"quiz-question-ids:{quiz_id}"
+
+
+def _quiz_keys(quiz_id):
+    return [
+        quiz_document_key(quiz_id),
+        answer_key_key(quiz_id),
+        question_ids_key(quiz_id),
+    ]
+
+
+def get_quiz_document(quiz_id):
+    """Return (version, modified_at, JSON bytes, compressed variants) of a quiz
+
+    The variants map content codings ("gzip", "br") to the compressed bytes.
+    None on a miss.
+    """
+    return _cache().get(quiz_document_key(quiz_id))
+
+
+def _set_for_version(key, value, quiz_id, version):
+    """Cache `value`, built from the quiz at `version`, unless that is outdated
+
+    A reader that loaded the tree before a write committed can get here after
+    the write's on-commit delete. So the quiz row is read again once the value
+    is stored, and the value is dropped if a write moved the quiz past
+    `version` (or deleted it) meanwhile. A write committing after that read
+    still has its on-commit delete to come.
+    """
+    from .models import Quiz  # quizes.models imports this module
+
+    _cache().set(key, value)
+    if not Quiz.objects.filter(pk=quiz_id, version=version).exists():
+        _cache().delete(key)
+
+
+def set_quiz_document(quiz_id, version, modified_at, document, variants):
+    _set_for_version(
+        quiz_document_key(quiz_id),
+        (version, modified_at, document, variants),
+        quiz_id,
+        version,
+    )
+
+
+def get_answer_key(quiz_id):
+    return _cache().get(answer_key_key(quiz_id))
+
+
+def set_answer_key(quiz_id, version, answer_key):
+    _set_for_version(answer_key_key(quiz_id), answer_key, quiz_id, version)
+
+
+def get_question_ids(quiz_id):
+    """Return the ascending question ids of a quiz as an array, or None on a miss"""
+    return _cache().get(question_ids_key(quiz_id))
+
+
+def set_question_ids(quiz_id, version, question_ids):
+    _set_for_version(question_ids_key(quiz_id), question_ids, quiz_id, version)
+
+
+def invalidate_quiz(quiz_id):
+    """Drop the cached data of a quiz now and again once the transaction commits.
+
+    The second delete covers readers that stored the old tree before the commit,
+    `_set_for_version` those that store it after.
+    """
+    keys = _quiz_keys(quiz_id)
+    _cache().delete_many(keys)
+    transaction.on_commit(lambda: _cache().delete_many(keys))
@@ -0,0 +1,10 @@
+from django.core.checks import Tags, register
+
+from config.checks import shared_cache_errors
+
+
+@register(Tags.caches)
+def check_quiz_cache(app_configs, **kwargs):
+    # invalidate_quiz only reaches the process it runs in, the others would
+    # keep serving the old document until it expires
+    return shared_cache_errors("QUIZ_CACHE", "quizes.E001")
@@ -0,0 +1,81 @@
+"""Deleting quizes without loading their trees.
+
+`Quiz.delete()` goes through Django's collector, which loads every question
+(they have delete signals) and the ids of every answer, attempt and selected
+answer before deleting anything, all in one transaction. Here instead:
+
+1. `mark_deleted` sets `Quiz.deleted_at`, hiding the quiz from the API at once
+2. `purge` deletes the tree with set-based DELETEs, `QUIZ_DELETE_CHUNK_SIZE`
+   questions (with their answers) or attempts per short transaction
+3. the quiz row itself goes last
+
+`quizes.tasks.purge_quiz` runs step 2 and 3 as a background job;
+`purge_deleted_quizes` finishes purges that never got to run.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_quiz
+from .models import (
+    Answer,
+    Attempt,
+    AttemptAnswer,
+    LeaderboardEntry,
+    Question,
+    Quiz,
+    ScoreBucket,
+    SearchDocument,
+)
+
+
+def mark_deleted(quiz_id):
+    Quiz.all_objects.filter(pk=quiz_id).update(deleted_at=timezone.now())
+    invalidate_quiz(quiz_id)
+
+
+def _raw_delete(queryset):
+    # a plain DELETE ... WHERE, no collector, signals or cascades
+    return queryset._raw_delete(queryset.db)
+
+
+def _in_chunks(queryset, chunk_size, delete):
+    """Call `delete(ids)` with chunk_size pks of `queryset` until there are none
+
+    Every chunk is its own transaction, so locks are only held briefly.
+    """
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.order_by().values_list("pk", flat=True)[:chunk_size])
+            if not ids:
+                return
+            delete(ids)
+
+
+def _delete_questions(ids):
+    _raw_delete(AttemptAnswer.objects.filter(question_id__in=ids))
+    _raw_delete(Answer.objects.filter(question_id__in=ids))
+    _raw_delete(Question.objects.filter(id__in=ids))
+
+
+def _delete_attempts(ids):
+    _raw_delete(AttemptAnswer.objects.filter(attempt_id__in=ids))
+    _raw_delete(Attempt.objects.filter(id__in=ids))
+
+
+def purge(quiz_id, chunk_size=None):
+    """Delete a quiz and everything hanging off it, chunk by chunk"""
+    chunk_size = chunk_size or settings.QUIZ_DELETE_CHUNK_SIZE
+    _in_chunks(Question.objects.filter(quiz_id=quiz_id), chunk_size, _delete_questions)
+    _in_chunks(Attempt.objects.filter(quiz_id=quiz_id), chunk_size, _delete_attempts)
+    for model in (LeaderboardEntry, ScoreBucket):
+        _in_chunks(
+            model.objects.filter(quiz_id=quiz_id),
+            chunk_size,
+            lambda ids, model=model: _raw_delete(model.objects.filter(pk__in=ids)),
+        )
+    # rows added in the meantime go with the quiz, through the collector
+    with transaction.atomic():
+        _raw_delete(SearchDocument.objects.filter(quiz_id=quiz_id))
+        Quiz.all_objects.filter(pk=quiz_id).delete()
@@ -0,0 +1,151 @@
+"""Sparse fieldsets and opt-in expansion of quiz payloads.
+
+Quiz endpoints accept three query parameters:
+
+* `fields=id,title,questions.title` keeps only the listed fields, a level of
+  the tree without any listed field keeps all of its fields
+* `expand=questions` or `expand=questions.answers` nests only the listed
+  relations, `expand=` nests none; without the parameter everything is nested
+* `view=summary` returns `question_count` and `answer_count` instead of the
+  questions
+
+Relations that are not returned are not loaded either, see `Fieldset.queryset`.
+"""
+
+import functools
+import hashlib
+
+from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
+
+from . import serializers
+from .models import Question
+
+QUESTIONS = "questions"
+ANSWERS = "questions.answers"
+RELATIONS = (QUESTIONS, ANSWERS)
+
+
+def _split(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+@functools.lru_cache(maxsize=None)
+def _valid_paths(serializer_class):
+    return frozenset(_paths(serializer_class()))
+
+
+def _paths(serializer, prefix=""):
+    for name, field in serializer.fields.items():
+        yield prefix + name
+        child = getattr(field, "child", None)
+        if child is not None and hasattr(child, "fields"):
+            yield from _paths(child, f"{prefix}{name}.")
+
+
+class Fieldset:
+    """The part of the quiz tree a request asked for"""
+
+    def __init__(self, fields=None, expand=None, summary=False):
+        self.fields = fields
+        self.expand = expand
+        self.summary = summary
+
+    @classmethod
+    def from_request(cls, request):
+        params = request.query_params
+        view = params.get("view")
+        if view not in (None, "summary"):
+            raise ValidationError({"view": ["Must be 'summary' when given."]})
+        fieldset = cls(
+            fields=_split(params["fields"]) if "fields" in params else None,
+            expand=_split(params["expand"]) if "expand" in params else None,
+            summary=view == "summary",
+        )
+        fieldset.validate()
+        return fieldset
+
+    @property
+    def is_default(self):
+        return self.fields is None and self.expand is None and not self.summary
+
+    @property
+    def key(self):
+        """Short digest identifying this shape, for ETags"""
+        shape = (
+            sorted(self.fields or []),
+            self.expand is None,
+            sorted(self.expand or []),
+            self.summary,
+        )
+        return hashlib.md5(repr(shape).encode()).hexdigest()[:8]
+
+    @property
+    def serializer_class(self):
+        return serializers.QuizSummary if self.summary else serializers.Quiz
+
+    def validate(self):
+        unknown = sorted((self.fields or set()) - _valid_paths(self.serializer_class))
+        if unknown:
+            raise ValidationError({"fields": [f"Unknown fields: {', '.join(unknown)}"]})
+        relations = set() if self.summary else set(RELATIONS)
+        unknown = sorted((self.expand or set()) - relations)
+        if unknown:
+            raise ValidationError(
+                {"expand": [f"Unknown relations: {', '.join(unknown)}"]}
+            )
+
+    def _level(self, prefix):
+        """Fields requested directly at `prefix`, None when it is not restricted"""
+        if self.fields is None:
+            return None
+        names = {
+            path[len(prefix) :]
+            for path in self.fields
+            if path.startswith(prefix) and "." not in path[len(prefix) :]
+        }
+        return names or None
+
+    def includes(self, path):
+        """Whether `path` (`title`, `questions.answers`...) is in the output"""
+        prefix, _, name = path.rpartition(".")
+        prefix = f"{prefix}." if prefix else ""
+        if path in RELATIONS:
+            if self.summary:
+                return False
+            if self.expand is not None and not any(
+                relation == path or relation.startswith(f"{path}.")
+                for relation in self.expand
+            ):
+                return False
+            if prefix and not self.includes(prefix[:-1]):
+                return False
+        level = self._level(prefix)
+        if level is None or name in level:
+            return True
+        # asking for questions.title implies questions
+        return any(field.startswith(f"{path}.") for field in self.fields)
+
+    def queryset(self, queryset):
+        """Prefetch only the relations that end up in the output"""
+        if self.summary:
+            return queryset
+        if not self.includes(QUESTIONS):
+            return queryset
+        questions = Question.objects.order_by("id")
+        if self.includes(ANSWERS):
+            questions = questions.with_answers()
+        return queryset.prefetch_related(Prefetch("question_set", queryset=questions))
+
+    def serializer(self, instance, many=False, **kwargs):
+        serializer = self.serializer_class(instance, many=many, **kwargs)
+        self._prune(serializer.child if many else serializer, "")
+        return serializer
+
+    def _prune(self, serializer, prefix):
+        for name in list(serializer.fields):
+            path = prefix + name
+            if not self.includes(path):
+                serializer.fields.pop(name)
+            elif path in RELATIONS:
+                self._prune(serializer.fields[name].child, f"{path}.")
@@ -0,0 +1,104 @@
+"""Grading of quiz attempts against a cached answer key.
+
+The answer key of a quiz is built with a single query and cached next to the quiz
+document, so grading a submission is a few set comparisons in memory.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache
+from . import leaderboard
+from . import stats
+from .models import Attempt, AttemptAnswer, Question, quiz_version
+
+
+class AnswerKey:
+    def __init__(self, correct, questions):
+        # question id -> frozenset of its correct answer ids
+        self.correct = correct
+        # answer id -> question id, for every answer of the quiz
+        self.questions = questions
+
+    @classmethod
+    def build(cls, quiz_id):
+        correct, questions = {}, {}
+        rows = Question.objects.filter(quiz_id=quiz_id).values_list(
+            "id", "answer__id", "answer__correct"
+        )
+        for question_id, answer_id, is_correct in rows:
+            correct.setdefault(question_id, set())
+            if answer_id is None:
+                continue
+            questions[answer_id] = question_id
+            if is_correct:
+                correct[question_id].add(answer_id)
+        return cls({pk: frozenset(ids) for pk, ids in correct.items()}, questions)
+
+    @property
+    def total(self):
+        return len(self.correct)
+
+    def grade(self, answer_ids):
+        """Return the number of questions whose selection matches the key exactly
+
+        Raises ValueError for answer ids that do not belong to the quiz.
+        """
+        unknown = set(answer_ids) - self.questions.keys()
+        if unknown:
+            raise ValueError(f"Unknown answer ids: {sorted(unknown)}")
+
+        selected = {}
+        for answer_id in answer_ids:
+            selected.setdefault(self.questions[answer_id], set()).add(answer_id)
+        return sum(
+            1
+            for question_id, answer_ids in selected.items()
+            if answer_ids == self.correct[question_id]
+        )
+
+
+def get_answer_key(quiz_id):
+    answer_key = cache.get_answer_key(quiz_id)
+    if answer_key is None:
+        version = quiz_version(quiz_id)
+        answer_key = AnswerKey.build(quiz_id)
+        cache.set_answer_key(quiz_id, version, answer_key)
+    return answer_key
+
+
+class AlreadySubmitted(Exception):
+    pass
+
+
+@transaction.atomic
+def submit_attempt(attempt, answer_ids):
+    """Grade `answer_ids` for `attempt` and record the result
+
+    Raises ValueError for answers outside the quiz and AlreadySubmitted when the
+    attempt was graded before.
+    """
+    answer_ids = set(answer_ids)
+    answer_key = get_answer_key(attempt.quiz_id)
+    score = answer_key.grade(answer_ids)
+
+    # claiming the attempt with a conditional UPDATE makes concurrent submits safe
+    now = timezone.now()
+    claimed = Attempt.objects.filter(pk=attempt.pk, submitted_at=None).update(
+        submitted_at=now, score=score, total=answer_key.total
+    )
+    if not claimed:
+        raise AlreadySubmitted
+    attempt.submitted_at, attempt.score, attempt.total = now, score, answer_key.total
+
+    AttemptAnswer.objects.bulk_create(
+        AttemptAnswer(
+            attempt=attempt,
+            question_id=answer_key.questions[answer_id],
+            answer_id=answer_id,
+        )
+        for answer_id in answer_ids
+    )
+    stats.record_submission(attempt.quiz_id, answer_key, answer_ids)
+    leaderboard.record_attempt(attempt)
+    return attempt
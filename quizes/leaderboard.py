@@ -0,0 +1,77 @@
+"""Per-quiz leaderboards maintained incrementally as attempts are graded.
+
+Each user has one LeaderboardEntry per quiz holding their best score, and the
+quiz's ScoreBuckets count users per best score. Top-N is an index range scan and
+a user's rank is one plus the users in the buckets above their score, so neither
+ever looks at the attempts themselves.
+"""
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import LeaderboardEntry, ScoreBucket
+
+
+def _move_bucket(quiz_id, score, delta):
+    moved = ScoreBucket.objects.filter(quiz_id=quiz_id, score=score).update(
+        users=F("users") + delta
+    )
+    if not moved:
+        bucket, created = ScoreBucket.objects.get_or_create(
+            quiz_id=quiz_id, score=score, defaults={"users": delta}
+        )
+        if not created:
+            _move_bucket(quiz_id, score, delta)
+
+
+@transaction.atomic
+def record_attempt(attempt):
+    """Fold a graded attempt into the leaderboard of its quiz"""
+    entry, created = LeaderboardEntry.objects.select_for_update().get_or_create(
+        quiz_id=attempt.quiz_id,
+        user_id=attempt.user_id,
+        defaults={
+            "best_score": attempt.score,
+            "achieved_at": attempt.submitted_at,
+            "attempts": 1,
+        },
+    )
+    if created:
+        _move_bucket(attempt.quiz_id, attempt.score, 1)
+        return
+
+    entry.attempts += 1
+    if attempt.score > entry.best_score:
+        _move_bucket(attempt.quiz_id, entry.best_score, -1)
+        _move_bucket(attempt.quiz_id, attempt.score, 1)
+        entry.best_score = attempt.score
+        entry.achieved_at = attempt.submitted_at
+    entry.save(update_fields=["attempts", "best_score", "achieved_at"])
+
+
+def top(quiz_id, limit):
+    """Return the `limit` best entries of the quiz, each with its `rank` set"""
+    entries = list(
+        LeaderboardEntry.objects.filter(quiz_id=quiz_id).order_by(
+            "-best_score", "achieved_at"
+        )[:limit]
+    )
+    # competition ranking: users sharing a score share the rank of the first one
+    for position, entry in enumerate(entries, start=1):
+        if position > 1 and entry.best_score == entries[position - 2].best_score:
+            entry.rank = entries[position - 2].rank
+        else:
+            entry.rank = position
+    return entries
+
+
+def rank_of(quiz_id, user_id):
+    """Return the user's entry with its `rank` set, None if they never submitted"""
+    entry = LeaderboardEntry.objects.filter(quiz_id=quiz_id, user_id=user_id).first()
+    if entry is None:
+        return None
+    ahead = ScoreBucket.objects.filter(
+        quiz_id=quiz_id, score__gt=entry.best_score
+    ).aggregate(users=Sum("users"))["users"]
+    entry.rank = (ahead or 0) + 1
+    return entry
@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from quizes import transfer
+
+
+class Command(BaseCommand):
+    help = "Stream every quiz of a user as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("email", help="owner of the quizes")
+        parser.add_argument("--format", choices=transfer.FORMATS, default="ndjson")
+        parser.add_argument("--output", help="file to write, defaults to stdout")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["email"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        _, encode, _ = transfer.FORMATS[options["format"]]
+        rows = transfer.export_rows(user, chunk_size=options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                output.writelines(encode(rows))
+        else:
+            self.stdout.ending = ""
+            for line in encode(rows):
+                self.stdout.write(line)
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from quizes import transfer
+
+
+class Command(BaseCommand):
+    help = "Add quizes to a user from an NDJSON or CSV file, in bounded batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("email", help="owner of the imported quizes")
+        parser.add_argument("path", help="file to read")
+        parser.add_argument("--format", choices=transfer.FORMATS, default="ndjson")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["email"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        _, _, parse = transfer.FORMATS[options["format"]]
+        importer = transfer.QuizImporter(user, batch_size=options["batch_size"])
+        with open(options["path"], newline="") as lines:
+            try:
+                counts = importer.run(parse(lines))
+            except ValueError as error:
+                raise CommandError(error)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Imported {quizes} new quizes, {questions} questions and "
+                "{answers} answers".format(**counts)
+            )
+        )
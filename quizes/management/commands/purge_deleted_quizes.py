@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from quizes import deletion
+from quizes.models import Quiz
+
+
+class Command(BaseCommand):
+    help = "Finish deleting quizes whose background purge was interrupted"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        quiz_ids = list(
+            Quiz.all_objects.filter(deleted_at__isnull=False)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        for quiz_id in quiz_ids:
+            deletion.purge(quiz_id, options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Purged {len(quiz_ids)} quizes"))
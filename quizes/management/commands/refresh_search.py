@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from quizes import search
+from quizes.models import Quiz
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search documents of quizes that changed since indexing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        rebuilt = search.refresh(Quiz.objects.all(), options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Reindexed {rebuilt} quizes"))
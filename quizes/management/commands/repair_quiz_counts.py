@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from quizes.models import Quiz, touch_quizes, tree_counts
+
+
+class Command(BaseCommand):
+    help = "Recount question_count and answer_count of quizes where they drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="only report the drifted quizes"
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        actual = {f"actual_{name}": count for name, count in tree_counts().items()}
+        drifted = list(
+            Quiz.objects.annotate(**actual)
+            .exclude(
+                question_count=F("actual_question_count"),
+                answer_count=F("actual_answer_count"),
+            )
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"{len(drifted)} quizes have wrong counts")
+            return
+
+        batch_size = options["batch_size"]
+        for start in range(0, len(drifted), batch_size):
+            with transaction.atomic():
+                touch_quizes(drifted[start : start + batch_size], recount=True)
+        self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} quizes"))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quizes import seed
+
+
+class Command(BaseCommand):
+    help = "Bulk insert a reproducible synthetic dataset for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--quizes", type=int, default=5, help="per user")
+        parser.add_argument("--questions", type=int, default=10, help="per quiz")
+        parser.add_argument("--answers", type=int, default=4, help="per question")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix", default="bench", help="users are <prefix>-<n>@example.com"
+        )
+        parser.add_argument("--password", default="benchmark")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="delete users seeded earlier with the same prefix first",
+        )
+
+    def handle(self, *args, **options):
+        existing = seed.seeded_users(options["prefix"])
+        if options["flush"]:
+            existing.delete()
+        elif existing.exists():
+            raise CommandError(
+                f"Users with prefix {options['prefix']!r} exist, pass --flush"
+            )
+
+        counts = seed.Seeder(
+            prefix=options["prefix"],
+            users=options["users"],
+            quizes=options["quizes"],
+            questions=options["questions"],
+            answers=options["answers"],
+            seed=options["seed"],
+            password=options["password"],
+            batch_size=options["batch_size"],
+        ).run()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Seeded {users} users, {quizes} quizes, {questions} questions and "
+                "{answers} answers".format(**counts)
+            )
+        )
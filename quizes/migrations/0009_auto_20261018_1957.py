@@ -0,0 +1,24 @@
+# Generated by Django 3.2.1 on 2026-10-18 19:57
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizes', '0008_auto_20261018_1955'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='modified_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
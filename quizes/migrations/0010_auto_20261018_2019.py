@@ -0,0 +1,44 @@
+# Generated by Django 3.2.1 on 2026-10-18 20:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_trees(apps, schema_editor):
+    Quiz = apps.get_model('quizes', 'Quiz')
+    Question = apps.get_model('quizes', 'Question')
+    Answer = apps.get_model('quizes', 'Answer')
+    questions = (
+        Question.objects.filter(quiz=OuterRef('pk')).order_by().values('quiz')
+        .annotate(count=Count('pk')).values('count')
+    )
+    answers = (
+        Answer.objects.filter(question__quiz=OuterRef('pk')).order_by()
+        .values('question__quiz').annotate(count=Count('pk')).values('count')
+    )
+    Quiz.objects.update(
+        question_count=Coalesce(Subquery(questions), 0),
+        answer_count=Coalesce(Subquery(answers), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizes', '0009_auto_20261018_1957'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='answer_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_trees, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 3.2.1 on 2026-10-18 20:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# external content FTS5 table over quizes_searchdocument, kept in step by triggers
+SQLITE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE quizes_search USING fts5(
+        title, questions, answers,
+        content='quizes_searchdocument', content_rowid='quiz_id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER quizes_search_insert AFTER INSERT ON quizes_searchdocument BEGIN
+        INSERT INTO quizes_search(rowid, title, questions, answers)
+        VALUES (new.quiz_id, new.title, new.questions, new.answers);
+    END
+    """,
+    """
+    CREATE TRIGGER quizes_search_delete AFTER DELETE ON quizes_searchdocument BEGIN
+        INSERT INTO quizes_search(quizes_search, rowid, title, questions, answers)
+        VALUES ('delete', old.quiz_id, old.title, old.questions, old.answers);
+    END
+    """,
+    """
+    CREATE TRIGGER quizes_search_update AFTER UPDATE ON quizes_searchdocument BEGIN
+        INSERT INTO quizes_search(quizes_search, rowid, title, questions, answers)
+        VALUES ('delete', old.quiz_id, old.title, old.questions, old.answers);
+        INSERT INTO quizes_search(rowid, title, questions, answers)
+        VALUES (new.quiz_id, new.title, new.questions, new.answers);
+    END
+    """,
+]
+SQLITE_DROP = [
+    "DROP TRIGGER quizes_search_update",
+    "DROP TRIGGER quizes_search_delete",
+    "DROP TRIGGER quizes_search_insert",
+    "DROP TABLE quizes_search",
+]
+
+# generated columns need PostgreSQL 12
+POSTGRESQL_INDEX = [
+    """
+    ALTER TABLE quizes_searchdocument ADD COLUMN vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', title), 'A')
+        || setweight(to_tsvector('english', questions), 'B')
+        || setweight(to_tsvector('english', answers), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX quizes_search ON quizes_searchdocument USING GIN (vector)",
+]
+POSTGRESQL_DROP = [
+    "DROP INDEX quizes_search",
+    "ALTER TABLE quizes_searchdocument DROP COLUMN vector",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizes', '0010_auto_20261018_2019'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='quizes.quiz')),
+                ('version', models.PositiveIntegerField()),
+                ('title', models.TextField()),
+                ('questions', models.TextField()),
+                ('answers', models.TextField()),
+            ],
+        ),
+        migrations.RunPython(
+            run({'sqlite': SQLITE_INDEX, 'postgresql': POSTGRESQL_INDEX}),
+            run({'sqlite': SQLITE_DROP, 'postgresql': POSTGRESQL_DROP}),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.1 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizes', '0011_searchdocument'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='quiz',
+            name='unique_title',
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='quiz',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('title', 'user'), name='unique_title'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.1 on 2026-10-18 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizes', '0012_auto_20261018_2035'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['user', 'question_count', 'id'], name='quiz_size'),
+        ),
+    ]
@@ -1,23 +1,120 @@
+import threading
+
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .cache import invalidate_quiz
+
+
+class QuizQuerySet(models.QuerySet):
+    def with_questions(self):
+        """Prefetch ordered questions and their ordered answers in two queries"""
+        return self.prefetch_related(
+            models.Prefetch(
+                "question_set", queryset=Question.objects.with_answers().order_by("id")
+            )
+        )
+
+
+class QuizManager(models.Manager.from_queryset(QuizQuerySet)):
+    """Leaves out quizes that are being deleted, see quizes.deletion"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class QuestionQuerySet(models.QuerySet):
+    def with_answers(self):
+        """Prefetch ordered answers of every question in a single query"""
+        return self.prefetch_related(
+            models.Prefetch("answer_set", queryset=Answer.objects.order_by("id"))
+        )
+
+
+class AnswerQuerySet(models.QuerySet):
+    def delete(self):
+        quiz_ids = set(self.values_list("question__quiz_id", flat=True))
+        deleted = super().delete()
+        touch_quizes(quiz_ids, recount=True)
+        return deleted
 
 
 class Quiz(models.Model):
     title = models.CharField(max_length=254)
     user = models.ForeignKey(to=get_user_model(), on_delete=models.CASCADE)
+    # bumped on every change to the quiz or its questions/answers, see touch_quizes
+    version = models.PositiveIntegerField(default=1, editable=False)
+    modified_at = models.DateTimeField(default=timezone.now, editable=False)
+    # statistics counters, incremented as attempts are submitted
+    submission_count = models.PositiveIntegerField(default=0, editable=False)
+    # size of the tree, maintained by touch_quizes (see repair_quiz_counts)
+    question_count = models.PositiveIntegerField(default=0, editable=False)
+    answer_count = models.PositiveIntegerField(default=0, editable=False)
+    # set when a deletion starts, the quiz is gone from the API from then on
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = QuizManager()
+    # quizes being deleted included
+    all_objects = QuizQuerySet.as_manager()
 
     class Meta:
         constraints = [
-            models.UniqueConstraint(fields=["title", "user"], name="unique_title")
+            models.UniqueConstraint(
+                fields=["title", "user"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="unique_title",
+            )
+        ]
+        # the quiz list filtered and ordered by size, see QuizCursorPagination
+        indexes = [
+            models.Index(fields=["user", "question_count", "id"], name="quiz_size")
         ]
 
     def __str__(self):
         return self.title
 
+    # only ever written by targeted UPDATEs (F() expressions for the counters),
+    # a save from an instance loaded before them would write old values back
+    maintained_fields = (
+        "version",
+        "modified_at",
+        "submission_count",
+        "question_count",
+        "answer_count",
+        "deleted_at",
+    )
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or kwargs.get("force_insert"):
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.pop("update_fields", None)
+        if update_fields is None:
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.maintained_fields
+            ]
+        # every change bumps the version, see touch_quizes
+        self.version = models.F("version") + 1
+        self.modified_at = timezone.now()
+        super().save(
+            *args,
+            update_fields={*update_fields, "version", "modified_at"},
+            **kwargs,
+        )
+        self.refresh_from_db(fields=["version"])
+
 
 class Question(models.Model):
     title = models.CharField(max_length=400)
     quiz = models.ForeignKey(to=Quiz, on_delete=models.CASCADE)
+    answered_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = QuestionQuerySet.as_manager()
 
     class Meta:
         constraints = [
@@ -34,6 +131,9 @@ class Answer(models.Model):
     title = models.CharField(max_length=400)
     question = models.ForeignKey(to=Question, on_delete=models.CASCADE)
     correct = models.BooleanField(default=False)
+    selected_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = AnswerQuerySet.as_manager()
 
     class Meta:
         constraints = [
@@ -44,3 +144,202 @@ class Answer(models.Model):
 
     def __str__(self):
         return self.title
+
+    def delete(self, *args, **kwargs):
+        # answers are not hooked to post_delete so that cascades from a question
+        # stay a single fast DELETE instead of loading every answer row
+        quiz_id = self.question.quiz_id
+        deleted = super().delete(*args, **kwargs)
+        touch_quizes([quiz_id], answers=-1)
+        return deleted
+
+
+class Attempt(models.Model):
+    quiz = models.ForeignKey(to=Quiz, on_delete=models.CASCADE)
+    user = models.ForeignKey(to=get_user_model(), on_delete=models.CASCADE)
+    started_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    # number of questions answered exactly right, out of `total`
+    score = models.PositiveIntegerField(null=True, blank=True)
+    total = models.PositiveIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user} - {self.quiz}"
+
+
+class AttemptAnswer(models.Model):
+    """An answer selected in a submitted attempt"""
+
+    attempt = models.ForeignKey(to=Attempt, on_delete=models.CASCADE)
+    question = models.ForeignKey(to=Question, on_delete=models.CASCADE)
+    answer = models.ForeignKey(to=Answer, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["attempt", "answer"], name="unique_attempt_answer"
+            )
+        ]
+
+
+class LeaderboardEntry(models.Model):
+    """Best submitted score of a user in a quiz, kept up to date on grading"""
+
+    quiz = models.ForeignKey(to=Quiz, on_delete=models.CASCADE)
+    user = models.ForeignKey(to=get_user_model(), on_delete=models.CASCADE)
+    best_score = models.PositiveIntegerField()
+    # when best_score was first reached, earlier wins a tie
+    achieved_at = models.DateTimeField()
+    attempts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["quiz", "user"], name="unique_leaderboard_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["quiz", "-best_score", "achieved_at"], name="leaderboard_rank"
+            )
+        ]
+
+
+class ScoreBucket(models.Model):
+    """Number of users whose best score in a quiz is `score`"""
+
+    quiz = models.ForeignKey(to=Quiz, on_delete=models.CASCADE)
+    score = models.PositiveIntegerField()
+    users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["quiz", "score"], name="unique_score_bucket"
+            )
+        ]
+
+
+class SearchDocument(models.Model):
+    """Text of a quiz tree as it is indexed for full-text search.
+
+    Rebuilt by quizes.search when `version` falls behind the quiz's; the index
+    itself is an FTS5 table on SQLite and a tsvector column on PostgreSQL.
+    """
+
+    quiz = models.OneToOneField(
+        to=Quiz,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    # version of the quiz the text was taken from
+    version = models.PositiveIntegerField()
+    title = models.TextField()
+    questions = models.TextField()
+    answers = models.TextField()
+
+
+def tree_counts():
+    """Subqueries counting the questions and answers of the outer quiz"""
+    questions = (
+        Question.objects.filter(quiz=models.OuterRef("pk"))
+        .order_by()
+        .values("quiz")
+        .annotate(count=models.Count("pk"))
+        .values("count")
+    )
+    answers = (
+        Answer.objects.filter(question__quiz=models.OuterRef("pk"))
+        .order_by()
+        .values("question__quiz")
+        .annotate(count=models.Count("pk"))
+        .values("count")
+    )
+    return {
+        "question_count": Coalesce(models.Subquery(questions), 0),
+        "answer_count": Coalesce(models.Subquery(answers), 0),
+    }
+
+
+# sent with `quiz_ids` after the title or the tree of those quizes changed
+quizes_changed = Signal()
+
+
+def quiz_version(quiz_id):
+    """The current version of a quiz, None when it is gone or being deleted
+
+    Read before loading a tree to cache, see cache._set_for_version.
+    """
+    return Quiz.objects.filter(pk=quiz_id).values_list("version", flat=True).first()
+
+
+def touch_quizes(quiz_ids, questions=0, answers=0, recount=False):
+    """Record a change to the trees of `quiz_ids`: bump versions, drop cached data
+
+    `questions` and `answers` are added to the counts of every quiz, `recount`
+    counts them again instead, for changes of unknown size (bulk operations).
+    """
+    quiz_ids = set(quiz_ids)
+    if not quiz_ids:
+        return
+    changes = {"version": models.F("version") + 1, "modified_at": timezone.now()}
+    if recount:
+        changes.update(tree_counts())
+    else:
+        if questions:
+            changes["question_count"] = models.F("question_count") + questions
+        if answers:
+            changes["answer_count"] = models.F("answer_count") + answers
+    Quiz.objects.filter(pk__in=quiz_ids).update(**changes)
+    for quiz_id in quiz_ids:
+        invalidate_quiz(quiz_id)
+    quizes_changed.send(sender=Quiz, quiz_ids=quiz_ids)
+
+
+# quizes whose delete is cascading through their questions in this thread
+_deleting = threading.local()
+
+
+def _quizes_being_deleted():
+    if not hasattr(_deleting, "quiz_ids"):
+        _deleting.quiz_ids = set()
+    return _deleting.quiz_ids
+
+
+# keep versions and cached quiz data in step with the question/answer tree
+@receiver(post_save, sender=Quiz)
+def quiz_saved(sender, instance, **kwargs):
+    invalidate_quiz(instance.pk)
+    quizes_changed.send(sender=Quiz, quiz_ids={instance.pk})
+
+
+@receiver(pre_delete, sender=Quiz)
+def quiz_deleting(sender, instance, **kwargs):
+    _quizes_being_deleted().add(instance.pk)
+
+
+@receiver(post_delete, sender=Quiz)
+def quiz_deleted(sender, instance, **kwargs):
+    _quizes_being_deleted().discard(instance.pk)
+    invalidate_quiz(instance.pk)
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, created, **kwargs):
+    touch_quizes([instance.quiz_id], questions=int(created))
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, **kwargs):
+    if instance.quiz_id in _quizes_being_deleted():
+        # the quiz row is about to go too, skip one version UPDATE per question
+        invalidate_quiz(instance.quiz_id)
+    else:
+        # its answers went in a fast delete without signals, count them again
+        touch_quizes([instance.quiz_id], recount=True)
+
+
+@receiver(post_save, sender=Answer)
+def answer_changed(sender, instance, created, **kwargs):
+    touch_quizes([instance.question.quiz_id], answers=int(created))
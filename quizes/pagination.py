@@ -0,0 +1,46 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination on the primary key behind an opaque cursor.
+
+    Every page is fetched with `WHERE id > <last seen id> LIMIT n`, so deep pages
+    cost the same as the first one. Clients may shrink or grow the page with
+    `?page_size=`, capped by the `API_MAX_PAGE_SIZE` setting.
+    """
+
+    ordering = "id"
+    page_size_query_param = "page_size"
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
+
+
+class QuizCursorPagination(IdCursorPagination):
+    """Keyset pagination of the quiz list, by id or by `?ordering=question_count`
+
+    Quizes of the same size are paged through in id order. The cursor holds
+    the last question count seen and how many quizes of that count were
+    returned, see the `quiz_size` index.
+    """
+
+    orderings = ("id", "-id", "question_count", "-question_count")
+
+    def get_ordering(self, request, queryset, view):
+        # validated by serializers.QuizListParams
+        ordering = request.query_params.get("ordering", "id")
+        if ordering.lstrip("-") == "id":
+            return (ordering,)
+        return (ordering, "-id" if ordering.startswith("-") else "id")
+
+
+class RankedPagination(PageNumberPagination):
+    """Numbered pages, for results ordered by something other than the id"""
+
+    page_size_query_param = "page_size"
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
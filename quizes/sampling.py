@@ -0,0 +1,67 @@
+"""Random samples of the questions of a quiz, repeatable with a seed.
+
+`ORDER BY RANDOM()` reads and sorts every question of the quiz. Instead the
+ascending question ids of each quiz are cached as a compact array (dropped with
+the rest of the quiz data on every change), `random.sample` picks positions in
+it without touching the others, and only the picked questions are loaded, by
+primary key.
+
+The same seed picks the same questions in the same order, and shuffles every
+question's answers the same way, for as long as the quiz does not change. A
+request without a seed gets a fresh one in the response to send back.
+"""
+
+import random
+import secrets
+from array import array
+
+from . import cache
+from . import serializers
+from .models import Question, quiz_version
+
+
+def question_ids(quiz_id):
+    ids = cache.get_question_ids(quiz_id)
+    if ids is None:
+        version = quiz_version(quiz_id)
+        questions = Question.objects.filter(
+            quiz_id=quiz_id, quiz__deleted_at__isnull=True
+        ).order_by("id")
+        ids = array("q", questions.values_list("id", flat=True))
+        cache.set_question_ids(quiz_id, version, ids)
+    return ids
+
+
+def _random(seed, *parts):
+    # string seeds are hashed with SHA-512, so they pick the same in every process
+    return random.Random(":".join(map(str, (seed, *parts))))
+
+
+def pick(quiz_id, size, seed):
+    """Ids of `size` random questions of the quiz, fewer when it is smaller"""
+    ids = question_ids(quiz_id)
+    positions = _random(seed, quiz_id).sample(range(len(ids)), min(size, len(ids)))
+    return [ids[position] for position in positions]
+
+
+def sample_questions(quiz_id, sample, seed=None, shuffle_answers=False):
+    """The serialized sample, with the seed that reproduces it"""
+    if seed is None:
+        seed = secrets.token_hex(8)
+    picked = pick(quiz_id, sample, seed)
+    questions = Question.objects.filter(id__in=picked, quiz__deleted_at__isnull=True)
+    questions = questions.with_answers().in_bulk()
+    data = serializers.Question(
+        [questions[pk] for pk in picked if pk in questions], many=True
+    ).data
+    if shuffle_answers:
+        for question in data:
+            _random(seed, "answers", question["id"]).shuffle(question["answers"])
+    return {"seed": seed, "results": data}
+
+
+def from_request(request, quiz_id):
+    """Answer `?sample=` (with `seed` and `shuffle_answers`); raises ValidationError"""
+    params = serializers.QuestionSample(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    return sample_questions(quiz_id, **params.validated_data)
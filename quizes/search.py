@@ -0,0 +1,128 @@
+"""Ranked full-text search over the quizes of a user.
+
+Every quiz has a `SearchDocument` holding its title, question titles and answer
+titles. Writes send `models.quizes_changed`, which queues an `index_quizes` job
+(see quizes.tasks) once they commit; the job rebuilds the documents whose
+version fell behind the quiz's, off the request path, and searches only read.
+`manage.py refresh_search` rebuilds every stale document, to repair the index
+or fill it for existing quizes. The index over those documents is backend
+specific (see migration 0011):
+
+* SQLite: the `quizes_search` FTS5 table, ranked with bm25
+* PostgreSQL: a weighted tsvector column with a GIN index, ranked with ts_rank
+
+Other databases fall back to unranked substring matching. Matches in titles
+rank above matches in questions, which rank above matches in answers.
+"""
+
+import re
+
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Quiz, Question, Answer, SearchDocument
+
+_terms = re.compile(r"\w+")
+
+# bm25 is lower for better matches, negated so that every backend sorts descending
+SQLITE_MATCHES = "SELECT rowid FROM quizes_search WHERE quizes_search MATCH %s"
+SQLITE_RANK = (
+    "SELECT -bm25(quizes_search, 10.0, 3.0, 1.0) FROM quizes_search"
+    " WHERE quizes_search MATCH %s AND rowid = quizes_quiz.id"
+)
+POSTGRESQL_MATCHES = (
+    "SELECT quiz_id FROM quizes_searchdocument"
+    " WHERE vector @@ plainto_tsquery('english', %s)"
+)
+POSTGRESQL_RANK = (
+    "SELECT ts_rank(vector, plainto_tsquery('english', %s))"
+    " FROM quizes_searchdocument WHERE quiz_id = quizes_quiz.id"
+)
+
+
+def _join(titles):
+    return "\n".join(titles)
+
+
+def index_quizes(quizes):
+    """Rebuild the search documents of `quizes`, (id, version, title) tuples"""
+    documents = {
+        pk: SearchDocument(quiz_id=pk, version=version, title=title)
+        for pk, version, title in quizes
+    }
+    texts = {pk: ([], []) for pk in documents}
+    questions = Question.objects.filter(quiz_id__in=documents).order_by("id")
+    for quiz_id, title in questions.values_list("quiz_id", "title"):
+        texts[quiz_id][0].append(title)
+    answers = Answer.objects.filter(question__quiz_id__in=documents).order_by("id")
+    for quiz_id, title in answers.values_list("question__quiz_id", "title"):
+        texts[quiz_id][1].append(title)
+    for pk, (questions, answers) in texts.items():
+        documents[pk].questions = _join(questions)
+        documents[pk].answers = _join(answers)
+
+    with transaction.atomic():
+        SearchDocument.objects.filter(quiz_id__in=documents).delete()
+        # a concurrent search may have rebuilt the same quiz in the meantime
+        SearchDocument.objects.bulk_create(documents.values(), ignore_conflicts=True)
+
+
+def refresh(queryset, batch_size=500):
+    """Rebuild the search documents of the quizes in `queryset` that are stale"""
+    stale = list(
+        queryset.filter(
+            Q(search_document__isnull=True) | ~Q(search_document__version=F("version"))
+        )
+        .order_by("id")
+        .values_list("id", "version", "title")
+    )
+    for start in range(0, len(stale), batch_size):
+        index_quizes(stale[start : start + batch_size])
+    return len(stale)
+
+
+def terms(query):
+    """The words of a search query, punctuation and operators dropped"""
+    return _terms.findall(query)
+
+
+def _sqlite(words):
+    # every word quoted, so FTS5 query syntax in the input is taken literally
+    match = " ".join(f'"{word}"' for word in words)
+    return SQLITE_MATCHES, SQLITE_RANK, match
+
+
+def _postgresql(words):
+    return POSTGRESQL_MATCHES, POSTGRESQL_RANK, " ".join(words)
+
+
+def _substring(queryset, words):
+    for word in words:
+        queryset = queryset.filter(
+            Q(search_document__title__icontains=word)
+            | Q(search_document__questions__icontains=word)
+            | Q(search_document__answers__icontains=word)
+        )
+    return queryset.annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+BACKENDS = {"sqlite": _sqlite, "postgresql": _postgresql}
+
+
+def search_quizes(user, query):
+    """Quizes of `user` matching every word of `query`, best match first"""
+    words = terms(query)
+    queryset = Quiz.objects.filter(user=user)
+    if not words:
+        return queryset.none()
+
+    backend = BACKENDS.get(connection.vendor)
+    if backend is None:
+        queryset = _substring(queryset, words)
+    else:
+        matches, rank, param = backend(words)
+        queryset = queryset.filter(id__in=RawSQL(matches, [param])).annotate(
+            rank=RawSQL(rank, [param], output_field=FloatField())
+        )
+    return queryset.order_by("-rank", "id")
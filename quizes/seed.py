@@ -0,0 +1,124 @@
+"""Synthetic datasets for load testing.
+
+Users are named `<prefix>-<n>@example.com` and share one password, every quiz
+has the same shape, and which answer is correct is drawn from a seeded RNG, so
+the same arguments always produce the same data.
+"""
+
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from .models import Quiz, Question, Answer
+
+
+def seed_email(prefix, number):
+    return f"{prefix}-{number}@example.com"
+
+
+def seeded_users(prefix):
+    return get_user_model().objects.filter(
+        email__startswith=f"{prefix}-", email__endswith="@example.com"
+    )
+
+
+class Seeder:
+    """Bulk inserts `users` users owning `quizes` quizes of the given shape"""
+
+    def __init__(
+        self,
+        prefix="bench",
+        users=10,
+        quizes=5,
+        questions=10,
+        answers=4,
+        seed=0,
+        password="benchmark",
+        batch_size=1000,
+    ):
+        self.prefix = prefix
+        self.shape = (users, quizes, questions, answers)
+        self.random = random.Random(seed)
+        self.password = password
+        self.batch_size = batch_size
+        self.counts = {"users": 0, "quizes": 0, "questions": 0, "answers": 0}
+
+    def run(self):
+        users, quizes, _, _ = self.shape
+        user_ids = self._create_users(users)
+        # one transaction per batch of quizes keeps memory and lock time bounded
+        per_batch = max(1, self.batch_size // max(1, self.shape[2] * self.shape[3]))
+        quiz_rows = [(user_id, n) for user_id in user_ids for n in range(quizes)]
+        for start in range(0, len(quiz_rows), per_batch):
+            self._create_quizes(quiz_rows[start : start + per_batch])
+        return self.counts
+
+    @transaction.atomic
+    def _create_users(self, count):
+        User = get_user_model()
+        emails = [seed_email(self.prefix, n) for n in range(count)]
+        password = make_password(self.password)
+        User.objects.bulk_create(
+            [User(email=email, password=password) for email in emails],
+            batch_size=self.batch_size,
+        )
+        # bulk_create does not return primary keys on every backend
+        ids = dict(User.objects.filter(email__in=emails).values_list("email", "id"))
+        user_ids = [ids[email] for email in emails]
+        Token.objects.bulk_create(
+            [Token(key=Token.generate_key(), user_id=pk) for pk in user_ids],
+            batch_size=self.batch_size,
+        )
+        self.counts["users"] += count
+        return user_ids
+
+    @transaction.atomic
+    def _create_quizes(self, quiz_rows):
+        _, _, questions, answers = self.shape
+        Quiz.objects.bulk_create(
+            [
+                Quiz(
+                    user_id=user_id,
+                    title=f"Quiz {n}",
+                    question_count=questions,
+                    answer_count=questions * answers,
+                )
+                for user_id, n in quiz_rows
+            ]
+        )
+        ids = {
+            (user_id, title): pk
+            for pk, user_id, title in Quiz.objects.filter(
+                user_id__in={user_id for user_id, _ in quiz_rows},
+                title__in={f"Quiz {n}" for _, n in quiz_rows},
+            ).values_list("id", "user_id", "title")
+        }
+        quiz_ids = [ids[(user_id, f"Quiz {n}")] for user_id, n in quiz_rows]
+
+        Question.objects.bulk_create(
+            [
+                Question(quiz_id=quiz_id, title=f"Question {n}")
+                for quiz_id in quiz_ids
+                for n in range(questions)
+            ],
+            batch_size=self.batch_size,
+        )
+        question_ids = Question.objects.filter(quiz_id__in=quiz_ids).order_by("id")
+
+        rows = []
+        for question_id in question_ids.values_list("id", flat=True).iterator():
+            correct = self.random.randrange(answers) if answers else None
+            rows.extend(
+                Answer(
+                    question_id=question_id, title=f"Answer {n}", correct=n == correct
+                )
+                for n in range(answers)
+            )
+        Answer.objects.bulk_create(rows, batch_size=self.batch_size)
+
+        self.counts["quizes"] += len(quiz_ids)
+        self.counts["questions"] += len(quiz_ids) * questions
+        self.counts["answers"] += len(rows)
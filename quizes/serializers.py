@@ -1,34 +1,116 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
+from rest_framework.settings import api_settings
+
+from config.timing import TimedSerializerMixin
+from jobs.models import Job
 
 from . import models
+from . import pagination
+
+
+def _unique_constraint(model, name):
+    return next(
+        constraint for constraint in model._meta.constraints if constraint.name == name
+    )
+
+
+def _violates(error, model, constraint):
+    """Whether the IntegrityError `error` was raised by `constraint` of `model`"""
+    diag = getattr(error.__cause__, "diag", None)
+    if diag is not None:
+        # PostgreSQL names the constraint
+        return diag.constraint_name == constraint.name
+    # SQLite lists its columns: "UNIQUE constraint failed: table.a, table.b"
+    prefix = "UNIQUE constraint failed: "
+    message = str(error)
+    columns = {
+        f"{model._meta.db_table}.{model._meta.get_field(field).column}"
+        for field in constraint.fields
+    }
+    return (
+        message.startswith(prefix)
+        and set(message[len(prefix) :].split(", ")) == columns
+    )
+
+
+def _unique_error(fields):
+    """The error UniqueTogetherValidator would have reported for `fields`"""
+    return serializers.ValidationError(
+        {
+            api_settings.NON_FIELD_ERRORS_KEY: [
+                f"The fields {', '.join(fields)} must make a unique set."
+            ]
+        }
+    )
+
+
+class UniqueConstraintMixin:
+    """Leaves uniqueness to the database constraint named `Meta.unique_constraint`.
 
+    Instead of a SELECT before every INSERT, the insert runs in a savepoint and a
+    violation of that constraint is reported as the usual validation error; any
+    other IntegrityError is raised as is.
+    """
 
-class Answer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError as error:
+            model = self.Meta.model
+            constraint = _unique_constraint(model, self.Meta.unique_constraint)
+            if not _violates(error, model, constraint):
+                raise
+            raise _unique_error(constraint.fields)
+
+
+class Answer(UniqueConstraintMixin, TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Answer
         fields = ["id", "title", "question", "correct"]
-        validators = [
-            UniqueTogetherValidator(
-                queryset=models.Answer.objects.all(), fields=["title", "question"]
-            )
-        ]
+        unique_constraint = "unique_answer_title"
 
 
-class Question(serializers.ModelSerializer):
+class Question(
+    UniqueConstraintMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     answers = Answer(read_only=True, many=True, source="answer_set")
 
     class Meta:
         model = models.Question
         fields = ["id", "title", "quiz", "answers"]
-        validators = [
-            UniqueTogetherValidator(
-                queryset=models.Question.objects.all(), fields=["title", "quiz"]
+        unique_constraint = "unique_question_title"
+
+
+class QuestionSample(serializers.Serializer):
+    """Query parameters of a random sample of questions, see quizes.sampling"""
+
+    sample = serializers.IntegerField(min_value=1)
+    seed = serializers.CharField(max_length=64, required=False)
+    shuffle_answers = serializers.BooleanField(default=False)
+
+    def validate_sample(self, sample):
+        limit = settings.API_MAX_PAGE_SIZE
+        if sample > limit:
+            raise serializers.ValidationError(
+                f"Ensure this value is less than or equal to {limit}."
             )
-        ]
+        return sample
+
+
+class QuizListParams(serializers.Serializer):
+    """Query parameters filtering and ordering the quiz list by size"""
+
+    min_questions = serializers.IntegerField(min_value=0, required=False)
+    max_questions = serializers.IntegerField(min_value=0, required=False)
+    ordering = serializers.ChoiceField(
+        choices=pagination.QuizCursorPagination.orderings, required=False
+    )
 
 
-class Quiz(serializers.ModelSerializer):
+class Quiz(UniqueConstraintMixin, TimedSerializerMixin, serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(
         read_only=True, default=serializers.CurrentUserDefault()
     )
@@ -37,12 +119,166 @@ class Quiz(serializers.ModelSerializer):
     class Meta:
         model = models.Quiz
         fields = ["id", "title", "user", "questions"]
-        validators = [
-            UniqueTogetherValidator(
-                queryset=models.Quiz.objects.all(), fields=["title", "user"]
-            )
-        ]
+        unique_constraint = "unique_title"
+
+    def save(self, **kwargs):
+        kwargs["user"] = self.fields["user"].get_default()
+        return super().save(**kwargs)
+
+
+class QuizSummary(TimedSerializerMixin, serializers.ModelSerializer):
+    """A quiz without its questions, for lists"""
+
+    class Meta:
+        model = models.Quiz
+        fields = ["id", "title", "user", "question_count", "answer_count"]
+
+
+class SearchResult(QuizSummary):
+    """A quiz matching a search, with its relevance (higher is better)"""
+
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(QuizSummary.Meta):
+        fields = QuizSummary.Meta.fields + ["rank"]
+
+
+def _find_duplicate_title(items):
+    seen = set()
+    for item in items:
+        if item["title"] in seen:
+            return item["title"]
+        seen.add(item["title"])
+    return None
+
+
+class NestedAnswer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = models.Answer
+        fields = ["title", "correct"]
+
+
+class NestedQuestion(TimedSerializerMixin, serializers.ModelSerializer):
+    answers = NestedAnswer(many=True, required=False)
+
+    class Meta:
+        model = models.Question
+        fields = ["title", "answers"]
+
+    def validate_answers(self, answers):
+        duplicate = _find_duplicate_title(answers)
+        if duplicate is not None:
+            raise serializers.ValidationError(f"Duplicate answer title: {duplicate}")
+        return answers
+
+
+class NestedQuiz(TimedSerializerMixin, serializers.ModelSerializer):
+    """Write-only serializer creating a quiz with all its questions and answers.
+
+    Title uniqueness inside the tree is checked in memory and the rows are written
+    with one bulk insert per level, all inside a single transaction.
+    """
+
+    user = serializers.PrimaryKeyRelatedField(
+        read_only=True, default=serializers.CurrentUserDefault()
+    )
+    questions = NestedQuestion(many=True, required=False)
+
+    class Meta:
+        model = models.Quiz
+        fields = ["title", "user", "questions"]
+
+    def validate_questions(self, questions):
+        duplicate = _find_duplicate_title(questions)
+        if duplicate is not None:
+            raise serializers.ValidationError(f"Duplicate question title: {duplicate}")
+        return questions
 
     def save(self, **kwargs):
         kwargs["user"] = self.fields["user"].get_default()
         return super().save(**kwargs)
+
+    @transaction.atomic
+    def create(self, validated_data):
+        questions = validated_data.pop("questions", [])
+        try:
+            with transaction.atomic():
+                quiz = models.Quiz.objects.create(
+                    **validated_data,
+                    question_count=len(questions),
+                    answer_count=sum(len(q.get("answers", [])) for q in questions),
+                )
+        except IntegrityError as error:
+            constraint = _unique_constraint(models.Quiz, "unique_title")
+            if not _violates(error, models.Quiz, constraint):
+                raise
+            raise _unique_error(constraint.fields)
+
+        models.Question.objects.bulk_create(
+            models.Question(title=question["title"], quiz=quiz)
+            for question in questions
+        )
+        # not every backend returns primary keys from a bulk insert, titles are
+        # unique within the quiz so one query maps them back to ids
+        question_ids = dict(quiz.question_set.values_list("title", "id"))
+        models.Answer.objects.bulk_create(
+            models.Answer(question_id=question_ids[question["title"]], **answer)
+            for question in questions
+            for answer in question.get("answers", [])
+        )
+        return quiz
+
+
+class Attempt(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = models.Attempt
+        fields = ["id", "quiz", "user", "started_at", "submitted_at", "score", "total"]
+        read_only_fields = fields
+
+
+class AttemptSubmission(serializers.Serializer):
+    answers = serializers.ListField(child=serializers.IntegerField(), max_length=10000)
+
+
+class LeaderboardEntry(TimedSerializerMixin, serializers.ModelSerializer):
+    rank = serializers.IntegerField(read_only=True)
+    score = serializers.IntegerField(source="best_score", read_only=True)
+
+    class Meta:
+        model = models.LeaderboardEntry
+        fields = ["rank", "user", "score", "achieved_at", "attempts"]
+        read_only_fields = fields
+
+
+class AnswerStats(TimedSerializerMixin, serializers.ModelSerializer):
+    selected = serializers.IntegerField(source="selected_count")
+
+    class Meta:
+        model = models.Answer
+        fields = ["id", "title", "correct", "selected"]
+
+
+class QuestionStats(TimedSerializerMixin, serializers.ModelSerializer):
+    answered = serializers.IntegerField(source="answered_count")
+    answers = AnswerStats(many=True, source="answer_set")
+
+    class Meta:
+        model = models.Question
+        fields = ["id", "title", "answered", "answers"]
+
+
+class QuizStats(TimedSerializerMixin, serializers.ModelSerializer):
+    submissions = serializers.IntegerField(source="submission_count")
+    questions = QuestionStats(many=True, source="question_set")
+
+    class Meta:
+        model = models.Quiz
+        fields = ["id", "title", "submissions", "questions"]
+
+
+class ImportJob(serializers.ModelSerializer):
+    """A queued import; `result` holds the counts, and `detail` on invalid data"""
+
+    class Meta:
+        model = Job
+        fields = ["id", "status", "result", "created_at", "finished_at"]
@@ -0,0 +1,24 @@
+"""Answer distribution counters of a quiz.
+
+Counters live on the Quiz, Question and Answer rows and are bumped with F()
+increments when an attempt is submitted, so reading the statistics of a quiz costs
+the same whatever the number of attempts.
+"""
+
+from django.db.models import F
+
+from .models import Quiz, Question, Answer
+
+
+def record_submission(quiz_id, answer_key, answer_ids):
+    """Count one submission of the quiz selecting `answer_ids`"""
+    Quiz.objects.filter(pk=quiz_id).update(submission_count=F("submission_count") + 1)
+    if not answer_ids:
+        return
+    question_ids = {answer_key.questions[answer_id] for answer_id in answer_ids}
+    Question.objects.filter(pk__in=question_ids).update(
+        answered_count=F("answered_count") + 1
+    )
+    Answer.objects.filter(pk__in=answer_ids).update(
+        selected_count=F("selected_count") + 1
+    )
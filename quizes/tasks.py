@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.dispatch import receiver
+
+from config import compression
+from jobs.registry import task
+
+from . import cache, deletion, search, transfer
+from .models import Quiz, quizes_changed
+
+
+# purges are write heavy, a couple at a time leave room for the API
+@task(concurrency=2)
+def purge_quiz(quiz_id):
+    deletion.purge(quiz_id)
+
+
+@task
+def index_quizes(quiz_ids):
+    # documents already at the quiz's version are skipped, so a burst of writes
+    # queueing a job each only rebuilds the tree once
+    search.refresh(Quiz.objects.filter(pk__in=quiz_ids))
+
+
+@receiver(quizes_changed)
+def index_changed_quizes(sender, quiz_ids, **kwargs):
+    # once committed, so that the job sees the rows it indexes
+    quiz_ids = sorted(quiz_ids)
+    transaction.on_commit(lambda: index_quizes.delay(quiz_ids=quiz_ids))
+
+
+@task
+def recompress_quiz_document(quiz_id, version):
+    """Recompress the cached document of a quiz at the stored levels"""
+    cached = cache.get_quiz_document(quiz_id)
+    if cached is None or cached[0] != version:
+        return
+    document = cached[2]
+    variants = compression.compress_all(document, compression.STORED_LEVELS)
+    # checked again right before writing: the quiz may have changed meanwhile,
+    # and an older document must never replace a newer one
+    current = cache.get_quiz_document(quiz_id)
+    if current is not None and current[0] == version:
+        cache.set_quiz_document(quiz_id, *current[:3], variants)
+
+
+@task
+def import_quizes(user_id, path, file_format):
+    """Import an upload stored by views.QuizImport, then delete it
+
+    Re-running a partial import skips what is already there, so retries are safe.
+    """
+    user = get_user_model().objects.get(pk=user_id)
+    _, _, parse = transfer.FORMATS[file_format]
+    importer = transfer.QuizImporter(user)
+    with default_storage.open(path, "rb") as upload:
+        try:
+            result = importer.run(parse(upload))
+        except ValueError as error:
+            # invalid data, retrying cannot help
+            importer.flush()
+            result = {"detail": str(error), **importer.counts}
+    default_storage.delete(path)
+    return result
@@ -0,0 +1,134 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from django.urls import reverse
+
+import pytest
+from rest_framework.authtoken.models import Token
+
+from quizes import async_views
+from quizes.models import Quiz
+from quizes.tests.test_views import create_quiz_tree
+
+User = get_user_model()
+
+
+def call(view, request, **kwargs):
+    return async_to_sync(view)(request, **kwargs)
+
+
+@pytest.mark.django_db
+class TestAsyncReadViews:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="aasdfew23")
+        self.token = Token.objects.get(user=self.user)
+        self.auth_header_str = f"Token {self.token.key}"
+        self.factory = RequestFactory()
+        self.quiz = create_quiz_tree(self.user, "quiz1", questions=2, answers=3)
+
+    def get(self, path="/", **extra):
+        return self.factory.get(path, HTTP_AUTHORIZATION=self.auth_header_str, **extra)
+
+    def test_requires_authentication(self):
+        response = call(async_views.quiz_list, self.factory.get("/"))
+        assert response.status_code == 401
+        assert response["WWW-Authenticate"] == "Token"
+
+        request = self.factory.get("/", HTTP_AUTHORIZATION="Token nope")
+        response = call(async_views.quiz_detail, request, pk=self.quiz.id)
+        assert response.status_code == 401
+
+    def test_quiz_list_matches_sync_view(self, client):
+        Quiz.objects.create(title="quiz2", user=self.user)
+        user2 = User.objects.create_user(email="foo@bar.com", password="sekoret321")
+        Quiz.objects.create(title="quiz3", user=user2)
+
+        url = reverse("quizes:quizes_list")
+        response = call(async_views.quiz_list, self.get(url))
+        expected = client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        assert response.status_code == 200
+        assert json.loads(response.content) == expected.json()
+        assert response["ETag"] == expected["ETag"]
+
+        response = call(
+            async_views.quiz_list, self.get(url, HTTP_IF_NONE_MATCH=expected["ETag"])
+        )
+        assert response.status_code == 304
+
+    def test_quiz_list_orders_and_filters_by_size(self, client):
+        Quiz.objects.create(title="quiz2", user=self.user)
+        create_quiz_tree(self.user, "quiz3", questions=1)
+        url = reverse("quizes:quizes_list")
+        params = {"ordering": "-question_count", "min_questions": 1}
+
+        response = call(async_views.quiz_list, self.get(url, data=params))
+        expected = client.get(url, params, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        assert json.loads(response.content) == expected.json()
+        titles = [quiz["title"] for quiz in expected.json()["results"]]
+        assert titles == ["quiz1", "quiz3"]
+
+        response = call(async_views.quiz_list, self.get(url, data={"ordering": "x"}))
+        assert response.status_code == 400
+
+    def test_quiz_detail_is_served_from_cache(self, django_assert_num_queries):
+        response = call(async_views.quiz_detail, self.get(), pk=self.quiz.id)
+        assert response.status_code == 200
+        document = json.loads(response.content)
+        assert document["title"] == "quiz1"
+        assert len(document["questions"]) == 2
+
+        with django_assert_num_queries(0):
+            cached = call(async_views.quiz_detail, self.get(), pk=self.quiz.id)
+        assert cached.content == response.content
+
+    def test_missing_quiz_is_404(self):
+        response = call(async_views.quiz_detail, self.get(), pk=self.quiz.id + 100)
+        assert response.status_code == 404
+
+    def test_question_sample_matches_sync_view(self, client):
+        url = reverse("quizes:questions", args=[self.quiz.id])
+        query = {"sample": 2, "seed": "abc", "shuffle_answers": "1"}
+        response = call(
+            async_views.questions, self.get(url, data=query), pk=self.quiz.id
+        )
+        expected = client.get(url, query, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        assert response.status_code == 200
+        assert json.loads(response.content) == expected.json()
+
+        response = call(
+            async_views.questions, self.get(url, data={"sample": 0}), pk=self.quiz.id
+        )
+        assert response.status_code == 400
+
+    def test_questions_and_answers_are_paginated(self):
+        response = call(async_views.questions, self.get(), pk=self.quiz.id)
+        assert response.status_code == 200
+        results = json.loads(response.content)["results"]
+        assert [question["title"] for question in results] == [
+            "question 0",
+            "question 1",
+        ]
+
+        question_id = results[0]["id"]
+        response = call(
+            async_views.answers, self.get(), pk=self.quiz.id, question_pk=question_id
+        )
+        assert response.status_code == 200
+        assert len(json.loads(response.content)["results"]) == 3
+
+    def test_writes_are_delegated_to_the_sync_views(self):
+        request = self.factory.post(
+            "/",
+            {"title": "new quiz"},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+        response = call(async_views.quiz_list, request)
+
+        assert response.status_code == 201
+        assert Quiz.objects.filter(title="new quiz", user=self.user).exists()
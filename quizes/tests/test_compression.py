@@ -0,0 +1,186 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.core.cache import caches
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+import pytest
+from rest_framework.authtoken.models import Token
+
+from config import compression
+from jobs.models import Job
+from jobs.worker import Worker
+from quizes import tasks
+from quizes.models import Quiz
+from quizes.tests.test_timing import concurrent_requests
+from quizes.tests.test_views import create_quiz_tree
+
+User = get_user_model()
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        ("gzip", "gzip"),
+        ("gzip, deflate", "gzip"),
+        ("GZIP;q=0.5", "gzip"),
+        ("*", "gzip"),
+        ("deflate", None),
+        ("gzip;q=0", None),
+        ("*, gzip;q=0", None),
+        ("gzip;q=nope", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_negotiate(header, expected, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert compression.negotiate(header) == expected
+
+
+def test_compress_all_skips_small_or_incompressible_data(settings):
+    settings.COMPRESSION_MIN_SIZE = 100
+    assert compression.compress_all(b"{}" * 49) == {}
+    assert compression.compress_all(os.urandom(1000)) == {}
+    assert set(compression.compress_all(b"{}" * 50)) == set(compression.available())
+
+
+def test_negotiate_prefers_brotli_unless_weighted_lower(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert compression.negotiate("gzip, deflate, br") == "br"
+    assert compression.negotiate("gzip, br;q=0.8") == "gzip"
+    assert compression.negotiate("br;q=0") is None
+
+
+@pytest.mark.django_db
+class TestCompression:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="aasdfew23")
+        self.token = Token.objects.get(user=self.user)
+        self.auth_header_str = f"Token {self.token.key}"
+        self.quiz = create_quiz_tree(self.user, "quiz1")
+        self.url = reverse("quizes:quiz_detail", args=[self.quiz.id])
+
+    def get(self, client, url, **headers):
+        return client.get(url, HTTP_AUTHORIZATION=self.auth_header_str, **headers)
+
+    def test_cached_quiz_document_is_served_precompressed(
+        self, client, monkeypatch, django_assert_num_queries
+    ):
+        plain = self.get(client, self.url)
+        assert "Content-Encoding" not in plain
+        assert "Accept-Encoding" in plain["Vary"]
+
+        def fail(*args, **kwargs):
+            raise AssertionError("compressed again")
+
+        monkeypatch.setattr(compression, "compress", fail)
+        with django_assert_num_queries(0):
+            response = self.get(client, self.url, HTTP_ACCEPT_ENCODING="gzip")
+
+        assert response["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response["Vary"]
+        assert int(response["Content-Length"]) == len(response.content)
+        assert len(response.content) < len(plain.content)
+        assert gzip.decompress(response.content) == plain.content
+        assert response["ETag"] == f"W/{plain['ETag']}"
+
+    def test_compressed_ETag_still_validates(self, client):
+        response = self.get(client, self.url, HTTP_ACCEPT_ENCODING="gzip")
+        response = self.get(
+            client,
+            self.url,
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        assert response.status_code == 304
+        assert response["ETag"].startswith("W/")
+
+    def test_variants_are_rebuilt_when_the_quiz_changes(self, client):
+        self.get(client, self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.quiz.title = "renamed"
+        self.quiz.save()
+
+        response = self.get(client, self.url, HTTP_ACCEPT_ENCODING="gzip")
+        assert b'"renamed"' in gzip.decompress(response.content)
+
+    def test_other_JSON_responses_are_compressed_on_the_fly(self, client):
+        url = reverse("quizes:quizes_list")
+        plain = self.get(client, url)
+        response = self.get(client, url, HTTP_ACCEPT_ENCODING="gzip")
+
+        assert response["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.content) == plain.content
+        assert response["ETag"] == f"W/{plain['ETag']}"
+
+    def test_small_responses_are_left_alone(self, client, settings):
+        settings.COMPRESSION_MIN_SIZE = 10**6
+        response = self.get(
+            client, reverse("quizes:quizes_list"), HTTP_ACCEPT_ENCODING="gzip"
+        )
+        assert "Content-Encoding" not in response
+
+    def test_small_quiz_documents_are_served_uncompressed(self, client, settings):
+        settings.COMPRESSION_MIN_SIZE = 10**6
+        self.get(client, self.url)
+        response = self.get(client, self.url, HTTP_ACCEPT_ENCODING="gzip")
+
+        assert "Content-Encoding" not in response
+        assert not response["ETag"].startswith("W/")
+        assert not Job.objects.exists()
+
+    def test_cache_misses_store_every_available_encoding(self, client):
+        self.get(client, self.url)
+        key = f"quiz-document:v2:{self.quiz.id}"
+        *_, document, variants = caches[settings.QUIZ_CACHE].get(key)
+        assert set(variants) == set(compression.available())
+        assert gzip.decompress(variants["gzip"]) == document
+
+    def cached_gzip(self):
+        key = f"quiz-document:v2:{self.quiz.id}"
+        *_, document, variants = caches[settings.QUIZ_CACHE].get(key)
+        return document, variants["gzip"]
+
+    def test_misses_compress_fast_and_a_job_compresses_harder(self, client):
+        self.get(client, self.url)
+        document, variant = self.cached_gzip()
+        assert variant == compression.compress(document, "gzip", compression.LEVELS)
+        version = Quiz.objects.get(pk=self.quiz.id).version
+        job = Job.objects.get()
+        assert job.kwargs == {"quiz_id": self.quiz.id, "version": version}
+
+        Worker().work(burst=True)
+
+        stored = compression.compress(document, "gzip", compression.STORED_LEVELS)
+        assert self.cached_gzip() == (document, stored)
+        response = self.get(client, self.url, HTTP_ACCEPT_ENCODING="gzip")
+        assert response.content == stored
+
+    def test_recompressing_skips_documents_that_changed(self, client):
+        self.get(client, self.url)
+        old_version = Quiz.objects.get(pk=self.quiz.id).version
+        self.quiz.title = "renamed"
+        self.quiz.save()
+        self.get(client, self.url)
+        fast = self.cached_gzip()
+
+        tasks.recompress_quiz_document(quiz_id=self.quiz.id, version=old_version)
+        assert self.cached_gzip() == fast
+
+
+@pytest.mark.urls("quizes.tests.test_timing")
+def test_does_not_serialize_ASGI_requests(settings):
+    settings.MIDDLEWARE = ["config.compression.CompressionMiddleware"]
+
+    elapsed, responses = concurrent_requests(accept_encoding="gzip")
+    assert elapsed < 0.6
+    assert all(response["Content-Encoding"] == "gzip" for response in responses)
+
+
+@pytest.mark.django_db
+@pytest.mark.urls("quizes.tests.test_timing")
+def test_configured_middleware_does_not_serialize_ASGI_requests():
+    elapsed, _ = concurrent_requests()
+    assert elapsed < 0.6
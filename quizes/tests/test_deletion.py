@@ -0,0 +1,165 @@
+import io
+import json
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+from rest_framework.authtoken.models import Token
+
+from jobs.models import Job
+from jobs.worker import Worker
+from quizes import async_views, deletion, search
+from quizes.models import (
+    Answer,
+    Attempt,
+    AttemptAnswer,
+    LeaderboardEntry,
+    Question,
+    Quiz,
+    ScoreBucket,
+    SearchDocument,
+)
+from quizes.tests.test_views import create_quiz_tree
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestQuizDeletion:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="aasdfew23")
+        self.token = Token.objects.get(user=self.user)
+        self.auth_header_str = f"Token {self.token.key}"
+        self.quiz = self.create_quiz("doomed")
+        self.other = self.create_quiz("kept")
+        self.url = reverse("quizes:quiz_detail", args=[self.quiz.id])
+
+    def create_quiz(self, title):
+        quiz = create_quiz_tree(self.user, title, questions=5, answers=3)
+        attempt = Attempt.objects.create(quiz=quiz, user=self.user)
+        answer = Answer.objects.filter(question__quiz=quiz).first()
+        AttemptAnswer.objects.create(
+            attempt=attempt, question=answer.question, answer=answer
+        )
+        LeaderboardEntry.objects.create(
+            quiz=quiz, user=self.user, best_score=1, achieved_at=timezone.now()
+        )
+        ScoreBucket.objects.create(quiz=quiz, score=1, users=1)
+        search.refresh(Quiz.objects.filter(pk=quiz.pk))
+        return quiz
+
+    def remaining(self, quiz):
+        return [
+            Quiz.all_objects.filter(pk=quiz.pk).count(),
+            Question.objects.filter(quiz=quiz).count(),
+            Answer.objects.filter(question__quiz=quiz).count(),
+            Attempt.objects.filter(quiz=quiz).count(),
+            AttemptAnswer.objects.filter(attempt__quiz=quiz).count(),
+            LeaderboardEntry.objects.filter(quiz=quiz).count(),
+            ScoreBucket.objects.filter(quiz=quiz).count(),
+            SearchDocument.objects.filter(quiz=quiz).count(),
+        ]
+
+    def test_purge_deletes_the_whole_tree_in_chunks(
+        self, django_assert_max_num_queries
+    ):
+        # two questions per chunk: three question chunks and an empty one, each
+        # SELECT, DELETEs and savepoints, then a chunk or two for the rest
+        with django_assert_max_num_queries(60):
+            deletion.purge(self.quiz.id, chunk_size=2)
+
+        assert self.remaining(self.quiz) == [0] * 8
+        assert self.remaining(self.other) == [1, 5, 15, 1, 1, 1, 1, 1]
+
+    def test_purge_covers_every_relation_of_a_quiz(self):
+        purged = {
+            Question,
+            Answer,
+            Attempt,
+            AttemptAnswer,
+            LeaderboardEntry,
+            ScoreBucket,
+            SearchDocument,
+        }
+        related = {
+            relation.related_model
+            for model in (Quiz, Question, Answer, Attempt)
+            for relation in model._meta.related_objects
+        }
+        assert related <= purged
+
+    def test_DELETE_purges_right_away(self, client):
+        response = client.delete(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        assert response.status_code == 204
+        assert self.remaining(self.quiz) == [0] * 8
+        response = client.delete(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        assert response.status_code == 404
+
+    def test_DELETE_with_respond_async_hides_the_quiz_and_purges_later(self, client):
+        response = client.delete(
+            self.url,
+            HTTP_AUTHORIZATION=self.auth_header_str,
+            HTTP_PREFER="respond-async",
+        )
+
+        assert response.status_code == 202
+        assert response["Preference-Applied"] == "respond-async"
+        assert self.remaining(self.quiz)[:2] == [1, 5]
+        assert (
+            client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str).status_code
+            == 404
+        )
+        listed = client.get(
+            reverse("quizes:quizes_list"), HTTP_AUTHORIZATION=self.auth_header_str
+        )
+        assert [quiz["title"] for quiz in listed.data["results"]] == ["kept"]
+        # the title is free again while the old tree is still being purged
+        Quiz.objects.create(title="doomed", user=self.user)
+
+        job = Job.objects.get()
+        assert (job.name, job.kwargs) == (
+            "quizes.tasks.purge_quiz",
+            {"quiz_id": self.quiz.id},
+        )
+        Worker().work(burst=True)
+        assert self.remaining(self.quiz) == [0] * 8
+        assert Quiz.objects.filter(title="doomed").count() == 1
+        assert Job.objects.get().status == Job.DONE
+
+    def test_questions_and_answers_of_a_hidden_quiz_are_not_served(self, client):
+        question = Question.objects.filter(quiz=self.quiz).first()
+        questions_url = reverse("quizes:questions", args=[self.quiz.id])
+        answers_url = reverse("quizes:answers", args=[self.quiz.id, question.id])
+        sample = {"sample": 5, "seed": "a"}
+        assert len(self.get(client, questions_url, sample)["results"]) == 5
+
+        deletion.mark_deleted(self.quiz.id)
+
+        assert self.get(client, questions_url, sample)["results"] == []
+        assert self.get(client, questions_url)["results"] == []
+        assert self.get(client, answers_url)["results"] == []
+        views = [
+            (async_views.questions, {"sample": 5}, {}),
+            (async_views.questions, {}, {}),
+            (async_views.answers, {}, {"question_pk": question.id}),
+        ]
+        factory = RequestFactory()
+        for view, params, kwargs in views:
+            request = factory.get("/", params, HTTP_AUTHORIZATION=self.auth_header_str)
+            response = async_to_sync(view)(request, pk=self.quiz.id, **kwargs)
+            assert json.loads(response.content)["results"] == []
+
+    def get(self, client, url, params=None):
+        return client.get(url, params, HTTP_AUTHORIZATION=self.auth_header_str).json()
+
+    def test_purge_deleted_quizes_finishes_interrupted_purges(self):
+        deletion.mark_deleted(self.quiz.id)
+
+        call_command("purge_deleted_quizes", stdout=io.StringIO())
+        assert self.remaining(self.quiz) == [0] * 8
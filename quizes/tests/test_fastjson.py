@@ -0,0 +1,85 @@
+import datetime
+import decimal
+import io
+import uuid
+
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from config import fastjson
+from config.fastjson import FastJSONParser, FastJSONRenderer
+
+VALUES = {
+    "unicode": "Quiz über ✓",
+    "separators": "line paragraph ",
+    "aware": datetime.datetime(2021, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    "naive": datetime.datetime(2021, 5, 1, 12, 30),
+    "date": datetime.date(2021, 5, 1),
+    "time": datetime.time(8, 15),
+    "decimal": decimal.Decimal("1.50"),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "lazy": gettext_lazy("This field is required."),
+    "int keys": {1: "one", 2: "two"},
+    "big": 2**70,
+    "nested": ReturnDict(
+        {
+            "questions": ReturnList(
+                [{"id": 1, "correct": True, "x": None}], serializer=None
+            )
+        },
+        serializer=None,
+    ),
+    "tuple": (1, 2.5, "three"),
+}
+
+
+def parse(parser, body, encoding="utf-8"):
+    return parser.parse(io.BytesIO(body), parser_context={"encoding": encoding})
+
+
+class TestFastJSONRenderer:
+    @pytest.mark.parametrize("key", VALUES)
+    def test_output_matches_the_stock_renderer(self, key):
+        data = {key: VALUES[key]}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indented_output_matches_the_stock_renderer(self):
+        context = {"indent": 4}
+        expected = JSONRenderer().render(VALUES, renderer_context=context)
+        assert FastJSONRenderer().render(VALUES, renderer_context=context) == expected
+
+    def test_none_renders_nothing(self):
+        assert FastJSONRenderer().render(None) == b""
+
+    def test_falls_back_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(fastjson, "orjson", None)
+        assert FastJSONRenderer().render(VALUES) == JSONRenderer().render(VALUES)
+
+
+class TestFastJSONParser:
+    @pytest.mark.parametrize(
+        "body",
+        [
+            b'{"title": "quiz", "answers": [1, 2, 3], "correct": true}',
+            '{"title": "Quiz über ✓"}'.encode(),
+            b'{"big": 123456789012345678901234567890}',
+            b"[]",
+        ],
+    )
+    def test_output_matches_the_stock_parser(self, body):
+        assert parse(FastJSONParser(), body) == parse(JSONParser(), body)
+
+    @pytest.mark.parametrize("body", [b'{"title": ', b'{"x": NaN}', b"\xff"])
+    def test_invalid_documents_raise_parse_errors(self, body):
+        with pytest.raises(ParseError):
+            parse(FastJSONParser(), body)
+
+    def test_other_encodings_use_the_stock_parser(self):
+        body = '{"title": "Quiz über"}'.encode("latin-1")
+        assert parse(FastJSONParser(), body, "latin-1") == {"title": "Quiz über"}
@@ -0,0 +1,100 @@
+import pytest
+from django.contrib.auth import get_user_model
+
+from quizes import cache, grading, sampling
+from quizes.models import Quiz, Question, Answer, Attempt, AttemptAnswer, quiz_version
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestAnswerKey:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="sekrit12")
+        self.quiz = Quiz.objects.create(title="quiz", user=self.user)
+        self.q1 = Question.objects.create(title="q1", quiz=self.quiz)
+        self.q1_yes = Answer.objects.create(title="yes", correct=True, question=self.q1)
+        self.q1_no = Answer.objects.create(title="no", question=self.q1)
+        self.q2 = Question.objects.create(title="q2", quiz=self.quiz)
+        self.q2_a = Answer.objects.create(title="a", correct=True, question=self.q2)
+        self.q2_b = Answer.objects.create(title="b", correct=True, question=self.q2)
+
+    def test_build_collects_correct_answers_per_question(self):
+        answer_key = grading.AnswerKey.build(self.quiz.id)
+
+        assert answer_key.total == 2
+        assert answer_key.correct[self.q1.id] == {self.q1_yes.id}
+        assert answer_key.correct[self.q2.id] == {self.q2_a.id, self.q2_b.id}
+
+    def test_question_counts_only_when_selection_matches_exactly(self):
+        answer_key = grading.AnswerKey.build(self.quiz.id)
+
+        assert answer_key.grade([self.q1_yes.id, self.q2_a.id, self.q2_b.id]) == 2
+        assert answer_key.grade([self.q1_yes.id, self.q2_a.id]) == 1
+        assert answer_key.grade([self.q1_yes.id, self.q1_no.id]) == 0
+        assert answer_key.grade([]) == 0
+
+    def test_answers_from_other_quizes_are_rejected(self):
+        other_quiz = Quiz.objects.create(title="other", user=self.user)
+        question = Question.objects.create(title="q", quiz=other_quiz)
+        answer = Answer.objects.create(title="a", question=question)
+
+        with pytest.raises(ValueError):
+            grading.AnswerKey.build(self.quiz.id).grade([answer.id])
+
+    def test_answer_key_is_cached_until_the_quiz_changes(
+        self, django_assert_num_queries
+    ):
+        grading.get_answer_key(self.quiz.id)
+        with django_assert_num_queries(0):
+            grading.get_answer_key(self.quiz.id)
+
+        self.q1_no.correct = True
+        self.q1_no.save()
+        answer_key = grading.get_answer_key(self.quiz.id)
+        assert answer_key.correct[self.q1.id] == {self.q1_yes.id, self.q1_no.id}
+
+    def test_answer_key_built_before_a_write_is_not_cached(self):
+        version = quiz_version(self.quiz.id)
+        answer_key = grading.AnswerKey.build(self.quiz.id)
+        self.q1_no.delete()
+        cache.set_answer_key(self.quiz.id, version, answer_key)
+
+        assert cache.get_answer_key(self.quiz.id) is None
+        assert self.q1_no.id not in grading.get_answer_key(self.quiz.id).questions
+
+    def test_question_ids_read_before_a_write_are_not_cached(self):
+        version = quiz_version(self.quiz.id)
+        Question.objects.create(title="q3", quiz=self.quiz)
+        cache.set_question_ids(self.quiz.id, version, [self.q1.id, self.q2.id])
+
+        assert cache.get_question_ids(self.quiz.id) is None
+        assert len(sampling.question_ids(self.quiz.id)) == 3
+
+    def test_submit_records_score_and_selected_answers(self):
+        attempt = Attempt.objects.create(quiz=self.quiz, user=self.user)
+        grading.submit_attempt(attempt, [self.q1_yes.id, self.q2_a.id])
+
+        attempt.refresh_from_db()
+        assert (attempt.score, attempt.total) == (1, 2)
+        assert attempt.submitted_at is not None
+        assert AttemptAnswer.objects.filter(attempt=attempt).count() == 2
+
+    def test_attempt_can_only_be_submitted_once(self):
+        attempt = Attempt.objects.create(quiz=self.quiz, user=self.user)
+        grading.submit_attempt(attempt, [self.q1_yes.id])
+
+        with pytest.raises(grading.AlreadySubmitted):
+            grading.submit_attempt(attempt, [self.q1_yes.id])
+
+    def test_submit_increments_answer_distribution_counters(self):
+        for selection in [[self.q1_yes.id], [self.q1_no.id, self.q2_a.id], []]:
+            attempt = Attempt.objects.create(quiz=self.quiz, user=self.user)
+            grading.submit_attempt(attempt, selection)
+
+        self.quiz.refresh_from_db()
+        assert self.quiz.submission_count == 3
+        assert Question.objects.get(pk=self.q1.pk).answered_count == 2
+        assert Question.objects.get(pk=self.q2.pk).answered_count == 1
+        assert Answer.objects.get(pk=self.q1_yes.pk).selected_count == 1
+        assert Answer.objects.get(pk=self.q2_b.pk).selected_count == 0
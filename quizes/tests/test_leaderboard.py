@@ -0,0 +1,64 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from quizes import leaderboard
+from quizes.models import Quiz, Attempt, LeaderboardEntry, ScoreBucket
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestLeaderboard:
+    def setup_method(self):
+        self.owner = User.objects.create_user(email="a@b.com", password="sekrit12")
+        self.quiz = Quiz.objects.create(title="quiz", user=self.owner)
+        self.users = [
+            User.objects.create_user(email=f"{i}@b.com", password="sekrit12")
+            for i in range(4)
+        ]
+
+    def record(self, user, score):
+        attempt = Attempt.objects.create(
+            quiz=self.quiz,
+            user=user,
+            submitted_at=timezone.now(),
+            score=score,
+            total=10,
+        )
+        leaderboard.record_attempt(attempt)
+
+    def test_only_the_best_score_is_kept(self):
+        self.record(self.users[0], 5)
+        self.record(self.users[0], 8)
+        self.record(self.users[0], 3)
+
+        entry = LeaderboardEntry.objects.get(quiz=self.quiz, user=self.users[0])
+        assert (entry.best_score, entry.attempts) == (8, 3)
+        buckets = dict(
+            ScoreBucket.objects.filter(quiz=self.quiz).values_list("score", "users")
+        )
+        assert buckets == {5: 0, 8: 1}
+
+    def test_top_is_ordered_by_score_with_shared_ranks(self):
+        for user, score in zip(self.users, [4, 9, 9, 2]):
+            self.record(user, score)
+
+        entries = leaderboard.top(self.quiz.id, 3)
+
+        assert [(e.user_id, e.rank) for e in entries] == [
+            (self.users[1].id, 1),
+            (self.users[2].id, 1),
+            (self.users[0].id, 3),
+        ]
+
+    def test_rank_of_counts_users_with_higher_scores(self, django_assert_num_queries):
+        for user, score in zip(self.users, [4, 9, 9, 2]):
+            self.record(user, score)
+
+        with django_assert_num_queries(2):
+            entry = leaderboard.rank_of(self.quiz.id, self.users[3].id)
+
+        assert entry.rank == 4
+        assert leaderboard.rank_of(self.quiz.id, self.users[0].id).rank == 3
+        assert leaderboard.rank_of(self.quiz.id, self.owner.id) is None
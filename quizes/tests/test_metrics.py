@@ -0,0 +1,109 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+import pytest
+from rest_framework.authtoken.models import Token
+
+from config import metrics
+from quizes.tests.test_timing import concurrent_requests
+from quizes.tests.test_views import create_quiz_tree
+
+User = get_user_model()
+
+DETAIL = 'route="quizes:quiz_detail",method="GET",status="200"'
+
+
+@pytest.mark.django_db
+class TestMetrics:
+    def setup_method(self):
+        metrics.registry.reset()
+        self.user = User.objects.create_user(email="a@b.com", password="aasdfew23")
+        self.token = Token.objects.get(user=self.user)
+        self.auth_header_str = f"Token {self.token.key}"
+        self.quiz = create_quiz_tree(self.user, "quiz1")
+
+    def scrape(self, client):
+        response = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer sekrit")
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        return response.content.decode().splitlines()
+
+    def test_endpoint_is_protected(self, client, settings):
+        settings.METRICS_TOKEN = ""
+        assert client.get(reverse("metrics")).status_code == 404
+
+        settings.METRICS_TOKEN = "sekrit"
+        assert client.get(reverse("metrics")).status_code == 401
+        response = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer nope")
+        assert response.status_code == 401
+
+    def test_requests_are_counted_by_route_and_status(self, client, settings):
+        settings.METRICS_TOKEN = "sekrit"
+        url = reverse("quizes:quiz_detail", args=[self.quiz.id])
+        for _ in range(3):
+            client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+        client.get(url)
+
+        lines = self.scrape(client)
+        assert f"http_requests_total{{{DETAIL}}} 3" in lines
+        assert (
+            'http_requests_total{route="quizes:quiz_detail",method="GET",'
+            'status="401"} 1' in lines
+        )
+        assert f'http_request_duration_seconds_bucket{{{DETAIL},le="+Inf"}} 3' in lines
+        assert f"http_request_duration_seconds_count{{{DETAIL}}} 3" in lines
+        assert "# TYPE http_request_duration_seconds histogram" in lines
+
+    def test_histogram_buckets_are_cumulative(self, settings):
+        settings.METRICS_BUCKETS = (0.1, 1.0)
+        labels = (("route", "x"),)
+        for seconds in (0.05, 0.5, 0.7, 3):
+            metrics.registry.observe(metrics.DURATION, labels, seconds)
+
+        lines = metrics.exposition([metrics.registry.snapshot()]).splitlines()
+        name = "http_request_duration_seconds"
+        assert f'{name}_bucket{{route="x",le="0.1"}} 1' in lines
+        assert f'{name}_bucket{{route="x",le="1.0"}} 3' in lines
+        assert f'{name}_bucket{{route="x",le="+Inf"}} 4' in lines
+        assert f'{name}_sum{{route="x"}} 4.25' in lines
+
+    def test_multiprocess_mode_adds_up_every_worker(self, client, settings, tmp_path):
+        settings.METRICS_TOKEN = "sekrit"
+        settings.METRICS_MULTIPROC_DIR = str(tmp_path)
+        labels = [["route", "quizes:quiz_detail"], ["method", "GET"], ["status", "200"]]
+        other_worker = {
+            "counters": [["http_requests_total", labels, 5]],
+            "histograms": [
+                ["http_request_duration_seconds", labels, [5] + [0] * 11 + [0.01]]
+            ],
+        }
+        (tmp_path / "99999.json").write_text(json.dumps(other_worker))
+
+        url = reverse("quizes:quiz_detail", args=[self.quiz.id])
+        client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        lines = self.scrape(client)
+        assert f"http_requests_total{{{DETAIL}}} 6" in lines
+        assert f"http_request_duration_seconds_count{{{DETAIL}}} 6" in lines
+
+        # this worker saved its own values next to the other one
+        assert len(list(tmp_path.glob("*.json"))) == 2
+
+    def test_forked_worker_starts_from_zero(self):
+        metrics.registry.inc(metrics.REQUESTS, (("route", "x"),))
+        metrics.registry._pid = -1  # as seen from a child process
+
+        assert metrics.registry.snapshot()["counters"] == []
+
+
+@pytest.mark.urls("quizes.tests.test_timing")
+def test_does_not_serialize_ASGI_requests(settings):
+    settings.MIDDLEWARE = ["config.metrics.MetricsMiddleware"]
+    metrics.registry.reset()
+
+    elapsed, _ = concurrent_requests()
+    assert elapsed < 0.6
+    snapshot = metrics.registry.snapshot()
+    assert [value for name, _, value in snapshot["counters"]] == [5]
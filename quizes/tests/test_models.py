@@ -75,3 +75,145 @@ class TestAnswer:
 
     def test_str_returns_answer_title(self):
         assert str(self.answer) == "test answer"
+
+
+@pytest.mark.django_db
+class TestQuizVersion:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="sekrit12")
+        self.quiz = Quiz.objects.create(title="New quiz", user=self.user)
+
+    def version(self):
+        return Quiz.objects.values_list("version", flat=True).get(pk=self.quiz.pk)
+
+    def test_new_quiz_starts_at_version_1(self):
+        assert self.version() == 1
+
+    def test_saving_the_quiz_bumps_its_version(self):
+        self.quiz.title = "Renamed quiz"
+        self.quiz.save()
+        assert self.version() == 2
+
+    def test_question_and_answer_changes_bump_the_version(self):
+        question = Question.objects.create(title="question", quiz=self.quiz)
+        answer = Answer.objects.create(title="answer", question=question)
+        answer.delete()
+        Answer.objects.create(title="answer", question=question)
+        Answer.objects.filter(question=question).delete()
+        question.delete()
+
+        assert self.version() == 7
+
+    def test_saving_a_stale_instance_still_bumps_the_version(self):
+        Question.objects.create(title="question", quiz=self.quiz)
+        assert self.quiz.version == 1
+
+        self.quiz.title = "Renamed quiz"
+        self.quiz.save()
+
+        assert self.version() == 3
+        assert self.quiz.version == 3
+
+    def test_deleting_a_quiz_does_NOT_bump_it_per_question(
+        self, django_assert_max_num_queries
+    ):
+        for i in range(20):
+            Question.objects.create(title=f"question {i}", quiz=self.quiz)
+
+        with django_assert_max_num_queries(12):
+            self.quiz.delete()
+
+
+@pytest.mark.django_db
+class TestQuizCounts:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="sekrit12")
+        self.quiz = Quiz.objects.create(title="New quiz", user=self.user)
+
+    def counts(self):
+        return Quiz.objects.values_list("question_count", "answer_count").get(
+            pk=self.quiz.pk
+        )
+
+    def add_question(self, title, answers=2):
+        question = Question.objects.create(title=title, quiz=self.quiz)
+        for i in range(answers):
+            Answer.objects.create(title=f"answer {i}", question=question)
+        return question
+
+    def test_creates_and_deletes_keep_counts_in_step(self):
+        question = self.add_question("question 1", answers=3)
+        self.add_question("question 2")
+        assert self.counts() == (2, 5)
+
+        question.answer_set.first().delete()
+        assert self.counts() == (2, 4)
+
+        Answer.objects.filter(question=question).delete()
+        assert self.counts() == (2, 2)
+
+        Question.objects.get(title="question 2").delete()
+        assert self.counts() == (1, 0)
+
+    def test_deleting_a_question_removes_its_answers_from_the_count(self):
+        question = self.add_question("question 1", answers=4)
+        self.add_question("question 2", answers=1)
+        question.delete()
+        assert self.counts() == (1, 1)
+
+    def test_bulk_paths_set_the_counts(self):
+        from quizes import transfer
+        from quizes.serializers import NestedQuiz
+
+        serializer = NestedQuiz(
+            data={
+                "title": "bulk",
+                "questions": [
+                    {"title": "q1", "answers": [{"title": "a"}, {"title": "b"}]},
+                    {"title": "q2", "answers": [{"title": "a"}]},
+                ],
+            },
+            context={"request": type("Request", (), {"user": self.user})},
+        )
+        serializer.is_valid(raise_exception=True)
+        quiz = serializer.save()
+        assert (quiz.question_count, quiz.answer_count) == (2, 3)
+
+        # re-importing existing questions must not count them twice
+        records = [
+            ("New quiz", "q1", [{"title": "a", "correct": True}]),
+            ("New quiz", "q1", [{"title": "a", "correct": True}]),
+            ("New quiz", "q2", []),
+        ]
+        transfer.QuizImporter(self.user).run(records)
+        transfer.QuizImporter(self.user).run(records)
+        assert self.counts() == (2, 1)
+
+    def test_saving_a_stale_instance_keeps_the_counters(self):
+        self.add_question("question 1", answers=3)
+        Quiz.objects.update(submission_count=4)
+
+        self.quiz.title = "Renamed quiz"
+        self.quiz.save()
+
+        assert self.counts() == (1, 3)
+        assert Quiz.objects.get(pk=self.quiz.pk).submission_count == 4
+
+    def test_repair_command_fixes_drifted_counts(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        self.add_question("question 1", answers=3)
+        Quiz.objects.filter(pk=self.quiz.pk).update(question_count=7, answer_count=0)
+        other = Quiz.objects.create(title="Other quiz", user=self.user)
+
+        out = StringIO()
+        call_command("repair_quiz_counts", dry_run=True, stdout=out)
+        assert "1 quizes have wrong counts" in out.getvalue()
+        assert self.counts() == (7, 0)
+
+        call_command("repair_quiz_counts", stdout=out)
+        assert "Repaired 1 quizes" in out.getvalue()
+        assert self.counts() == (1, 3)
+        assert Quiz.objects.get(pk=other.pk).question_count == 0
@@ -0,0 +1,170 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+
+import pytest
+from rest_framework.authtoken.models import Token
+
+from jobs.models import Job
+from jobs.worker import Worker
+from quizes import search, transfer
+from quizes.models import Quiz, Question, Answer
+
+User = get_user_model()
+
+
+# writes queue their reindexing for after the commit
+@pytest.mark.django_db(transaction=True)
+class TestQuizSearch:
+    def setup_class(self):
+        self.url = reverse("quizes:search")
+
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="aasdfew23")
+        self.token = Token.objects.get(user=self.user)
+        self.auth_header_str = f"Token {self.token.key}"
+
+    def search(self, client, query, index=True, **params):
+        if index:
+            Worker().work(burst=True)
+        return client.get(
+            self.url, {"q": query, **params}, HTTP_AUTHORIZATION=self.auth_header_str
+        )
+
+    def titles(self, client, query):
+        response = self.search(client, query)
+        assert response.status_code == 200
+        return [quiz["title"] for quiz in response.data["results"]]
+
+    def test_requires_a_query(self, client):
+        assert self.search(client, "").status_code == 400
+        assert self.search(client, " -*").status_code == 400
+        assert client.get(self.url).status_code == 401
+
+    def test_finds_changes_saved_through_a_stale_instance(self, client):
+        quiz = Quiz.objects.create(title="Rivers", user=self.user)
+        Question.objects.create(title="Longest delta?", quiz=quiz)
+        assert self.titles(client, "delta") == ["Rivers"]
+        Question.objects.create(title="Widest estuary?", quiz=quiz)
+
+        quiz.title = "Streams"
+        quiz.save()
+
+        assert self.titles(client, "estuary") == ["Streams"]
+        assert self.titles(client, "streams") == ["Streams"]
+
+    def test_searching_does_not_index(self, client):
+        Quiz.objects.create(title="Geology", user=self.user)
+        assert Job.objects.get().name == "quizes.tasks.index_quizes"
+        response = self.search(client, "geology", index=False)
+        assert response.data["results"] == []
+
+        call_command("refresh_search", stdout=io.StringIO())
+        response = self.search(client, "geology", index=False)
+        assert [quiz["title"] for quiz in response.data["results"]] == ["Geology"]
+
+    def test_title_matches_rank_above_question_and_answer_matches(self, client):
+        answer_quiz = Quiz.objects.create(title="Rivers", user=self.user)
+        question = Question.objects.create(title="Longest one?", quiz=answer_quiz)
+        Answer.objects.create(title="Volcano free", question=question)
+        question_quiz = Quiz.objects.create(title="Mountains", user=self.user)
+        Question.objects.create(title="Tallest volcano?", quiz=question_quiz)
+        Quiz.objects.create(title="Volcanoes of Iceland", user=self.user)
+        Quiz.objects.create(title="Deserts", user=self.user)
+
+        # stemmed: volcano also finds volcanoes
+        assert self.titles(client, "volcano") == [
+            "Volcanoes of Iceland",
+            "Mountains",
+            "Rivers",
+        ]
+        response = self.search(client, "volcano")
+        assert set(response.data["results"][0]) == {
+            "id",
+            "title",
+            "user",
+            "question_count",
+            "answer_count",
+            "rank",
+        }
+
+    def test_every_word_has_to_match(self, client):
+        Quiz.objects.create(title="Roman history", user=self.user)
+        Quiz.objects.create(title="Greek history", user=self.user)
+
+        assert self.titles(client, "roman history") == ["Roman history"]
+        # query syntax is taken literally rather than failing
+        assert self.titles(client, 'roman" (history*') == ["Roman history"]
+
+    def test_only_searches_quizes_of_the_user(self, client):
+        other = User.objects.create_user(email="c@d.com", password="aasdfew23")
+        Quiz.objects.create(title="Capitals", user=other)
+        Quiz.objects.create(title="Capitals of Europe", user=self.user)
+
+        assert self.titles(client, "capitals") == ["Capitals of Europe"]
+
+    def test_index_follows_writes(self, client):
+        quiz = Quiz.objects.create(title="Astronomy", user=self.user)
+        question = Question.objects.create(title="Largest planet?", quiz=quiz)
+        answer = Answer.objects.create(title="Jupiter", question=question)
+        assert self.titles(client, "jupiter") == ["Astronomy"]
+
+        answer.title = "Saturn"
+        answer.save()
+        assert self.titles(client, "jupiter") == []
+        assert self.titles(client, "saturn") == ["Astronomy"]
+
+        Answer.objects.filter(question=question).delete()
+        assert self.titles(client, "saturn") == []
+
+        quiz.title = "Solar system"
+        quiz.save()
+        assert self.titles(client, "astronomy") == []
+        assert self.titles(client, "solar largest") == ["Solar system"]
+
+        question.delete()
+        assert self.titles(client, "largest") == []
+
+        quiz.delete()
+        assert self.titles(client, "solar") == []
+
+    def test_bulk_writes_are_indexed(self, client):
+        client.post(
+            reverse("quizes:quiz_bulk_create"),
+            {
+                "title": "Birds",
+                "questions": [
+                    {"title": "Fastest bird?", "answers": [{"title": "Falcon"}]}
+                ],
+            },
+            content_type="application/json",
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+        transfer.QuizImporter(self.user).run(
+            [("Fish", "Biggest fish?", [{"title": "Whale shark", "correct": True}])]
+        )
+
+        assert self.titles(client, "falcon") == ["Birds"]
+        assert self.titles(client, "shark") == ["Fish"]
+
+    def test_only_stale_documents_are_rebuilt(self):
+        quiz = Quiz.objects.create(title="Physics", user=self.user)
+        Quiz.objects.create(title="Biology", user=self.user)
+        quizes = Quiz.objects.filter(user=self.user)
+        assert search.refresh(quizes) == 2
+        assert search.refresh(quizes) == 0
+
+        Question.objects.create(title="Unit of force?", quiz=quiz)
+        assert search.refresh(quizes) == 1
+
+    def test_results_are_paginated(self, client):
+        for i in range(3):
+            Quiz.objects.create(title=f"Chemistry {i}", user=self.user)
+
+        response = self.search(client, "chemistry", page_size=2)
+        assert response.data["count"] == 3
+        assert len(response.data["results"]) == 2
+        response = self.search(client, "chemistry", page_size=2, page=2)
+        assert [quiz["title"] for quiz in response.data["results"]] == ["Chemistry 2"]
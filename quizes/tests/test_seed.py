@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+import pytest
+from rest_framework.authtoken.models import Token
+
+from quizes import seed
+from quizes.models import Quiz, Question, Answer
+
+
+@pytest.mark.django_db
+class TestSeed:
+    def correct_titles(self):
+        return list(
+            Answer.objects.filter(correct=True)
+            .order_by("question__quiz__user__email", "question__quiz__title", "id")
+            .values_list("title", flat=True)
+        )
+
+    def test_seeds_the_requested_shape(self):
+        counts = seed.Seeder(users=3, quizes=2, questions=4, answers=3).run()
+
+        assert counts == {"users": 3, "quizes": 6, "questions": 24, "answers": 72}
+        assert seed.seeded_users("bench").count() == 3
+        assert Token.objects.count() == 3
+        assert Quiz.objects.count() == 6
+        assert Question.objects.count() == 24
+        # exactly one correct answer per question
+        assert Answer.objects.filter(correct=True).count() == 24
+
+        user = seed.seeded_users("bench").get(email=seed.seed_email("bench", 0))
+        assert user.check_password("benchmark")
+
+    def test_small_batches_seed_the_same_data(self):
+        seed.Seeder(users=3, quizes=3, questions=2, answers=4, seed=7).run()
+        expected = self.correct_titles()
+        seed.seeded_users("bench").delete()
+
+        seed.Seeder(
+            users=3, quizes=3, questions=2, answers=4, seed=7, batch_size=8
+        ).run()
+        assert self.correct_titles() == expected
+        assert Question.objects.count() == 18
+
+    def test_command_refuses_to_seed_twice_without_flush(self):
+        out = StringIO()
+        call_command("seed_quizes", users=2, quizes=1, stdout=out)
+        assert "Seeded 2 users, 2 quizes, 20 questions and 80 answers" in out.getvalue()
+
+        with pytest.raises(CommandError):
+            call_command("seed_quizes", users=2, quizes=1)
+
+        call_command("seed_quizes", users=1, quizes=1, flush=True, stdout=out)
+        assert seed.seeded_users("bench").count() == 1
+        assert Quiz.objects.count() == 1
@@ -1,6 +1,8 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
 
+from rest_framework.exceptions import ValidationError
 from rest_framework.test import APIRequestFactory
 
 from quizes import serializers
@@ -39,7 +41,28 @@ class TestQuizSerializer:
         quiz_serializer = serializers.Quiz(
             data={"title": "test title"}, context={"request": self.request_factory}
         )
-        assert quiz_serializer.is_valid() == False
+        # uniqueness is left to the database constraint, checked on save
+        assert quiz_serializer.is_valid()
+        with pytest.raises(ValidationError) as error:
+            quiz_serializer.save()
+
+        assert error.value.detail == {
+            "non_field_errors": ["The fields title, user must make a unique set."]
+        }
+        assert models.Quiz.objects.count() == 1
+
+    def test_other_integrity_errors_are_NOT_reported_as_duplicates(self, monkeypatch):
+        def create(**kwargs):
+            raise IntegrityError("NOT NULL constraint failed: quizes_quiz.title")
+
+        monkeypatch.setattr(models.Quiz._default_manager, "create", create)
+        quiz_serializer = serializers.Quiz(
+            data={"title": "test title"}, context={"request": self.request_factory}
+        )
+        assert quiz_serializer.is_valid()
+
+        with pytest.raises(IntegrityError, match="NOT NULL"):
+            quiz_serializer.save()
 
     def test_also_retrieves_all_associated_questions(self):
         quiz_serializer = serializers.Quiz(
@@ -76,7 +99,14 @@ class TestQuestionSerializer:
             data={"title": "question", "quiz": quiz.id}
         )
 
-        assert question_serializer.is_valid() == False
+        assert question_serializer.is_valid()
+        with pytest.raises(ValidationError) as error:
+            question_serializer.save()
+
+        assert error.value.detail == {
+            "non_field_errors": ["The fields title, quiz must make a unique set."]
+        }
+        assert models.Question.objects.count() == 1
 
     def test_also_retrieves_all_associated_answers(self):
         user = User.objects.create_user(email="foo@bar.com", password="jfklosoi32")
@@ -114,4 +144,89 @@ class TestAnswerSerializer:
             data={"title": "answer", "question": question.id}
         )
 
-        assert answer_serializer.is_valid() == False
+        assert answer_serializer.is_valid()
+        with pytest.raises(ValidationError) as error:
+            answer_serializer.save()
+
+        assert error.value.detail == {
+            "non_field_errors": ["The fields title, question must make a unique set."]
+        }
+        assert models.Answer.objects.count() == 1
+
+
+@pytest.mark.django_db
+class TestNestedQuizSerializer:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="foo@bar.com", password="jfklosoi32")
+        self.request_factory = APIRequestFactory()
+        self.request_factory.user = self.user
+
+    def test_creates_quiz_with_all_questions_and_answers(self):
+        data = {
+            "title": "bulk quiz",
+            "questions": [
+                {
+                    "title": "question 1",
+                    "answers": [
+                        {"title": "yes", "correct": True},
+                        {"title": "no"},
+                    ],
+                },
+                {"title": "question 2"},
+            ],
+        }
+        serializer = serializers.NestedQuiz(
+            data=data, context={"request": self.request_factory}
+        )
+        assert serializer.is_valid()
+        quiz = serializer.save()
+
+        assert quiz.user == self.user
+        assert models.Question.objects.filter(quiz=quiz).count() == 2
+        assert models.Answer.objects.filter(question__quiz=quiz).count() == 2
+        assert models.Answer.objects.get(title="yes").correct == True
+
+    def test_duplicate_question_titles_are_rejected(self):
+        data = {"title": "bulk quiz", "questions": [{"title": "q"}, {"title": "q"}]}
+        serializer = serializers.NestedQuiz(
+            data=data, context={"request": self.request_factory}
+        )
+        assert serializer.is_valid() == False
+        assert "questions" in serializer.errors
+
+    def test_duplicate_answer_titles_are_rejected(self):
+        data = {
+            "title": "bulk quiz",
+            "questions": [{"title": "q", "answers": [{"title": "a"}, {"title": "a"}]}],
+        }
+        serializer = serializers.NestedQuiz(
+            data=data, context={"request": self.request_factory}
+        )
+        assert serializer.is_valid() == False
+
+    def test_duplicate_quiz_title_creates_nothing(self):
+        models.Quiz.objects.create(title="bulk quiz", user=self.user)
+        serializer = serializers.NestedQuiz(
+            data={"title": "bulk quiz", "questions": [{"title": "q"}]},
+            context={"request": self.request_factory},
+        )
+        assert serializer.is_valid()
+        with pytest.raises(ValidationError):
+            serializer.save()
+
+        assert models.Quiz.objects.count() == 1
+        assert models.Question.objects.count() == 0
+
+    def test_other_integrity_errors_are_NOT_reported_as_duplicates(self, monkeypatch):
+        def create(**kwargs):
+            raise IntegrityError("NOT NULL constraint failed: quizes_quiz.title")
+
+        monkeypatch.setattr(models.Quiz.objects, "create", create)
+        serializer = serializers.NestedQuiz(
+            data={"title": "bulk quiz", "questions": [{"title": "q"}]},
+            context={"request": self.request_factory},
+        )
+        assert serializer.is_valid()
+
+        with pytest.raises(IntegrityError, match="NOT NULL"):
+            serializer.save()
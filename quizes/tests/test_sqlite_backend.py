@@ -0,0 +1,82 @@
+import pytest
+from django.db import OperationalError, connection
+from django.db.utils import load_backend
+
+
+def connect(path, **options):
+    settings_dict = {
+        **connection.settings_dict,
+        "ENGINE": "config.db.sqlite3",
+        "NAME": str(path),
+        "OPTIONS": options,
+    }
+    backend = load_backend("config.db.sqlite3")
+    wrapper = backend.DatabaseWrapper(settings_dict, alias="tuned")
+    wrapper.ensure_connection()
+    return wrapper
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+class TestSQLiteBackend:
+    def setup_method(self):
+        self.connections = []
+
+    def teardown_method(self):
+        for wrapper in self.connections:
+            wrapper.close()
+
+    def connect(self, path, **options):
+        wrapper = connect(path, **options)
+        self.connections.append(wrapper)
+        return wrapper
+
+    def test_applies_the_default_pragmas(self, tmp_path):
+        wrapper = self.connect(tmp_path / "db.sqlite3")
+
+        assert pragma(wrapper, "journal_mode") == "wal"
+        assert pragma(wrapper, "busy_timeout") == 20000
+        assert pragma(wrapper, "synchronous") == 1  # NORMAL
+        assert pragma(wrapper, "cache_size") == -20000
+        assert pragma(wrapper, "temp_store") == 2  # MEMORY
+
+    def test_applies_pragmas_from_the_options(self, tmp_path):
+        wrapper = self.connect(
+            tmp_path / "db.sqlite3",
+            timeout=3,
+            pragmas={"journal_mode": "DELETE", "synchronous": "FULL"},
+        )
+
+        assert pragma(wrapper, "journal_mode") == "delete"
+        assert pragma(wrapper, "synchronous") == 2  # FULL
+        # the regular options still reach sqlite3.connect()
+        assert pragma(wrapper, "busy_timeout") == 3000
+
+    @pytest.mark.parametrize(
+        "transaction_mode, locked", [(None, True), ("DEFERRED", False)]
+    )
+    def test_atomic_blocks_take_the_write_lock_when_they_begin(
+        self, tmp_path, transaction_mode, locked
+    ):
+        path = tmp_path / "db.sqlite3"
+        options = {"transaction_mode": transaction_mode} if transaction_mode else {}
+        wrapper = self.connect(path, **options)
+        other = self.connect(path, timeout=0, pragmas={"busy_timeout": 0})
+
+        # what transaction.atomic() does on SQLite
+        wrapper._start_transaction_under_autocommit()
+        try:
+            with other.cursor() as cursor:
+                if locked:
+                    with pytest.raises(OperationalError, match="locked"):
+                        cursor.execute("BEGIN IMMEDIATE")
+                else:
+                    cursor.execute("BEGIN IMMEDIATE")
+                    cursor.execute("ROLLBACK")
+        finally:
+            wrapper.connection.rollback()
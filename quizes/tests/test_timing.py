@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import JsonResponse
+from django.test import AsyncClient
+from django.urls import path, reverse
+
+import pytest
+from rest_framework.authtoken.models import Token
+
+from config.timing import install_query_recorder
+from quizes.tests.test_views import create_quiz_tree
+
+User = get_user_model()
+
+
+async def slow_view(request):
+    await asyncio.sleep(0.2)
+    return JsonResponse({"padding": "x" * 1000})
+
+
+urlpatterns = [path("slow/", slow_view)]
+
+
+def concurrent_requests(requests=5, **headers):
+    """Send `requests` concurrent ASGI requests to `slow_view`
+
+    Returns the wall time they took and the responses. Needs
+    `@pytest.mark.urls("quizes.tests.test_timing")`. A middleware Django has
+    to adapt to async runs every request through one thread, one at a time.
+    """
+
+    async def run():
+        client = AsyncClient()
+        started = time.perf_counter()
+        responses = await asyncio.gather(
+            *(client.get("/slow/", **headers) for _ in range(requests))
+        )
+        assert [response.status_code for response in responses] == [200] * requests
+        return time.perf_counter() - started, responses
+
+    return async_to_sync(run)()
+
+
+def server_timing(response):
+    """Parse a Server-Timing header into {name: {"dur": ..., "desc": ...}}"""
+    metrics = {}
+    for metric in response["Server-Timing"].split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+@pytest.mark.django_db
+class TestServerTiming:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="aasdfew23")
+        self.token = Token.objects.get(user=self.user)
+        self.auth_header_str = f"Token {self.token.key}"
+        self.quiz = create_quiz_tree(self.user, "quiz1")
+
+    def test_reports_queries_serialization_and_rendering(
+        self, client, django_assert_num_queries
+    ):
+        with django_assert_num_queries(5):
+            response = client.get(
+                reverse("quizes:quizes_list"), HTTP_AUTHORIZATION=self.auth_header_str
+            )
+
+        metrics = server_timing(response)
+        assert metrics["db"]["desc"] == '"5 queries"'
+        assert {"serialize", "render", "total"} <= set(metrics)
+        assert float(metrics["total"]["dur"]) >= float(metrics["db"]["dur"])
+
+    def test_cached_document_makes_no_queries(self, client):
+        url = reverse("quizes:quiz_detail", args=[self.quiz.id])
+        client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+        response = client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        metrics = server_timing(response)
+        assert metrics["db"]["desc"] == '"0 queries"'
+        assert "serialize" not in metrics
+
+    def test_header_can_be_turned_off(self, client, settings):
+        settings.SERVER_TIMING_HEADER = False
+        response = client.get(
+            reverse("quizes:quizes_list"), HTTP_AUTHORIZATION=self.auth_header_str
+        )
+        assert "Server-Timing" not in response
+
+    def test_slow_requests_are_logged_with_their_queries(
+        self, client, settings, caplog
+    ):
+        url = reverse("quizes:quizes_list")
+        with caplog.at_level(logging.INFO, logger="config.timing"):
+            client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+            settings.SERVER_TIMING_SLOW_MS = 0
+            client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        fast, slow = caplog.records
+        assert fast.levelno == logging.INFO
+        assert "sql" not in json.loads(fast.getMessage())
+
+        record = json.loads(slow.getMessage())
+        assert slow.levelno == logging.WARNING
+        assert record["path"] == url
+        assert record["status"] == 200
+        assert len(record["sql"]) == record["queries"]
+
+    def test_reports_timings_under_ASGI(self):
+        # the test database connection was opened before config.timing was
+        # imported, and AsyncClient builds the middleware on another thread
+        install_query_recorder(sender=None, connection=connection)
+
+        async def get():
+            # Django 3.2's AsyncClient sends extra arguments as plain headers
+            return await AsyncClient().get(
+                reverse("quizes:quizes_list"), authorization=self.auth_header_str
+            )
+
+        response = async_to_sync(get)()
+
+        metrics = server_timing(response)
+        assert metrics["db"]["desc"] == '"5 queries"'
+        assert {"serialize", "render", "total"} <= set(metrics)
+
+
+@pytest.mark.urls("quizes.tests.test_timing")
+def test_does_not_serialize_ASGI_requests(settings):
+    settings.MIDDLEWARE = ["config.timing.ServerTimingMiddleware"]
+
+    elapsed, responses = concurrent_requests()
+    assert elapsed < 0.6
+    assert all("Server-Timing" in response for response in responses)
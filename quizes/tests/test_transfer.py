@@ -0,0 +1,172 @@
+import io
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+
+from quizes import transfer
+from quizes.models import Quiz, Question, Answer
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestExport:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="sekrit12")
+        quiz = Quiz.objects.create(title="quiz 1", user=self.user)
+        question = Question.objects.create(title="question 1", quiz=quiz)
+        Answer.objects.create(title="yes", correct=True, question=question)
+        Answer.objects.create(title="no", question=question)
+        Question.objects.create(title="question 2", quiz=quiz)
+        Quiz.objects.create(title="empty quiz", user=self.user)
+
+        other = User.objects.create_user(email="c@d.com", password="sekrit12")
+        Quiz.objects.create(title="not mine", user=other)
+
+    def test_ndjson_has_one_line_per_question(self):
+        lines = list(transfer.to_ndjson(transfer.export_rows(self.user)))
+
+        assert lines == [
+            '{"quiz": "quiz 1", "question": "question 1", "answers": '
+            '[{"title": "yes", "correct": true}, {"title": "no", "correct": false}]}\n',
+            '{"quiz": "quiz 1", "question": "question 2", "answers": []}\n',
+            '{"quiz": "empty quiz", "question": null, "answers": []}\n',
+        ]
+
+    def test_csv_has_one_row_per_answer(self):
+        lines = list(transfer.to_csv(transfer.export_rows(self.user)))
+
+        assert lines == [
+            "quiz,question,answer,correct\r\n",
+            "quiz 1,question 1,yes,true\r\n",
+            "quiz 1,question 1,no,false\r\n",
+            "quiz 1,question 2,,\r\n",
+            "empty quiz,,,\r\n",
+        ]
+
+    @pytest.mark.parametrize("file_format", ["ndjson", "csv"])
+    def test_export_then_import_round_trips(self, file_format):
+        _, encode, parse = transfer.FORMATS[file_format]
+        exported = list(encode(transfer.export_rows(self.user)))
+
+        user2 = User.objects.create_user(email="e@f.com", password="sekrit12")
+        counts = transfer.QuizImporter(user2, batch_size=1).run(parse(exported))
+
+        assert counts == {"quizes": 2, "questions": 2, "answers": 2}
+        assert list(transfer.export_rows(user2)) == list(
+            transfer.export_rows(self.user)
+        )
+
+
+@pytest.mark.django_db
+class TestImport:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="sekrit12")
+
+    def test_importing_twice_does_NOT_duplicate_rows(self):
+        lines = ['{"quiz": "q", "question": "1", "answers": [{"title": "a"}]}\n']
+        transfer.QuizImporter(self.user).run(transfer.parse_ndjson(lines))
+        transfer.QuizImporter(self.user).run(transfer.parse_ndjson(lines))
+
+        assert Quiz.objects.count() == 1
+        assert Question.objects.count() == 1
+        assert Answer.objects.count() == 1
+
+    def test_counts_only_rows_that_were_inserted(self):
+        first = [
+            '{"quiz": "q", "question": "1", "answers": [{"title": "a"}]}\n',
+            '{"quiz": "q", "question": "2", "answers": []}\n',
+        ]
+        again = [
+            '{"quiz": "q", "question": "1", "answers": [{"title": "a"}, '
+            '{"title": "b"}]}\n',
+            '{"quiz": "q", "question": "2", "answers": []}\n',
+            '{"quiz": "q", "question": "3", "answers": [{"title": "a"}]}\n',
+        ]
+        transfer.QuizImporter(self.user).run(transfer.parse_ndjson(first))
+        counts = transfer.QuizImporter(self.user).run(transfer.parse_ndjson(again))
+
+        assert counts == {"quizes": 0, "questions": 1, "answers": 2}
+        assert Question.objects.count() == 3
+        assert Answer.objects.count() == 3
+
+    def test_invalid_ndjson_line_raises_value_error(self):
+        lines = ['{"quiz": "q", "question": "1"}\n', "not json\n"]
+        with pytest.raises(ValueError, match="line 2"):
+            list(transfer.parse_ndjson(lines))
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            '{"quiz": null, "question": "1"}',
+            '{"quiz": {"a": 1}, "question": "1"}',
+            '{"quiz": " ", "question": "1"}',
+            '{"quiz": "q", "question": 1}',
+            '{"quiz": "q", "question": ""}',
+            '{"quiz": "q", "question": "1", "answers": [{"title": null}]}',
+            '{"quiz": "q", "question": null, "answers": [{"title": "a"}]}',
+            json.dumps({"quiz": "q" * 255, "question": "1"}),
+            "[1, 2]",
+        ],
+    )
+    def test_invalid_ndjson_titles_raise_value_error(self, line):
+        lines = ['{"quiz": "q", "question": "1"}\n', line + "\n"]
+        with pytest.raises(ValueError, match="line 2"):
+            list(transfer.parse_ndjson(lines))
+
+    @pytest.mark.parametrize(
+        "row", [",question,,", "quiz, ,,", "quiz,,answer,true", "quiz,q," + "a" * 401]
+    )
+    def test_invalid_csv_titles_raise_value_error(self, row):
+        lines = ["quiz,question,answer,correct\n", "quiz,q,a,true\n", row + "\n"]
+        with pytest.raises(ValueError, match="line 3"):
+            list(transfer.parse_csv(lines))
+
+    def test_csv_with_wrong_header_raises_value_error(self):
+        with pytest.raises(ValueError):
+            list(transfer.parse_csv(["title,correct\n"]))
+
+    def test_inserts_in_bounded_batches(self, django_assert_max_num_queries):
+        lines = [
+            f'{{"quiz": "q", "question": "{i}", "answers": [{{"title": "a"}}]}}\n'
+            for i in range(100)
+        ]
+        # get_or_create quiz plus a constant number of queries per batch of 50
+        with django_assert_max_num_queries(20):
+            transfer.QuizImporter(self.user, batch_size=50).run(
+                transfer.parse_ndjson(lines)
+            )
+
+        assert Question.objects.count() == 100
+
+
+@pytest.mark.django_db
+class TestCommands:
+    def test_export_and_import_quizes(self, tmp_path):
+        user = User.objects.create_user(email="a@b.com", password="sekrit12")
+        quiz = Quiz.objects.create(title="quiz", user=user)
+        Question.objects.create(title="question", quiz=quiz)
+        User.objects.create_user(email="c@d.com", password="sekrit12")
+        path = tmp_path / "quizes.csv"
+
+        call_command("export_quizes", "a@b.com", format="csv", output=str(path))
+        out = io.StringIO()
+        call_command("import_quizes", "c@d.com", str(path), format="csv", stdout=out)
+
+        assert Quiz.objects.filter(user__email="c@d.com", title="quiz").exists()
+        assert "1 new quizes, 1 questions" in out.getvalue()
+
+        out = io.StringIO()
+        call_command("import_quizes", "c@d.com", str(path), format="csv", stdout=out)
+        assert "0 new quizes, 0 questions and 0 answers" in out.getvalue()
+
+    def test_import_quizes_reports_invalid_records(self, tmp_path):
+        User.objects.create_user(email="a@b.com", password="sekrit12")
+        path = tmp_path / "quizes.ndjson"
+        path.write_text('{"quiz": null, "question": "q"}\n')
+
+        with pytest.raises(CommandError, match="line 1"):
+            call_command("import_quizes", "a@b.com", str(path))
+        assert not Quiz.objects.exists()
@@ -1,15 +1,30 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.urls import reverse
 
 import pytest
 from rest_framework.authtoken.models import Token
 
-from quizes.views import QuizListCreate
-from quizes.models import Quiz, Question, Answer
+from jobs.models import Job
+from jobs.worker import Worker
+from quizes import cache, checks
+from quizes.views import QuizListCreate, build_quiz_document
+from quizes.models import Quiz, Question, Answer, Attempt
 
 User = get_user_model()
 
 
+def create_quiz_tree(user, title, questions=3, answers=4):
+    """Create a quiz with the given number of questions, each having `answers`"""
+    quiz = Quiz.objects.create(title=title, user=user)
+    for i in range(questions):
+        question = Question.objects.create(title=f"question {i}", quiz=quiz)
+        for j in range(answers):
+            Answer.objects.create(title=f"answer {j}", question=question)
+    return quiz
+
+
 @pytest.mark.django_db
 class TestQuizListCreate:
     def setup_class(self):
@@ -39,8 +54,8 @@ class TestQuizListCreate:
         response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
 
         assert response.status_code == 200
-        assert len(response.data) == 2
-        assert response.data[0].get("title") == "quiz1"
+        assert len(response.data["results"]) == 2
+        assert response.data["results"][0].get("title") == "quiz1"
         assert response["Content-Type"] == "application/json"
 
     def test_POST_request_creates_a_new_quiz(self, client):
@@ -53,6 +68,63 @@ class TestQuizListCreate:
         assert response.status_code == 201
         assert response.data["title"] == "New Quiz"
 
+    def test_POST_request_with_duplicate_title_returns_400(
+        self, client, django_assert_num_queries
+    ):
+        Quiz.objects.create(title="New Quiz", user=self.user)
+        client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        with django_assert_num_queries(4) as captured:
+            response = client.post(
+                self.url,
+                HTTP_AUTHORIZATION=self.auth_header_str,
+                data={"title": "New Quiz"},
+            )
+
+        # only the savepoint around the failed INSERT, no SELECT beforehand
+        assert not any(
+            query["sql"].startswith("SELECT") for query in captured.captured_queries
+        )
+
+        assert response.status_code == 400
+        assert response.data == {
+            "non_field_errors": ["The fields title, user must make a unique set."]
+        }
+
+    def test_GET_with_current_ETag_returns_304(self, client):
+        quiz = create_quiz_tree(self.user, "quiz", questions=1)
+        response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        etag = response["ETag"]
+
+        response = client.get(
+            self.url, HTTP_AUTHORIZATION=self.auth_header_str, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 304
+
+        Answer.objects.filter(question__quiz=quiz).delete()
+        response = client.get(
+            self.url, HTTP_AUTHORIZATION=self.auth_header_str, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    @pytest.mark.parametrize("quizes", [1, 5])
+    def test_GET_query_count_does_NOT_grow_with_quiz_size(
+        self, client, django_assert_num_queries, quizes
+    ):
+        for i in range(quizes):
+            create_quiz_tree(self.user, f"quiz {i}", questions=quizes * 2)
+
+        # token lookup, list ETag, quizes, questions, answers
+        with django_assert_num_queries(5):
+            response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        assert response.status_code == 200
+        quiz_list = response.data["results"]
+        assert len(quiz_list) == quizes
+        assert len(quiz_list[-1]["questions"]) == quizes * 2
+        assert len(quiz_list[-1]["questions"][0]["answers"]) == 4
+
 
 @pytest.mark.django_db
 class TestQuizDetail:
@@ -75,15 +147,136 @@ class TestQuizDetail:
     def test_retrieves_the_detail_of_quiz(self, client):
         response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
 
-        assert response.data["title"] == self.quiz.title
+        assert response.json()["title"] == self.quiz.title
 
     def test_retrieves_all_questions_that_belong_to_quiz(self, client):
         Question.objects.create(title="Question 1", quiz=self.quiz)
         Question.objects.create(title="Question 2", quiz=self.quiz)
         response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
 
-        assert len(response.data["questions"]) == 2
-        response.data["questions"] == "Question 1"
+        assert len(response.json()["questions"]) == 2
+        response.json()["questions"] == "Question 1"
+
+    def test_document_of_a_tree_loaded_before_a_write_is_not_cached(self, client):
+        # a reader loads the tree, a write commits (and invalidates) before the
+        # reader caches the document it built
+        loaded = Quiz.objects.with_questions().get(pk=self.quiz.pk)
+        Question.objects.create(title="Question 1", quiz=self.quiz)
+        build_quiz_document(loaded)
+
+        assert cache.get_quiz_document(self.quiz.pk) is None
+        response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        assert len(response.json()["questions"]) == 1
+        assert response["ETag"] == f'"{self.quiz.pk}-2"'
+
+    def test_questions_and_answers_are_returned_in_creation_order(self, client):
+        quiz = create_quiz_tree(self.user, "ordered quiz")
+        url = reverse("quizes:quiz_detail", args=[quiz.pk])
+        response = client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        questions = response.json()["questions"]
+        assert [q["title"] for q in questions] == [
+            "question 0",
+            "question 1",
+            "question 2",
+        ]
+        assert [a["title"] for a in questions[0]["answers"]][0] == "answer 0"
+
+    def test_GET_query_count_does_NOT_grow_with_number_of_questions(
+        self, client, django_assert_num_queries
+    ):
+        quiz = create_quiz_tree(self.user, "big quiz", questions=20, answers=5)
+        url = reverse("quizes:quiz_detail", args=[quiz.pk])
+
+        # token lookup, quiz, questions, answers, queueing the recompression and
+        # checking the quiz version once the document is cached
+        with django_assert_num_queries(6):
+            response = client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        assert response.status_code == 200
+        assert len(response.json()["questions"]) == 20
+
+    def test_repeated_GET_is_served_from_cache(self, client, django_assert_num_queries):
+        create_quiz_tree(self.user, "cached quiz")
+        client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        # the token is cached as well, so nothing hits the database
+        with django_assert_num_queries(0):
+            response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        assert response.json()["title"] == self.quiz.title
+
+    def test_cached_document_is_invalidated_when_questions_change(self, client):
+        client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        question = Question.objects.create(title="Question 1", quiz=self.quiz)
+
+        response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        assert len(response.json()["questions"]) == 1
+
+        question.delete()
+        response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        assert response.json()["questions"] == []
+
+    def test_cached_document_is_invalidated_when_answers_change(self, client):
+        question = Question.objects.create(title="Question 1", quiz=self.quiz)
+        client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        answer = Answer.objects.create(title="answer", question=question)
+
+        response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        assert len(response.json()["questions"][0]["answers"]) == 1
+
+        answer.delete()
+        response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        assert response.json()["questions"][0]["answers"] == []
+
+        Answer.objects.create(title="answer", question=question)
+        client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        Answer.objects.filter(question=question).delete()
+        response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        assert response.json()["questions"][0]["answers"] == []
+
+    def test_GET_with_current_ETag_returns_304(self, client, django_assert_num_queries):
+        response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        etag = response["ETag"]
+
+        with django_assert_num_queries(0):
+            response = client.get(
+                self.url,
+                HTTP_AUTHORIZATION=self.auth_header_str,
+                HTTP_IF_NONE_MATCH=etag,
+            )
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+
+        Question.objects.create(title="Question 1", quiz=self.quiz)
+        response = client.get(
+            self.url, HTTP_AUTHORIZATION=self.auth_header_str, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_conditional_GET_on_cache_miss_only_reads_the_quiz_version(
+        self, client, django_assert_num_queries
+    ):
+        response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        caches[settings.QUIZ_CACHE].clear()
+
+        with django_assert_num_queries(1):
+            response = client.get(
+                self.url,
+                HTTP_AUTHORIZATION=self.auth_header_str,
+                HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+            )
+        assert response.status_code == 304
+
+    def test_GET_after_DELETE_returns_404(self, client):
+        client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        client.delete(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        assert response.status_code == 404
 
     def test_DELETE_request_deletes_the_quiz(self, client):
         assert Quiz.objects.count() == 1
@@ -98,6 +291,163 @@ class TestQuizDetail:
         assert "Not found" in response.data["detail"]
 
 
+@pytest.mark.django_db
+class TestQuizBulkCreate:
+    def setup_class(self):
+        self.url = reverse("quizes:quiz_bulk_create")
+
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="aasdfew23")
+        self.token = Token.objects.get(user=self.user)
+        self.auth_header_str = f"Token {self.token.key}"
+        self.data = {
+            "title": "bulk quiz",
+            "questions": [
+                {
+                    "title": f"question {i}",
+                    "answers": [
+                        {"title": f"answer {j}", "correct": j == 0} for j in range(4)
+                    ],
+                }
+                for i in range(30)
+            ],
+        }
+
+    def test_can_only_be_accessed_by_authorized_user(self, client):
+        response = client.post(self.url, self.data, content_type="application/json")
+        assert response.status_code == 401
+
+    def test_POST_creates_the_whole_tree_and_returns_it(self, client):
+        response = client.post(
+            self.url,
+            self.data,
+            content_type="application/json",
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+
+        assert response.status_code == 201
+        assert response.data["title"] == "bulk quiz"
+        assert response.data["user"] == self.user.id
+        assert len(response.data["questions"]) == 30
+        assert response.data["questions"][0]["title"] == "question 0"
+        assert len(response.data["questions"][0]["answers"]) == 4
+        assert response.data["questions"][0]["answers"][0]["correct"] == True
+        assert Answer.objects.filter(question__quiz__user=self.user).count() == 120
+
+    def test_POST_query_count_does_NOT_grow_with_tree_size(
+        self, client, django_assert_max_num_queries
+    ):
+        with django_assert_max_num_queries(12):
+            response = client.post(
+                self.url,
+                self.data,
+                content_type="application/json",
+                HTTP_AUTHORIZATION=self.auth_header_str,
+            )
+
+        assert response.status_code == 201
+
+    def test_POST_with_duplicate_quiz_title_returns_400(self, client):
+        Quiz.objects.create(title="bulk quiz", user=self.user)
+        response = client.post(
+            self.url,
+            self.data,
+            content_type="application/json",
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+
+        assert response.status_code == 400
+        assert "non_field_errors" in response.data
+        assert Question.objects.count() == 0
+
+
+@pytest.mark.django_db
+class TestQuizExportImport:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="aasdfew23")
+        self.token = Token.objects.get(user=self.user)
+        self.auth_header_str = f"Token {self.token.key}"
+
+    def test_GET_streams_the_export(self, client):
+        create_quiz_tree(self.user, "quiz", questions=2, answers=1)
+        url = reverse("quizes:export", args=["csv"])
+        response = client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response["Content-Type"] == "text/csv"
+        content = b"".join(response.streaming_content).decode()
+        assert content.splitlines()[1] == "quiz,question 0,answer 0,false"
+
+    def post_import(self, client, body):
+        return client.post(
+            reverse("quizes:import", args=["ndjson"]),
+            body,
+            content_type="application/x-ndjson",
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+
+    def test_POST_queues_an_import_of_the_request_body(
+        self, client, settings, tmp_path
+    ):
+        settings.MEDIA_ROOT = tmp_path
+        body = (
+            '{"quiz": "quiz", "question": "q1", "answers": [{"title": "a"}]}\n'
+            '{"quiz": "quiz", "question": "q2", "answers": []}\n'
+        )
+        response = self.post_import(client, body)
+
+        assert response.status_code == 202
+        assert response.data["status"] == Job.QUEUED
+        assert not Question.objects.exists()
+        assert [path.read_text() for path in tmp_path.glob("imports/*")] == [body]
+
+        Worker().work(burst=True)
+        response = client.get(
+            response["Location"], HTTP_AUTHORIZATION=self.auth_header_str
+        )
+        assert response.data["status"] == Job.DONE
+        assert response.data["result"] == {"quizes": 1, "questions": 2, "answers": 1}
+        assert Question.objects.filter(quiz__user=self.user).count() == 2
+        assert list(tmp_path.glob("imports/*")) == []
+
+    @pytest.mark.parametrize("body", ["garbage", '{"quiz": null, "question": "q"}'])
+    def test_import_of_an_invalid_body_reports_the_error(
+        self, client, settings, tmp_path, body
+    ):
+        settings.MEDIA_ROOT = tmp_path
+        response = self.post_import(client, body)
+        Worker().work(burst=True)
+
+        job = Job.objects.get(pk=response.data["id"])
+        assert job.status == Job.DONE
+        assert job.result == {
+            "detail": "Invalid record on line 1",
+            "quizes": 0,
+            "questions": 0,
+            "answers": 0,
+        }
+        assert job.attempts == 1
+        assert list(tmp_path.glob("imports/*")) == []
+
+    def test_import_jobs_are_visible_to_their_user_only(
+        self, client, settings, tmp_path
+    ):
+        settings.MEDIA_ROOT = tmp_path
+        location = self.post_import(client, "")["Location"]
+        other = User.objects.create_user(email="c@d.com", password="aasdfew23")
+        token = Token.objects.get(user=other)
+
+        response = client.get(location, HTTP_AUTHORIZATION=f"Token {token.key}")
+        assert response.status_code == 404
+
+    def test_unknown_format_returns_404(self, client):
+        url = reverse("quizes:export", args=["xml"])
+        response = client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        assert response.status_code == 404
+
+
 @pytest.mark.django_db
 class TestQuestions:
     def setup_method(self):
@@ -128,7 +478,93 @@ class TestQuestions:
         response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
 
         assert response.status_code == 200
-        assert len(response.data) == 2
+        assert len(response.data["results"]) == 2
+
+    def test_GET_query_count_does_NOT_grow_with_number_of_questions(
+        self, client, django_assert_num_queries
+    ):
+        for i in range(10):
+            question = Question.objects.create(title=f"question {i}", quiz=self.quiz)
+            Answer.objects.create(title="answer", question=question)
+
+        # token lookup, questions, answers
+        with django_assert_num_queries(3):
+            response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        assert len(response.data["results"]) == 10
+
+    def sample(self, client, **params):
+        return client.get(self.url, params, HTTP_AUTHORIZATION=self.auth_header_str)
+
+    def test_sample_picks_distinct_random_questions(
+        self, client, django_assert_num_queries
+    ):
+        create_quiz_tree(self.user, "other", questions=5, answers=0)
+        for i in range(30):
+            question = Question.objects.create(title=f"question {i}", quiz=self.quiz)
+            Answer.objects.create(title="answer", question=question)
+        self.sample(client, sample=1)
+
+        # the picked questions and their answers, token and question ids are cached
+        with django_assert_num_queries(2):
+            response = self.sample(client, sample=10)
+
+        assert response.status_code == 200
+        titles = [question["title"] for question in response.data["results"]]
+        assert len(set(titles)) == 10
+        assert all(title.startswith("question") for title in titles)
+        assert len(response.data["seed"]) == 16
+
+        response = self.sample(client, sample=100)
+        assert len(response.data["results"]) == 30
+
+    def test_seeded_samples_and_answer_order_are_repeatable(self, client):
+        create_quiz_tree(self.user, "tree", questions=0)
+        for i in range(40):
+            question = Question.objects.create(title=f"question {i}", quiz=self.quiz)
+            for j in range(6):
+                Answer.objects.create(title=f"answer {j}", question=question)
+
+        first = self.sample(client, sample=5, seed="user-1", shuffle_answers="true")
+        again = self.sample(client, sample=5, seed="user-1", shuffle_answers="true")
+        other = self.sample(client, sample=5, seed="user-2", shuffle_answers="true")
+        assert first.data == again.data
+        assert first.data["seed"] == "user-1"
+        assert first.data["results"] != other.data["results"]
+
+        answers = [
+            [answer["title"] for answer in question["answers"]]
+            for question in first.data["results"]
+        ]
+        assert all(
+            sorted(titles) == [f"answer {j}" for j in range(6)] for titles in answers
+        )
+        assert any(titles != sorted(titles) for titles in answers)
+
+        plain = self.sample(client, sample=5, seed="user-1")
+        assert [q["id"] for q in plain.data["results"]] == [
+            q["id"] for q in first.data["results"]
+        ]
+        assert all(
+            [answer["title"] for answer in question["answers"]]
+            == [f"answer {j}" for j in range(6)]
+            for question in plain.data["results"]
+        )
+
+    def test_sample_follows_changes_to_the_quiz(self, client):
+        Question.objects.create(title="Question 1", quiz=self.quiz)
+        assert len(self.sample(client, sample=5).data["results"]) == 1
+
+        Question.objects.create(title="Question 2", quiz=self.quiz)
+        assert len(self.sample(client, sample=5).data["results"]) == 2
+
+    @pytest.mark.parametrize(
+        "params", [{"sample": 0}, {"sample": "x"}, {"sample": 201}]
+    )
+    def test_invalid_sample_returns_400(self, client, params):
+        response = self.sample(client, **params)
+        assert response.status_code == 400
+        assert "sample" in response.data
 
     def test_post_request_creates_new_question_in_correct_quiz(self, client):
         response = client.post(
@@ -160,8 +596,8 @@ class TestAnswerListCreate:
         response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
 
         assert response.status_code == 200
-        assert len(response.data) == 2
-        assert response.data[1].get("title") == "answer 2"
+        assert len(response.data["results"]) == 2
+        assert response.data["results"][1].get("title") == "answer 2"
 
     def test_POST_request_creates_a_new_answer(self, client):
         response = client.post(
@@ -173,3 +609,402 @@ class TestAnswerListCreate:
         assert response.status_code == 201
         assert response.data.get("title") == "new answer"
         assert response.data.get("question") == self.question.id
+
+    def test_POST_request_with_duplicate_title_returns_400(self, client):
+        Answer.objects.create(title="answer 1", question=self.question)
+        response = client.post(
+            self.url,
+            HTTP_AUTHORIZATION=self.auth_header_str,
+            data={"title": "answer 1"},
+        )
+
+        assert response.status_code == 400
+        assert "non_field_errors" in response.data
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="aasdfew23")
+        self.token = Token.objects.get(user=self.user)
+        self.auth_header_str = f"Token {self.token.key}"
+        self.url = reverse("quizes:quizes_list")
+        for i in range(5):
+            Quiz.objects.create(title=f"quiz {i}", user=self.user)
+
+    def test_results_are_split_into_pages_linked_by_cursor(self, client):
+        response = client.get(
+            self.url, {"page_size": 2}, HTTP_AUTHORIZATION=self.auth_header_str
+        )
+        titles = [quiz["title"] for quiz in response.data["results"]]
+        while response.data["next"]:
+            response = client.get(
+                response.data["next"], HTTP_AUTHORIZATION=self.auth_header_str
+            )
+            titles += [quiz["title"] for quiz in response.data["results"]]
+
+        assert titles == [f"quiz {i}" for i in range(5)]
+
+    def test_cursor_is_opaque(self, client):
+        response = client.get(
+            self.url, {"page_size": 2}, HTTP_AUTHORIZATION=self.auth_header_str
+        )
+        assert "cursor=" in response.data["next"]
+        assert "id" not in response.data["next"].split("cursor=")[1]
+
+    def test_invalid_cursor_returns_404(self, client):
+        response = client.get(
+            self.url, {"cursor": "garbage"}, HTTP_AUTHORIZATION=self.auth_header_str
+        )
+        assert response.status_code == 404
+
+    def test_page_size_is_capped(self, client, settings):
+        settings.API_MAX_PAGE_SIZE = 3
+        response = client.get(
+            self.url, {"page_size": 100}, HTTP_AUTHORIZATION=self.auth_header_str
+        )
+        assert len(response.data["results"]) == 3
+
+    def all_titles(self, client, **params):
+        response = client.get(
+            self.url,
+            {"page_size": 2, **params},
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+        assert response.status_code == 200
+        titles = [quiz["title"] for quiz in response.data["results"]]
+        while response.data["next"]:
+            response = client.get(
+                response.data["next"], HTTP_AUTHORIZATION=self.auth_header_str
+            )
+            titles += [quiz["title"] for quiz in response.data["results"]]
+        return titles
+
+    def test_quizes_can_be_ordered_and_filtered_by_size(self, client):
+        sizes = {"quiz 0": 2, "quiz 1": 0, "quiz 2": 2, "quiz 3": 1, "quiz 4": 2}
+        for quiz in Quiz.objects.all():
+            for i in range(sizes[quiz.title]):
+                Question.objects.create(title=f"question {i}", quiz=quiz)
+
+        assert self.all_titles(client, ordering="question_count") == [
+            "quiz 1",
+            "quiz 3",
+            "quiz 0",
+            "quiz 2",
+            "quiz 4",
+        ]
+        assert self.all_titles(client, ordering="-question_count") == [
+            "quiz 4",
+            "quiz 2",
+            "quiz 0",
+            "quiz 3",
+            "quiz 1",
+        ]
+        assert self.all_titles(client, min_questions=1, max_questions=1) == ["quiz 3"]
+        assert self.all_titles(client, min_questions=2, ordering="-question_count") == [
+            "quiz 4",
+            "quiz 2",
+            "quiz 0",
+        ]
+
+    def test_size_ordering_and_filters_are_validated(self, client):
+        for params in ({"ordering": "title"}, {"min_questions": -1}):
+            response = client.get(
+                self.url, params, HTTP_AUTHORIZATION=self.auth_header_str
+            )
+            assert response.status_code == 400
+            assert set(response.data) == set(params)
+
+
+@pytest.mark.django_db
+class TestAttempts:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="aasdfew23")
+        self.token = Token.objects.get(user=self.user)
+        self.auth_header_str = f"Token {self.token.key}"
+        self.quiz = create_quiz_tree(self.user, "quiz", questions=100, answers=2)
+        Answer.objects.filter(question__quiz=self.quiz, title="answer 0").update(
+            correct=True
+        )
+
+    def start_attempt(self, client):
+        response = client.post(
+            reverse("quizes:attempts", args=[self.quiz.id]),
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+        assert response.status_code == 201
+        return response.data["id"]
+
+    def test_start_attempt_of_missing_quiz_returns_404(self, client):
+        response = client.post(
+            reverse("quizes:attempts", args=[self.quiz.id + 1]),
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+        assert response.status_code == 404
+
+    def test_submit_grades_the_attempt(self, client, django_assert_max_num_queries):
+        attempt_id = self.start_attempt(client)
+        answer_ids = list(
+            Answer.objects.filter(question__quiz=self.quiz)
+            .order_by("id")
+            .values_list("id", flat=True)[::2]
+        )
+        url = reverse("quizes:attempt_submit", args=[self.quiz.id, attempt_id])
+
+        # grading 100 questions costs a constant number of queries, the quiz
+        # version is read around caching the answer key
+        with django_assert_max_num_queries(22):
+            response = client.post(
+                url,
+                {"answers": answer_ids[:60]},
+                content_type="application/json",
+                HTTP_AUTHORIZATION=self.auth_header_str,
+            )
+
+        assert response.status_code == 200
+        assert response.data["score"] == 60
+        assert response.data["total"] == 100
+
+        detail_url = reverse("quizes:attempt_detail", args=[self.quiz.id, attempt_id])
+        response = client.get(detail_url, HTTP_AUTHORIZATION=self.auth_header_str)
+        assert response.data["score"] == 60
+
+    def test_submitting_twice_returns_409(self, client):
+        attempt_id = self.start_attempt(client)
+        url = reverse("quizes:attempt_submit", args=[self.quiz.id, attempt_id])
+        client.post(
+            url,
+            {"answers": []},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+        response = client.post(
+            url,
+            {"answers": []},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+        assert response.status_code == 409
+
+    def test_submitting_unknown_answers_returns_400(self, client):
+        attempt_id = self.start_attempt(client)
+        url = reverse("quizes:attempt_submit", args=[self.quiz.id, attempt_id])
+        response = client.post(
+            url,
+            {"answers": [0]},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+        assert response.status_code == 400
+        assert Attempt.objects.get(pk=attempt_id).submitted_at is None
+
+    def test_attempts_of_other_users_are_hidden(self, client):
+        attempt_id = self.start_attempt(client)
+        other = User.objects.create_user(email="c@d.com", password="aasdfew23")
+        other_token = Token.objects.get(user=other)
+
+        response = client.get(
+            reverse("quizes:attempt_detail", args=[self.quiz.id, attempt_id]),
+            HTTP_AUTHORIZATION=f"Token {other_token.key}",
+        )
+        assert response.status_code == 404
+
+    def test_leaderboard_shows_top_scores_and_own_rank(self, client):
+        attempt_id = self.start_attempt(client)
+        answer_ids = Answer.objects.filter(
+            question__quiz=self.quiz, correct=True
+        ).values_list("id", flat=True)
+        client.post(
+            reverse("quizes:attempt_submit", args=[self.quiz.id, attempt_id]),
+            {"answers": list(answer_ids)},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+
+        response = client.get(
+            reverse("quizes:leaderboard", args=[self.quiz.id]),
+            {"limit": 5},
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+
+        assert response.status_code == 200
+        assert response.data["top"][0]["user"] == self.user.id
+        assert response.data["top"][0]["score"] == 100
+        assert response.data["me"]["rank"] == 1
+
+    def test_leaderboard_without_attempts_is_empty(self, client):
+        response = client.get(
+            reverse("quizes:leaderboard", args=[self.quiz.id]),
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+
+        assert response.data == {"top": [], "me": None}
+
+    def test_stats_report_answer_distribution(self, client, django_assert_num_queries):
+        answer = Answer.objects.filter(question__quiz=self.quiz).order_by("id").first()
+        for _ in range(3):
+            attempt_id = self.start_attempt(client)
+            client.post(
+                reverse("quizes:attempt_submit", args=[self.quiz.id, attempt_id]),
+                {"answers": [answer.id]},
+                content_type="application/json",
+                HTTP_AUTHORIZATION=self.auth_header_str,
+            )
+
+        # token lookup is cached: quiz, questions, answers whatever the attempts
+        with django_assert_num_queries(3):
+            response = client.get(
+                reverse("quizes:quiz_stats", args=[self.quiz.id]),
+                HTTP_AUTHORIZATION=self.auth_header_str,
+            )
+
+        assert response.status_code == 200
+        assert response.data["submissions"] == 3
+        question = response.data["questions"][0]
+        assert question["answered"] == 3
+        assert question["answers"][0]["selected"] == 3
+        assert response.data["questions"][1]["answered"] == 0
+
+    def test_stats_are_only_visible_to_the_quiz_author(self, client):
+        other = User.objects.create_user(email="c@d.com", password="aasdfew23")
+        other_token = Token.objects.get(user=other)
+
+        response = client.get(
+            reverse("quizes:quiz_stats", args=[self.quiz.id]),
+            HTTP_AUTHORIZATION=f"Token {other_token.key}",
+        )
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestQuizFieldsets:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="aasdfew23")
+        self.token = Token.objects.get(user=self.user)
+        self.auth_header_str = f"Token {self.token.key}"
+        self.quiz = create_quiz_tree(self.user, "quiz1", questions=2, answers=2)
+        create_quiz_tree(self.user, "quiz2", questions=1, answers=1)
+
+    def get_list(self, client, query):
+        url = reverse("quizes:quizes_list") + query
+        return client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+    def test_fields_trim_the_payload_and_the_queries(
+        self, client, django_assert_num_queries
+    ):
+        # token, list etag and the quizes, no question or answer loads
+        with django_assert_num_queries(3):
+            response = self.get_list(client, "?fields=id,title")
+
+        assert response.status_code == 200
+        assert response.data["results"] == [
+            {"id": self.quiz.id, "title": "quiz1"},
+            {"id": self.quiz.id + 1, "title": "quiz2"},
+        ]
+
+    def test_nested_fields_load_only_the_levels_they_need(
+        self, client, django_assert_num_queries
+    ):
+        with django_assert_num_queries(4):
+            response = self.get_list(client, "?fields=title,questions.title")
+
+        assert response.data["results"][0] == {
+            "title": "quiz1",
+            "questions": [{"title": "question 0"}, {"title": "question 1"}],
+        }
+
+    def test_expand_nests_only_the_listed_relations(
+        self, client, django_assert_num_queries
+    ):
+        with django_assert_num_queries(4):
+            response = self.get_list(client, "?expand=questions")
+        question = response.data["results"][0]["questions"][0]
+        assert set(question) == {"id", "title", "quiz"}
+
+        response = self.get_list(client, "?expand=")
+        assert set(response.data["results"][0]) == {"id", "title", "user"}
+
+        response = self.get_list(client, "?expand=questions.answers")
+        answers = response.data["results"][0]["questions"][0]["answers"]
+        assert [answer["title"] for answer in answers] == ["answer 0", "answer 1"]
+
+    def test_summary_view_counts_questions(self, client, django_assert_num_queries):
+        with django_assert_num_queries(3):
+            response = self.get_list(client, "?view=summary")
+
+        assert response.data["results"] == [
+            {
+                "id": self.quiz.id,
+                "title": "quiz1",
+                "user": self.user.id,
+                "question_count": 2,
+                "answer_count": 4,
+            },
+            {
+                "id": self.quiz.id + 1,
+                "title": "quiz2",
+                "user": self.user.id,
+                "question_count": 1,
+                "answer_count": 1,
+            },
+        ]
+
+        response = self.get_list(client, "?view=summary&fields=title,question_count")
+        assert response.data["results"][1] == {"title": "quiz2", "question_count": 1}
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "?fields=id,nope",
+            "?expand=answers",
+            "?view=full",
+            "?view=summary&expand=questions",
+        ],
+    )
+    def test_unknown_names_are_rejected(self, client, query):
+        response = self.get_list(client, query)
+        assert response.status_code == 400
+
+    def test_trimmed_detail_has_its_own_etag(self, client):
+        url = reverse("quizes:quiz_detail", args=[self.quiz.id])
+        full = client.get(url, HTTP_AUTHORIZATION=self.auth_header_str)
+        response = client.get(
+            url + "?fields=title", HTTP_AUTHORIZATION=self.auth_header_str
+        )
+
+        assert response.status_code == 200
+        assert response.data == {"title": "quiz1"}
+        assert response["ETag"] != full["ETag"]
+
+        response = client.get(
+            url + "?fields=title",
+            HTTP_AUTHORIZATION=self.auth_header_str,
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        assert response.status_code == 304
+
+        response = client.get(
+            reverse("quizes:quiz_detail", args=[self.quiz.id + 100]) + "?fields=title",
+            HTTP_AUTHORIZATION=self.auth_header_str,
+        )
+        assert response.status_code == 404
+
+
+class TestQuizCacheCheck:
+    def test_local_memory_cache_fails_with_several_processes(self, settings):
+        assert checks.check_quiz_cache(None) == []
+
+        settings.WEB_CONCURRENCY = 2
+        errors = checks.check_quiz_cache(None)
+        assert [error.id for error in errors] == ["quizes.E001"]
+
+    def test_shared_cache_passes(self, settings, tmp_path):
+        settings.WEB_CONCURRENCY = 2
+        settings.CACHES = {
+            **settings.CACHES,
+            "quizes": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": str(tmp_path),
+            },
+        }
+        assert checks.check_quiz_cache(None) == []
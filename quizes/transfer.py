@@ -0,0 +1,244 @@
+"""Streaming export and import of a user's quiz bank.
+
+Both formats describe the same flat records, ordered quiz by quiz and question by
+question, so neither side ever holds more than one question (export) or one batch
+(import) in memory:
+
+* NDJSON: one object per question,
+  `{"quiz": ..., "question": ..., "answers": [{"title": ..., "correct": ...}]}`
+  (`question` is null for a quiz without questions)
+* CSV: one row per answer with the columns `quiz,question,answer,correct`
+  (trailing columns are empty for questions without answers and empty quizes)
+"""
+
+import csv
+import io
+import json
+from itertools import groupby
+
+from django.db import transaction
+
+from .models import Quiz, Question, Answer, touch_quizes
+
+CSV_COLUMNS = ["quiz", "question", "answer", "correct"]
+
+
+def export_rows(user, chunk_size=2000):
+    """Yield (quiz, question, answer, correct) tuples of every quiz of `user`
+
+    A single LEFT JOINed query streamed from a server side cursor, quizes without
+    questions and questions without answers come back with trailing Nones.
+    """
+    return (
+        Quiz.objects.filter(user=user)
+        .order_by("id", "question__id", "question__answer__id")
+        .values_list(
+            "title",
+            "question__title",
+            "question__answer__title",
+            "question__answer__correct",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _group_questions(rows):
+    for (quiz, question), group in groupby(rows, key=lambda row: row[:2]):
+        answers = [
+            {"title": answer, "correct": correct}
+            for _, _, answer, correct in group
+            if answer is not None
+        ]
+        yield quiz, question, answers
+
+
+def to_ndjson(rows):
+    for quiz, question, answers in _group_questions(rows):
+        record = {"quiz": quiz, "question": question, "answers": answers}
+        yield json.dumps(record) + "\n"
+
+
+def to_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+    for quiz, question, answer, correct in rows:
+        writer.writerow([quiz, question or "", answer or "", _csv_bool(correct)])
+        yield flush()
+
+
+def _csv_bool(value):
+    if value is None:
+        return ""
+    return "true" if value else "false"
+
+
+def _decode(lines):
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        yield line
+
+
+def _title(value, model):
+    """`value` when it is a title the model accepts, raises ValueError otherwise"""
+    max_length = model._meta.get_field("title").max_length
+    if not isinstance(value, str) or not value.strip() or len(value) > max_length:
+        raise ValueError(f"Invalid {model._meta.model_name} title")
+    return value
+
+
+def _record(quiz, question, answers):
+    """Validate the titles of a record, answers need a question"""
+    if question is None and answers:
+        raise ValueError("Answers without a question")
+    return (
+        _title(quiz, Quiz),
+        None if question is None else _title(question, Question),
+        [{**answer, "title": _title(answer["title"], Answer)} for answer in answers],
+    )
+
+
+def parse_ndjson(lines):
+    """Yield (quiz, question, answers) records from NDJSON lines"""
+    for number, line in enumerate(_decode(lines), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            answers = [
+                {"title": answer["title"], "correct": bool(answer.get("correct"))}
+                for answer in record.get("answers") or []
+            ]
+            record = _record(record["quiz"], record.get("question"), answers)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise ValueError(f"Invalid record on line {number}")
+        yield record
+
+
+def parse_csv(lines):
+    """Yield (quiz, question, answers) records from CSV lines"""
+    reader = csv.DictReader(_decode(lines))
+    if reader.fieldnames != CSV_COLUMNS:
+        raise ValueError(f"CSV header must be: {','.join(CSV_COLUMNS)}")
+
+    def rows():
+        for row in reader:
+            answers = []
+            if row["answer"]:
+                correct = (row["correct"] or "").lower() == "true"
+                answers.append({"title": row["answer"], "correct": correct})
+            try:
+                record = _record(row["quiz"], row["question"] or None, answers)
+            except ValueError:
+                raise ValueError(f"Invalid record on line {reader.line_num}")
+            yield record
+
+    for (quiz, question), group in groupby(rows(), key=lambda row: row[:2]):
+        yield quiz, question, [answer for _, _, answers in group for answer in answers]
+
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", to_ndjson, parse_ndjson),
+    "csv": ("text/csv", to_csv, parse_csv),
+}
+
+
+class QuizImporter:
+    """Adds parsed records to a user's quizes, inserting in batches of questions
+
+    Quizes are matched by title and created when missing. Questions and answers
+    that already exist are skipped, and left out of the counts, so re-running an
+    import is harmless.
+    """
+
+    def __init__(self, user, batch_size=500):
+        self.user = user
+        self.batch_size = batch_size
+        self.quiz_ids = {}
+        self.pending = []
+        self.counts = {"quizes": 0, "questions": 0, "answers": 0}
+
+    def run(self, records):
+        for quiz, question, answers in records:
+            self.add(quiz, question, answers)
+        self.flush()
+        return self.counts
+
+    def add(self, quiz, question, answers):
+        quiz_id = self.quiz_ids.get(quiz)
+        if quiz_id is None:
+            quiz_id = self.quiz_ids[quiz] = self._get_or_create_quiz(quiz)
+        if question is None:
+            return
+        self.pending.append((quiz_id, question, answers))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def _get_or_create_quiz(self, title):
+        quiz, created = Quiz.objects.get_or_create(title=title, user=self.user)
+        self.counts["quizes"] += created
+        return quiz.id
+
+    @transaction.atomic
+    def flush(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        quiz_ids = {quiz_id for quiz_id, _, _ in pending}
+        titles = {title for _, title, _ in pending}
+
+        # rows that already exist are left out, so that the counts are of the
+        # rows inserted; ignore_conflicts still covers concurrent imports
+        question_ids = self._question_ids(quiz_ids, titles)
+        existing = set()
+        if question_ids:
+            # questions inserted below have no answers yet
+            existing = set(
+                Answer.objects.filter(
+                    question_id__in=question_ids.values()
+                ).values_list("question_id", "title")
+            )
+        questions = [
+            Question(quiz_id=quiz_id, title=title)
+            for quiz_id, title in dict.fromkeys(
+                (quiz_id, title) for quiz_id, title, _ in pending
+            )
+            if (quiz_id, title) not in question_ids
+        ]
+        if questions:
+            Question.objects.bulk_create(questions, ignore_conflicts=True)
+            question_ids = self._question_ids(quiz_ids, titles)
+
+        answers = {}
+        for quiz_id, title, question_answers in pending:
+            question_id = question_ids[(quiz_id, title)]
+            for answer in question_answers:
+                key = (question_id, answer["title"])
+                if key not in existing and key not in answers:
+                    answers[key] = Answer(
+                        question_id=question_id,
+                        title=answer["title"],
+                        correct=answer["correct"],
+                    )
+        Answer.objects.bulk_create(answers.values(), ignore_conflicts=True)
+
+        self.counts["questions"] += len(questions)
+        self.counts["answers"] += len(answers)
+        touch_quizes(quiz_ids, recount=True)
+
+    def _question_ids(self, quiz_ids, titles):
+        return {
+            (quiz_id, title): pk
+            for pk, quiz_id, title in Question.objects.filter(
+                quiz_id__in=quiz_ids, title__in=titles
+            ).values_list("id", "quiz_id", "title")
+        }
@@ -1,15 +1,47 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views
+
+    quiz_list = async_views.quiz_list
+    quiz_detail = async_views.quiz_detail
+    questions = async_views.questions
+    answers = async_views.answers
+else:
+    quiz_list = views.QuizListCreate.as_view()
+    quiz_detail = views.QuizDetail.as_view()
+    questions = views.QuestionListCreate.as_view()
+    answers = views.AnswerListCreate.as_view()
+
 app_name = "quizes"
 urlpatterns = [
-    path("", views.QuizListCreate.as_view(), name="quizes_list"),
-    path("<int:pk>/", views.QuizDetail.as_view(), name="quiz_detail"),
-    path("<int:pk>/questions/", views.QuestionListCreate.as_view(), name="questions"),
+    path("", quiz_list, name="quizes_list"),
+    path("bulk/", views.QuizBulkCreate.as_view(), name="quiz_bulk_create"),
+    path("search/", views.QuizSearch.as_view(), name="search"),
+    path("export/<str:file_format>/", views.QuizExport.as_view(), name="export"),
+    path("import/<str:file_format>/", views.QuizImport.as_view(), name="import"),
+    path(
+        "import/jobs/<int:job_pk>/",
+        views.QuizImportJob.as_view(),
+        name="import_job",
+    ),
+    path("<int:pk>/", quiz_detail, name="quiz_detail"),
+    path("<int:pk>/questions/", questions, name="questions"),
+    path("<int:pk>/questions/<int:question_pk>/", answers, name="answers"),
+    path("<int:pk>/attempts/", views.AttemptCreate.as_view(), name="attempts"),
+    path(
+        "<int:pk>/attempts/<int:attempt_pk>/",
+        views.AttemptDetail.as_view(),
+        name="attempt_detail",
+    ),
     path(
-        "<int:pk>/questions/<int:question_pk>/",
-        views.AnswerListCreate.as_view(),
-        name="answers",
+        "<int:pk>/attempts/<int:attempt_pk>/submit/",
+        views.AttemptSubmit.as_view(),
+        name="attempt_submit",
     ),
+    path("<int:pk>/leaderboard/", views.Leaderboard.as_view(), name="leaderboard"),
+    path("<int:pk>/stats/", views.QuizStats.as_view(), name="quiz_stats"),
 ]
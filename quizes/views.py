@@ -1,31 +1,308 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from django.db.models import Count, Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from config import compression
+from config.timing import measure
+from jobs.models import Job
 
-from .models import Quiz, Question, Answer
+from .fieldsets import Fieldset
+from .models import Quiz, Question, Answer, Attempt
+from . import cache
+from . import deletion
+from . import grading
+from . import leaderboard
+from . import pagination
+from . import sampling
+from . import search
 from . import serializers
+from . import tasks
+from . import transfer
+
+
+def quiz_etag(quiz_id, version, shape=None):
+    if shape:
+        return f'"{quiz_id}-{version}-{shape}"'
+    return f'"{quiz_id}-{version}"'
+
+
+def not_modified(request, etag, modified_at=None):
+    """Return a 304 response when the client's copy is still current, else None"""
+    last_modified = int(modified_at.timestamp()) if modified_at else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        response["ETag"] = etag
+    return response
+
+
+def quiz_list_etag(request):
+    # versions only ever grow and ids are never reused, so these aggregates
+    # change with every create, delete or edit of the user's quizes
+    stamp = Quiz.objects.filter(user=request.user).aggregate(
+        count=Count("id"), ids=Sum("id"), versions=Sum("version")
+    )
+    key = f"{request.user.pk}:{stamp}:{request.get_full_path()}"
+    return f'"{hashlib.md5(key.encode()).hexdigest()}"'
+
+
+def quiz_list_queryset(request):
+    """Quizes of the logged in user within `?min_questions=`/`?max_questions=`"""
+    params = serializers.QuizListParams(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    bounds = {
+        "min_questions": "question_count__gte",
+        "max_questions": "question_count__lte",
+    }
+    queryset = Quiz.objects.filter(user=request.user)
+    for name, lookup in bounds.items():
+        if name in params.validated_data:
+            queryset = queryset.filter(**{lookup: params.validated_data[name]})
+    return queryset
+
+
+def check_quiz_version(request, pk, shape=None):
+    """Answer a conditional request from the quiz row alone, None if that fails"""
+    conditional = {"HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE"}
+    if conditional.isdisjoint(request.META):
+        return None
+    stamp = Quiz.objects.filter(pk=pk).values_list("version", "modified_at").first()
+    if stamp is None:
+        return None
+    return not_modified(request, quiz_etag(pk, stamp[0], shape), stamp[1])
+
+
+def build_quiz_document(quiz):
+    """Render, compress and cache the document of a quiz loaded with_questions()
+
+    The variants are compressed at the fast per-request levels, a job swaps
+    them for smaller ones compressed at the stored levels.
+    """
+    data = serializers.Quiz(quiz).data
+    with measure("render"):
+        document = api_settings.DEFAULT_RENDERER_CLASSES[0]().render(data)
+    with measure("compress"):
+        variants = compression.compress_all(document)
+    cached = (quiz.version, quiz.modified_at, document, variants)
+    cache.set_quiz_document(quiz.pk, *cached)
+    if variants:
+        tasks.recompress_quiz_document.delay(quiz_id=quiz.pk, version=quiz.version)
+    return cached
+
+
+def load_shaped_quiz(request, pk, fieldset):
+    """The quiz and its data trimmed to `fieldset`, or a 304; raises Http404"""
+    response = check_quiz_version(request, pk, fieldset.key)
+    if response is not None:
+        return response
+    quiz = get_object_or_404(fieldset.queryset(Quiz.objects.all()), pk=pk)
+    return quiz, fieldset.serializer(quiz).data
+
+
+def set_quiz_validators(response, quiz, shape=None):
+    response["ETag"] = quiz_etag(quiz.pk, quiz.version, shape)
+    response["Last-Modified"] = http_date(quiz.modified_at.timestamp())
+    return response
+
+
+def quiz_document_response(request, pk, cached):
+    """Answer with the cached document, in the best encoding the client accepts"""
+    version, modified_at, document, variants = cached
+    encoding = compression.negotiate(request.META.get("HTTP_ACCEPT_ENCODING"))
+    etag = quiz_etag(pk, version)
+    response = not_modified(request, etag, modified_at)
+    if response is None:
+        response = HttpResponse(document, content_type="application/json")
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(modified_at.timestamp())
+        if encoding in variants:
+            compression.encode_response(response, encoding, variants[encoding])
+    elif encoding in variants:
+        compression.weak_etag(response)
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
 
 
 class QuizListCreate(generics.ListCreateAPIView):
     serializer_class = serializers.Quiz
+    pagination_class = pagination.QuizCursorPagination
 
     def get_queryset(self):
-        return Quiz.objects.filter(user=self.request.user)
+        return quiz_list_queryset(self.request)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        """Answer 304 when no quiz of the user changed since the client's copy
+
+        The payload and the queries behind it follow `?fields=`, `?expand=` and
+        `?view=summary`, see quizes.fieldsets. `?min_questions=`,
+        `?max_questions=` and `?ordering=question_count` select and sort by
+        size from the quiz rows alone, see models.touch_quizes.
+        """
+        fieldset = Fieldset.from_request(request)
+        etag = quiz_list_etag(request)
+        response = not_modified(request, etag)
+        if response is None:
+            page = self.paginate_queryset(fieldset.queryset(self.get_queryset()))
+            serializer = fieldset.serializer(
+                page, many=True, context=self.get_serializer_context()
+            )
+            response = self.get_paginated_response(serializer.data)
+            response["ETag"] = etag
+        return response
+
+
+class QuizSearch(generics.ListAPIView):
+    """Quizes of the logged in user matching `?q=`, best match first
+
+    Titles of the quiz, its questions and its answers are searched, see
+    quizes.search.
+    """
+
+    serializer_class = serializers.SearchResult
+    pagination_class = pagination.RankedPagination
+
+    def get_queryset(self):
+        query = self.request.query_params.get("q", "")
+        if not search.terms(query):
+            raise ValidationError({"q": ["Enter at least one word to search for."]})
+        return search.search_quizes(self.request.user, query)
+
+
+class QuizBulkCreate(generics.CreateAPIView):
+    """Creates a quiz together with all of its questions and answers"""
+
+    serializer_class = serializers.NestedQuiz
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quiz = serializer.save()
+        quiz = Quiz.objects.with_questions().get(pk=quiz.pk)
+        return Response(serializers.Quiz(quiz).data, status=201)
+
+
+class QuizExport(APIView):
+    """Streams every quiz of the logged in user as NDJSON or CSV"""
+
+    def get(self, request, file_format):
+        if file_format not in transfer.FORMATS:
+            return Response({"detail": "Unsupported format."}, status=404)
+        content_type, encode, _ = transfer.FORMATS[file_format]
+        rows = transfer.export_rows(request.user)
+        response = StreamingHttpResponse(encode(rows), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="quizes.{file_format}"'
+        return response
+
+
+class QuizImport(APIView):
+    """Stores an NDJSON or CSV request body and queues a job importing it
+
+    The body is copied to the default file storage chunk by chunk, the job
+    parses it line by line, see tasks.import_quizes.
+    """
+
+    def post(self, request, file_format):
+        if file_format not in transfer.FORMATS:
+            return Response({"detail": "Unsupported format."}, status=404)
+        name = f"{settings.QUIZ_IMPORT_DIR}/{uuid.uuid4().hex}.{file_format}"
+        body = File(request.stream) if request.stream else ContentFile(b"")
+        path = default_storage.save(name, body)
+        job = tasks.import_quizes.delay(
+            user_id=request.user.pk, path=path, file_format=file_format
+        )
+        data = serializers.ImportJob(job).data
+        location = reverse("quizes:import_job", args=[job.pk])
+        return Response(data, status=202, headers={"Location": location})
+
+
+class QuizImportJob(generics.RetrieveAPIView):
+    """Status of an import queued by the logged in user, its counts once done"""
+
+    serializer_class = serializers.ImportJob
+    lookup_url_kwarg = "job_pk"
+
+    def get_queryset(self):
+        return Job.objects.filter(
+            name=tasks.import_quizes.name, kwargs__user_id=self.request.user.pk
+        )
+
 
 class QuizDetail(generics.RetrieveDestroyAPIView):
-    queryset = Quiz.objects.all()
+    queryset = Quiz.objects.with_questions()
     serializer_class = serializers.Quiz
 
+    def retrieve(self, request, *args, **kwargs):
+        """Serve the pre-rendered quiz document, building it on a cache miss
+
+        Conditional requests are answered from the quiz version alone: from the
+        cache on a hit, from the quiz row (no questions or answers) on a miss.
+        Trimmed payloads (`?fields=`, `?expand=`, `?view=`) skip the cache.
+        """
+        pk = self.kwargs["pk"]
+        fieldset = Fieldset.from_request(request)
+        if not fieldset.is_default:
+            loaded = load_shaped_quiz(request, pk, fieldset)
+            if isinstance(loaded, HttpResponse):
+                return loaded
+            quiz, data = loaded
+            return set_quiz_validators(Response(data), quiz, fieldset.key)
+
+        cached = cache.get_quiz_document(pk)
+        if cached is None:
+            response = check_quiz_version(request, pk)
+            if response is not None:
+                return response
+            cached = build_quiz_document(self.get_object())
+        return quiz_document_response(request, pk, cached)
+
+    def destroy(self, request, *args, **kwargs):
+        """Hide the quiz at once and delete its tree in chunks, see quizes.deletion
+
+        With `Prefer: respond-async` the tree is deleted by a job (see the jobs
+        app) and the response is a 202 right away.
+        """
+        quiz = get_object_or_404(Quiz.objects.only("id"), pk=self.kwargs["pk"])
+        deletion.mark_deleted(quiz.pk)
+        if "respond-async" in request.headers.get("Prefer", ""):
+            tasks.purge_quiz.delay(quiz_id=quiz.pk)
+            return Response(status=202, headers={"Preference-Applied": "respond-async"})
+        deletion.purge(quiz.pk)
+        return Response(status=204)
+
 
 class QuestionListCreate(generics.ListCreateAPIView):
     serializer_class = serializers.Question
 
     def get_queryset(self):
-        return Question.objects.filter(quiz__id=self.kwargs["pk"])
+        return (
+            Question.objects.filter(
+                quiz__id=self.kwargs["pk"], quiz__deleted_at__isnull=True
+            )
+            .with_answers()
+            .order_by("id")
+        )
+
+    def list(self, request, *args, **kwargs):
+        """Questions page by page, or `?sample=n` random ones, see quizes.sampling"""
+        if "sample" in request.query_params:
+            return Response(sampling.from_request(request, self.kwargs["pk"]))
+        return super().list(request, *args, **kwargs)
 
     def create(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -42,7 +319,10 @@ class AnswerListCreate(generics.ListCreateAPIView):
     serializer_class = serializers.Answer
 
     def get_queryset(self):
-        return Answer.objects.filter(question__id=self.kwargs["question_pk"])
+        return Answer.objects.filter(
+            question__id=self.kwargs["question_pk"],
+            question__quiz__deleted_at__isnull=True,
+        ).order_by("id")
 
     def create(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -55,3 +335,73 @@ class AnswerListCreate(generics.ListCreateAPIView):
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=201)
+
+
+class AttemptCreate(generics.CreateAPIView):
+    """Starts a new attempt of the quiz for the logged in user"""
+
+    serializer_class = serializers.Attempt
+
+    def perform_create(self, serializer):
+        quiz = get_object_or_404(Quiz.objects.only("id"), pk=self.kwargs["pk"])
+        serializer.save(quiz=quiz, user=self.request.user)
+
+
+class UserAttemptMixin:
+    serializer_class = serializers.Attempt
+    lookup_url_kwarg = "attempt_pk"
+
+    def get_queryset(self):
+        return Attempt.objects.filter(quiz_id=self.kwargs["pk"], user=self.request.user)
+
+
+class AttemptDetail(UserAttemptMixin, generics.RetrieveAPIView):
+    """Shows an attempt of the logged in user, with its score once submitted"""
+
+
+class AttemptSubmit(UserAttemptMixin, generics.GenericAPIView):
+    """Grades the selected answer ids of an attempt and returns the score"""
+
+    def post(self, request, *args, **kwargs):
+        attempt = self.get_object()
+        submission = serializers.AttemptSubmission(data=request.data)
+        submission.is_valid(raise_exception=True)
+        try:
+            grading.submit_attempt(attempt, submission.validated_data["answers"])
+        except ValueError as error:
+            return Response({"answers": [str(error)]}, status=400)
+        except grading.AlreadySubmitted:
+            return Response({"detail": "Attempt was already submitted."}, status=409)
+        return Response(self.get_serializer(attempt).data)
+
+
+class Leaderboard(APIView):
+    """Top scores of a quiz plus the rank of the logged in user"""
+
+    max_limit = 100
+
+    def get(self, request, pk):
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), self.max_limit)
+        except ValueError:
+            return Response({"limit": ["A valid integer is required."]}, status=400)
+
+        get_object_or_404(Quiz.objects.only("id"), pk=pk)
+        me = leaderboard.rank_of(pk, request.user.pk)
+        return Response(
+            {
+                "top": serializers.LeaderboardEntry(
+                    leaderboard.top(pk, max(limit, 0)), many=True
+                ).data,
+                "me": serializers.LeaderboardEntry(me).data if me else None,
+            }
+        )
+
+
+class QuizStats(generics.RetrieveAPIView):
+    """How often each answer of the quiz was picked, visible to its author only"""
+
+    serializer_class = serializers.QuizStats
+
+    def get_queryset(self):
+        return Quiz.objects.filter(user=self.request.user).with_questions()
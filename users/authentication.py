@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+
+from . import tokens
+
+
+def _token_marker(key):
+    return f"token-auth:token:{key}"
+
+
+def _user_marker(user_id):
+    return f"token-auth:user:{user_id}"
+
+
+def _deleted_user_marker(user_id):
+    return f"token-auth:deleted-user:{user_id}"
+
+
+def _shared_cache():
+    return caches[settings.TOKEN_AUTH_SHARED_CACHE]
+
+
+class TokenCache:
+    """Thread safe LRU map of token key -> (user, token, time it was cached)"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[2] > settings.TOKEN_AUTH_CACHE_TTL:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, user, token):
+        with self._lock:
+            self._entries[key] = (user, token, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.TOKEN_AUTH_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def revoke_cached_token(key):
+    """Stop every process from serving `key` out of its local token cache"""
+    token_cache.discard(key)
+    _shared_cache().set(_token_marker(key), time.time(), settings.TOKEN_AUTH_CACHE_TTL)
+
+
+def revoke_cached_user(user_id):
+    """Stop every process from serving a stale copy of the user"""
+    _shared_cache().set(
+        _user_marker(user_id), time.time(), settings.TOKEN_AUTH_CACHE_TTL
+    )
+
+
+def revoke_deleted_user(user_id):
+    """Reject the signed access tokens of a deleted user until they all expired"""
+    _shared_cache().set(
+        _deleted_user_marker(user_id),
+        time.time(),
+        settings.SIGNED_TOKEN_ACCESS_LIFETIME,
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication remembering recently seen tokens in process memory.
+
+    Hits skip the token/user join; they are only checked against revocation
+    markers in the shared Django cache, which deleted tokens and saved users set.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is not None:
+            user, token, cached_at = entry
+            markers = _shared_cache().get_many(
+                [_token_marker(key), _user_marker(user.pk)]
+            )
+            if all(revoked_at < cached_at for revoked_at in markers.values()):
+                return user, token
+            token_cache.discard(key)
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """Authenticates `Authorization: Bearer <access token>` headers.
+
+    The token signature and age are checked, and the user id against the
+    markers `revoke_deleted_user` leaves in the shared cache, so no query is
+    made: `request.user` is a User instance carrying nothing but its primary
+    key. A marker evicted from the cache early lets the token through again,
+    writes referencing the user then fail.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid bearer header.")
+
+        try:
+            payload = tokens.read_access_token(auth[1].decode())
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed("Invalid or expired token.")
+
+        if _shared_cache().get(_deleted_user_marker(payload["uid"])) is not None:
+            raise exceptions.AuthenticationFailed("Invalid or expired token.")
+
+        user = get_user_model()(pk=payload["uid"])
+        user._state.adding = False
+        return user, payload
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,10 @@
+from django.core.checks import Tags, register
+
+from config.checks import shared_cache_errors
+
+
+@register(Tags.caches)
+def check_token_auth_shared_cache(app_configs, **kwargs):
+    # revocation markers that stay in one process leave the others serving
+    # deleted tokens from their local caches
+    return shared_cache_errors("TOKEN_AUTH_SHARED_CACHE", "users.E001")
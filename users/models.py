@@ -1,11 +1,17 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from rest_framework.authtoken.models import Token
 
+from .authentication import (
+    revoke_cached_token,
+    revoke_cached_user,
+    revoke_deleted_user,
+)
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None):
@@ -28,6 +34,8 @@ class UserManager(BaseUserManager):
 class User(AbstractBaseUser):
     email = models.EmailField(unique=True)
     is_admin = models.BooleanField(default=False)
+    # bumped to revoke every signed refresh token issued to the user
+    token_generation = models.PositiveIntegerField(default=0)
 
     objects = UserManager()
 
@@ -37,9 +45,36 @@ class User(AbstractBaseUser):
     def is_staff(self):
         return self.is_admin
 
+    def revoke_signed_tokens(self):
+        """Invalidate all signed refresh tokens issued so far"""
+        User.objects.filter(pk=self.pk).update(
+            token_generation=models.F("token_generation") + 1
+        )
+        self.refresh_from_db(fields=["token_generation"])
+
 
 # create a Token obj automatically after a user is created
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created:
         Token.objects.create(user=instance)
+
+
+# drop cached authentication results once a token or its user changes
+@receiver(post_delete, sender=Token)
+def revoke_deleted_token(sender, instance, **kwargs):
+    revoke_cached_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def revoke_changed_user(sender, instance, created=False, **kwargs):
+    if not created:
+        revoke_cached_user(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def revoke_access_of_deleted_user(sender, instance, **kwargs):
+    # signed access tokens are not looked up, so they need a marker of their own
+    user_id = instance.pk
+    transaction.on_commit(lambda: revoke_deleted_user(user_id))
@@ -0,0 +1,146 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+import pytest
+
+from rest_framework.authtoken.models import Token
+
+from users import checks, tokens
+from users.authentication import token_cache
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestCachedTokenAuthentication:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="sekrit123")
+        self.token = Token.objects.get(user=self.user)
+        self.auth_header_str = f"Token {self.token.key}"
+        self.url = reverse("quizes:quizes_list")
+
+    def test_repeat_requests_skip_the_token_query(
+        self, client, django_assert_num_queries
+    ):
+        client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        # only the quiz list ETag and page queries are left
+        with django_assert_num_queries(2):
+            response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        assert response.status_code == 200
+
+    def test_deleted_token_is_rejected(self, client):
+        client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        self.token.delete()
+
+        response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        assert response.status_code == 401
+
+    def test_changed_user_is_reloaded(self, client):
+        client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+        self.user.email = "new@b.com"
+        self.user.save()
+
+        response = client.get(self.url, HTTP_AUTHORIZATION=self.auth_header_str)
+
+        assert response.status_code == 200
+        assert token_cache.get(self.token.key)[0].email == "new@b.com"
+
+    def test_invalid_token_is_rejected(self, client):
+        response = client.get(self.url, HTTP_AUTHORIZATION="Token nope")
+        assert response.status_code == 401
+
+    def test_cache_evicts_least_recently_used_tokens(self, settings):
+        settings.TOKEN_AUTH_CACHE_MAX_ENTRIES = 2
+        token_cache.set("a", self.user, None)
+        token_cache.set("b", self.user, None)
+        token_cache.get("a")
+        token_cache.set("c", self.user, None)
+
+        assert token_cache.get("a") is not None
+        assert token_cache.get("b") is None
+
+    def test_cache_entries_expire(self, settings):
+        settings.TOKEN_AUTH_CACHE_TTL = -1
+        token_cache.set("a", self.user, None)
+
+        assert token_cache.get("a") is None
+
+
+@pytest.mark.django_db
+class TestSignedTokenAuthentication:
+    def setup_method(self):
+        self.user = User.objects.create_user(email="a@b.com", password="sekrit123")
+        self.url = reverse("quizes:quizes_list")
+
+    def test_valid_access_token_authenticates_without_queries(
+        self, client, django_assert_num_queries
+    ):
+        auth_header_str = f"Bearer {tokens.issue_access_token(self.user)}"
+
+        # only the quiz list ETag and page queries are left
+        with django_assert_num_queries(2):
+            response = client.get(self.url, HTTP_AUTHORIZATION=auth_header_str)
+
+        assert response.status_code == 200
+
+    def test_tampered_token_is_rejected(self, client):
+        token = tokens.issue_access_token(self.user)
+        response = client.get(self.url, HTTP_AUTHORIZATION=f"Bearer {token}x")
+
+        assert response.status_code == 401
+
+    def test_expired_token_is_rejected(self, client, settings):
+        settings.SIGNED_TOKEN_ACCESS_LIFETIME = -1
+        token = tokens.issue_access_token(self.user)
+        response = client.get(self.url, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        assert response.status_code == 401
+
+    def test_refresh_token_is_NOT_accepted_as_access_token(self, client):
+        token = tokens.issue_refresh_token(self.user)
+        response = client.get(self.url, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        assert response.status_code == 401
+
+
+@pytest.mark.django_db(transaction=True)
+def test_access_tokens_of_a_deleted_user_are_rejected(client):
+    user = User.objects.create_user(email="a@b.com", password="sekrit123")
+    auth_header_str = f"Bearer {tokens.issue_access_token(user)}"
+    url = reverse("quizes:quizes_list")
+    assert client.get(url, HTTP_AUTHORIZATION=auth_header_str).status_code == 200
+
+    user.delete()
+
+    assert client.get(url, HTTP_AUTHORIZATION=auth_header_str).status_code == 401
+    response = client.post(
+        url,
+        {"title": "quiz"},
+        content_type="application/json",
+        HTTP_AUTHORIZATION=auth_header_str,
+    )
+    assert response.status_code == 401
+
+
+class TestSharedCacheCheck:
+    def test_local_memory_cache_fails_with_several_processes(self, settings):
+        settings.WEB_CONCURRENCY = 2
+
+        errors = checks.check_token_auth_shared_cache(None)
+
+        assert [error.id for error in errors] == ["users.E001"]
+        assert "'default'" in errors[0].msg
+
+    def test_shared_or_single_process_caches_pass(self, settings, tmp_path):
+        assert checks.check_token_auth_shared_cache(None) == []
+
+        settings.WEB_CONCURRENCY = 4
+        settings.CACHES = {
+            **settings.CACHES,
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": str(tmp_path),
+            },
+        }
+        assert checks.check_token_auth_shared_cache(None) == []
@@ -4,6 +4,7 @@ import pytest
 
 from rest_framework.authtoken.models import Token
 
+from users import tokens
 from users.views import Register
 
 User = get_user_model()
@@ -81,3 +82,42 @@ class TestLoginView:
 
         assert response.status_code == 400
         assert "token" not in response.data
+
+
+@pytest.mark.django_db
+class TestSignedTokenViews:
+    def setup_method(self):
+        self.data = {"email": "a@b.com", "password": "sekrit123"}
+        self.user = User.objects.create_user(**self.data)
+
+    def test_login_also_returns_signed_token_pair(self, client):
+        response = client.post(
+            reverse("auth:login"),
+            {"username": self.data["email"], "password": self.data["password"]},
+        )
+
+        assert tokens.read_access_token(response.data["access"])["uid"] == self.user.pk
+        assert tokens.read_refresh_token(response.data["refresh"])["gen"] == 0
+
+    def test_refresh_returns_new_token_pair(self, client):
+        refresh = tokens.issue_refresh_token(self.user)
+        response = client.post(reverse("auth:refresh"), {"refresh": refresh})
+
+        assert response.status_code == 200
+        assert tokens.read_access_token(response.data["access"])["uid"] == self.user.pk
+
+    def test_refresh_with_invalid_token_returns_401(self, client):
+        response = client.post(reverse("auth:refresh"), {"refresh": "nope"})
+        assert response.status_code == 401
+
+    def test_revoke_invalidates_refresh_tokens(self, client):
+        refresh = tokens.issue_refresh_token(self.user)
+        access = tokens.issue_access_token(self.user)
+
+        response = client.post(
+            reverse("auth:revoke"), HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+        assert response.status_code == 204
+
+        response = client.post(reverse("auth:refresh"), {"refresh": refresh})
+        assert response.status_code == 401
@@ -0,0 +1,43 @@
+"""Signed, expiring tokens that are verified without touching the database.
+
+Access tokens carry only the user id and are trusted until they expire. Refresh
+tokens also carry the user's `token_generation`; they are checked against the
+database when exchanged, so bumping the generation revokes every refresh token
+and, once the short lived access tokens run out, all access as well.
+"""
+
+from django.conf import settings
+from django.core import signing
+
+ACCESS_SALT = "users.tokens.access"
+REFRESH_SALT = "users.tokens.refresh"
+
+
+def issue_access_token(user):
+    return signing.dumps({"uid": user.pk}, salt=ACCESS_SALT, compress=True)
+
+
+def issue_refresh_token(user):
+    return signing.dumps(
+        {"uid": user.pk, "gen": user.token_generation},
+        salt=REFRESH_SALT,
+        compress=True,
+    )
+
+
+def issue_token_pair(user):
+    return {"access": issue_access_token(user), "refresh": issue_refresh_token(user)}
+
+
+def read_access_token(token):
+    """Return the payload of a valid access token, raise signing.BadSignature if not"""
+    return signing.loads(
+        token, salt=ACCESS_SALT, max_age=settings.SIGNED_TOKEN_ACCESS_LIFETIME
+    )
+
+
+def read_refresh_token(token):
+    """Return the payload of a valid refresh token, raise signing.BadSignature if not"""
+    return signing.loads(
+        token, salt=REFRESH_SALT, max_age=settings.SIGNED_TOKEN_REFRESH_LIFETIME
+    )
@@ -8,4 +8,6 @@ app_name = "auth"
 urlpatterns = [
     path("register/", views.Register.as_view(), name="register"),
     path("login/", views.Login.as_view(), name="login"),
+    path("refresh/", views.Refresh.as_view(), name="refresh"),
+    path("revoke/", views.Revoke.as_view(), name="revoke"),
 ]
@@ -1,11 +1,14 @@
+from django.core import signing
 from rest_framework import generics
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import AllowAny
 
 from . import serializers
 from . import models
+from . import tokens
 
 
 class Register(generics.CreateAPIView):
@@ -28,4 +31,37 @@ class Login(ObtainAuthToken):
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data["user"]
         token = Token.objects.get(user=user)
-        return Response({"token": token.key, "email": user.email, "id": user.pk})
+        return Response(
+            {
+                "token": token.key,
+                "email": user.email,
+                "id": user.pk,
+                **tokens.issue_token_pair(user),
+            }
+        )
+
+
+class Refresh(APIView):
+    """Exchanges a signed refresh token for a fresh access/refresh token pair"""
+
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request, *args, **kwargs):
+        try:
+            payload = tokens.read_refresh_token(str(request.data.get("refresh")))
+        except signing.BadSignature:
+            return Response({"detail": "Invalid or expired refresh token."}, 401)
+
+        user = models.User.objects.filter(pk=payload["uid"]).first()
+        if user is None or user.token_generation != payload["gen"]:
+            return Response({"detail": "Refresh token has been revoked."}, 401)
+        return Response(tokens.issue_token_pair(user))
+
+
+class Revoke(APIView):
+    """Revokes every signed refresh token of the logged in user"""
+
+    def post(self, request, *args, **kwargs):
+        request.user.revoke_signed_tokens()
+        return Response(status=204)